@@ -0,0 +1,40 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_ingest_jobs"
+down_revision = "0001_init"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "ingest_jobs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("rag_id", sa.Integer, sa.ForeignKey("rags.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("state", sa.Enum("queued", "running", "done", "failed", name="jobstateenum"), nullable=False, server_default="queued"),
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer, nullable=False, server_default="3"),
+        sa.Column("error", sa.Text, nullable=True),
+        sa.Column("worker_id", sa.String(128), nullable=True),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+        sa.Column("available_at", sa.DateTime, nullable=False),
+        sa.Column("started_at", sa.DateTime, nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime, nullable=True),
+        sa.Column("finished_at", sa.DateTime, nullable=True),
+    )
+    op.create_index("ix_ingest_jobs_rag_id", "ingest_jobs", ["rag_id"])
+    op.create_index("ix_ingest_jobs_user_id", "ingest_jobs", ["user_id"])
+    op.create_index("ix_ingest_jobs_state", "ingest_jobs", ["state"])
+    op.create_index("ix_ingest_jobs_queued_rag", "ingest_jobs", ["rag_id"], unique=True,
+                    sqlite_where=sa.text("state = 'queued'"), postgresql_where=sa.text("state = 'queued'"))
+    op.create_index("ix_ingest_jobs_running_user", "ingest_jobs", ["user_id"], unique=True,
+                    sqlite_where=sa.text("state = 'running'"), postgresql_where=sa.text("state = 'running'"))
+
+def downgrade():
+    op.drop_index("ix_ingest_jobs_running_user", table_name="ingest_jobs")
+    op.drop_index("ix_ingest_jobs_queued_rag", table_name="ingest_jobs")
+    op.drop_index("ix_ingest_jobs_state", table_name="ingest_jobs")
+    op.drop_index("ix_ingest_jobs_user_id", table_name="ingest_jobs")
+    op.drop_index("ix_ingest_jobs_rag_id", table_name="ingest_jobs")
+    op.drop_table("ingest_jobs")
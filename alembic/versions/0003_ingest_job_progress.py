@@ -0,0 +1,13 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_ingest_job_progress"
+down_revision = "0002_ingest_jobs"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("ingest_jobs", sa.Column("progress", sa.JSON, nullable=True))
+
+def downgrade():
+    op.drop_column("ingest_jobs", "progress")
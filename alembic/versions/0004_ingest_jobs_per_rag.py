@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_ingest_jobs_per_rag"
+down_revision = "0003_ingest_job_progress"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.drop_index("ix_ingest_jobs_running_user", table_name="ingest_jobs")
+    op.create_index("ix_ingest_jobs_running_rag", "ingest_jobs", ["rag_id"], unique=True,
+                    sqlite_where=sa.text("state = 'running'"), postgresql_where=sa.text("state = 'running'"))
+
+def downgrade():
+    op.drop_index("ix_ingest_jobs_running_rag", table_name="ingest_jobs")
+    op.create_index("ix_ingest_jobs_running_user", "ingest_jobs", ["user_id"], unique=True,
+                    sqlite_where=sa.text("state = 'running'"), postgresql_where=sa.text("state = 'running'"))
@@ -0,0 +1,40 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_chunks_fts"
+down_revision = "0004_ingest_jobs_per_rag"
+branch_labels = None
+depends_on = None
+
+FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS chunks_fts_ai AFTER INSERT ON chunks BEGIN "
+    "INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS chunks_fts_ad AFTER DELETE ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS chunks_fts_au AFTER UPDATE ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text); END",
+    "INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')",
+)
+
+def upgrade():
+    with op.batch_alter_table("chunks") as batch:
+        batch.add_column(sa.Column("chunk_id", sa.BigInteger, nullable=False, server_default="0"))
+        batch.add_column(sa.Column("page", sa.Integer, nullable=False, server_default="0"))
+        batch.add_column(sa.Column("block_type", sa.String(32), nullable=False, server_default="text"))
+    op.create_index("ix_chunks_chunk_id", "chunks", ["chunk_id"])
+    if op.get_bind().dialect.name == "sqlite":
+        for ddl in FTS_DDL:
+            op.execute(ddl)
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for name in ("chunks_fts_ai", "chunks_fts_ad", "chunks_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS chunks_fts")
+    op.drop_index("ix_chunks_chunk_id", table_name="chunks")
+    with op.batch_alter_table("chunks") as batch:
+        batch.drop_column("block_type")
+        batch.drop_column("page")
+        batch.drop_column("chunk_id")
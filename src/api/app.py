@@ -5,13 +5,16 @@ from slowapi.util import get_remote_address
 from fastapi import FastAPI
 from starlette.middleware.gzip import GZipMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import auth, rags, documents, search, discussions
+from .routers import auth, rags, documents, search, discussions, jobs
 from dotenv import load_dotenv
 import os
 from .db import Base, engine
+from .chunk_table import ensure_fts
+from .deps import get_model_registry, get_pipeline_config, get_pipeline_logger
 
 # Initialize database schema
 Base.metadata.create_all(bind=engine)
+ensure_fts(engine)
 
 
 # --- Security Headers Configuration ---------------------------------------------------------
@@ -55,6 +58,46 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS','localhost,127.0.0.1').split(',')
 # Load environment variables from .env file
 load_dotenv()
 
+def _warmup_models()-> None:
+    """
+    Load the query-path models into the process-wide ModelRegistry at startup.
+
+    The embedding model, the cross-encoder and the Chroma client are loaded
+    once here instead of on the first `/search` or `/answer` request.
+    Set `WARMUP_MODELS=0` to skip this (e.g. for auth-only test runs).
+    """
+    if os.getenv("WARMUP_MODELS", "1") != "1":
+        return
+    get_model_registry().warmup(get_pipeline_config())
+
+_worker_pool = None
+
+def _start_ingest_workers()-> None:
+    """
+    Run an embedded ingestion worker pool inside the API process.
+
+    Convenient for single-node development (`make run`). Set
+    `INGEST_WORKERS=0` when dedicated workers (`python -m src.worker`,
+    Dockerfile.worker) process the job queue instead.
+    """
+    global _worker_pool
+    n = int(os.getenv("INGEST_WORKERS", "1"))
+    if n <= 0:
+        return
+    from ..worker import WorkerPool
+    _worker_pool = WorkerPool(get_pipeline_config(), get_pipeline_logger(), n)
+    _worker_pool.start_background()
+
+def _shutdown_layout_service()-> None:
+    """
+    Stop the embedded ingestion workers and the node's shared layout model
+    server (if they were started) on app shutdown.
+    """
+    from ..modules.layout_service import shutdown_layout_service
+    if _worker_pool is not None:
+        _worker_pool.stop()
+    shutdown_layout_service()
+
 def create_app()-> FastAPI:
     """
     Create and configure the FastAPI application instance.
@@ -73,6 +116,10 @@ def create_app()-> FastAPI:
     app.include_router(documents.router)
     app.include_router(search.router)
     app.include_router(discussions.router)
+    app.include_router(jobs.router)
+    app.add_event_handler("startup", _warmup_models)
+    app.add_event_handler("startup", _start_ingest_workers)
+    app.add_event_handler("shutdown", _shutdown_layout_service)
     return app
 
 # Instantiate application
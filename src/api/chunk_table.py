@@ -0,0 +1,224 @@
+"""
+SQL storage of chunk texts and SQLite FTS5 keyword search.
+
+With `indexing.vector_store: sql` the `chunks` table is the text store of
+RAG corpora: the Indexer bulk-inserts the chunks it indexes (one
+`executemany` per batch), searchers hydrate hits by their stable chunk id
+(`chunks.chunk_id`, see `src.core.ids`), and lexical search runs on the
+`chunks_fts` FTS5 index, kept in sync with `chunks` by triggers.
+
+Chunk ids derive from the document path and content, so the same file
+uploaded to two RAGs has the same ids: every statement is therefore
+scoped to the RAG's documents, and rows are keyed by a surrogate `id`.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select, text
+from sqlalchemy.engine import Engine
+
+from ..core.ids import CHUNK_INDEX_BITS
+from ..modules.bm25_index import tokenize
+from .models import Chunk, Document
+
+# Rows per executemany / IN (...) batch; keeps statements below SQLite's variable limit.
+SQL_BATCH_SIZE = 500
+
+_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS chunks_fts_ai AFTER INSERT ON chunks BEGIN "
+    "INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS chunks_fts_ad AFTER DELETE ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS chunks_fts_au AFTER UPDATE ON chunks BEGIN "
+    "INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+    "INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text); END",
+)
+
+
+def ensure_fts(engine: Engine) -> bool:
+    """
+    Create the `chunks_fts` FTS5 index and its sync triggers (SQLite only; idempotent).
+
+    Args:
+        engine (Engine): Application engine.
+
+    Returns:
+        bool: True if keyword search is available on this database.
+    """
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        for ddl in _FTS_DDL:
+            conn.exec_driver_sql(ddl)
+    return True
+
+
+class ChunkTable:
+    """
+    ChunkTable — The `chunks` rows of one RAG workspace, as text store and keyword index.
+    """
+
+    def __init__(self, engine: Engine, rag_id: int, user_id: str, logger=None) -> None:
+        """
+        Args:
+            engine (Engine): Application engine.
+            rag_id (int): RAG workspace whose chunks are read and written.
+            user_id (str): Owner of the corpus, reported in hit metadata.
+            logger (Optional[Logger]): Logger for skipped chunks.
+        """
+        self.engine = engine
+        self.rag_id = rag_id
+        self.user_id = str(user_id)
+        self.logger = logger
+        self.fts = engine.dialect.name == "sqlite"
+        self._docs: Dict[str, int] = {}
+
+    def _in_rag(self):
+        """
+        Condition restricting `chunks` rows to the documents of this RAG.
+        """
+        return Chunk.doc_id.in_(select(Document.id).where(Document.rag_id == self.rag_id))
+
+    def _doc_ids(self, conn, filenames: Sequence[str]) -> Dict[str, int]:
+        """
+        Map uploaded file names to their `documents.id` (latest upload wins).
+        """
+        if any(name not in self._docs for name in filenames):
+            rows = conn.execute(
+                select(Document.id, Document.name).where(Document.rag_id == self.rag_id).order_by(Document.id)
+            )
+            self._docs = {name: doc_id for doc_id, name in rows}
+        return self._docs
+
+    def insert(self, chunks: List[Dict]) -> int:
+        """
+        Bulk-insert chunks, replacing this RAG's rows with the same chunk id or document position.
+
+        Args:
+            chunks (List[Dict]): Chunks produced by the Ingestor.
+
+        Returns:
+            int: Number of rows written (chunks of files without a `documents`
+            row, e.g. copied to disk by hand, are skipped).
+        """
+        mask = (1 << CHUNK_INDEX_BITS) - 1
+        with self.engine.begin() as conn:
+            docs = self._doc_ids(conn, {ch["filename"] for ch in chunks})
+            rows = [{
+                "chunk_id": int(ch["chunk_id"]),
+                "doc_id": docs[ch["filename"]],
+                "chunk_index": int(ch["chunk_id"]) & mask,
+                "text": ch["text"],
+                "page": int(ch.get("page", 0)),
+                "block_type": ch.get("type", "text"),
+            } for ch in chunks if ch["filename"] in docs]
+            by_position = delete(Chunk).where(
+                Chunk.doc_id == bindparam("d"), Chunk.chunk_index == bindparam("i")
+            )
+            for start in range(0, len(rows), SQL_BATCH_SIZE):
+                batch = rows[start:start + SQL_BATCH_SIZE]
+                conn.execute(delete(Chunk).where(Chunk.chunk_id.in_([r["chunk_id"] for r in batch]), self._in_rag()))
+                conn.execute(by_position, [{"d": r["doc_id"], "i": r["chunk_index"]} for r in batch])
+                conn.execute(insert(Chunk), batch)
+        if self.logger and len(rows) < len(chunks):
+            self.logger.warning(f"{len(chunks) - len(rows)} chunks of RAG {self.rag_id} have no document row")
+        return len(rows)
+
+    def delete(self, chunk_ids: Sequence[int]) -> None:
+        """
+        Delete chunks of this RAG by chunk id.
+
+        Args:
+            chunk_ids (Sequence[int]): Ids of the chunks to delete.
+        """
+        ids = [int(i) for i in chunk_ids]
+        with self.engine.begin() as conn:
+            for start in range(0, len(ids), SQL_BATCH_SIZE):
+                conn.execute(delete(Chunk).where(Chunk.chunk_id.in_(ids[start:start + SQL_BATCH_SIZE]),
+                                                 self._in_rag()))
+
+    def clear(self) -> None:
+        """
+        Delete every chunk of the RAG.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(delete(Chunk).where(self._in_rag()))
+
+    def get(self, chunk_ids: Sequence[int]) -> List[Optional[Dict]]:
+        """
+        Read chunks of this RAG by chunk id.
+
+        Args:
+            chunk_ids (Sequence[int]): Chunk ids.
+
+        Returns:
+            List[Optional[Dict]]: `{"text", "metadata"}` records aligned with
+            `chunk_ids` (None for unknown ids), in the `ChunkStore` format.
+        """
+        ids = [int(i) for i in chunk_ids]
+        found: Dict[int, Dict] = {}
+        query = (select(Chunk.chunk_id, Chunk.text, Chunk.page, Chunk.block_type, Document.id, Document.name)
+                 .join(Document, Document.id == Chunk.doc_id)
+                 .where(Document.rag_id == self.rag_id))
+        with self.engine.connect() as conn:
+            for start in range(0, len(ids), SQL_BATCH_SIZE):
+                rows = conn.execute(query.where(Chunk.chunk_id.in_(ids[start:start + SQL_BATCH_SIZE])))
+                for cid, body, page, block_type, doc_id, name in rows:
+                    found[cid] = {"text": body, "metadata": {
+                        "user_id": self.user_id,
+                        "rag_id": self.rag_id,
+                        "filename": name,
+                        "doc_id": str(doc_id),
+                        "chunk_id": cid,
+                        "page": page,
+                        "type": block_type,
+                    }}
+        return [found.get(i) for i in ids]
+
+    def search(self, query: str, k: int,
+               filters: Optional[Dict[str, Any]] = None) -> Tuple[List[int], List[float]]:
+        """
+        Keyword search over the RAG's chunks with FTS5 (ranked by its built-in BM25).
+
+        Query terms are quoted and OR-ed, so punctuation in questions ("What
+        is HCL?") never reaches the FTS5 query syntax. Metadata filters are
+        part of the same query, so they never shrink the top `k`.
+
+        Args:
+            query (str): Natural-language query.
+            k (int): Number of results.
+            filters (Optional[Dict[str, Any]]): `filenames`, `types`, `page_min`
+                and/or `page_max` (see `Searcher.search`).
+
+        Returns:
+            Tuple[List[int], List[float]]: Chunk ids and scores (higher is better), best
+            first; empty on databases without FTS5.
+        """
+        terms = sorted(set(tokenize(query)))
+        if not self.fts or not terms or k <= 0:
+            return [], []
+        filters = filters or {}
+        params = {"match": " OR ".join(f'"{t}"' for t in terms), "rag_id": self.rag_id, "k": int(k)}
+        where, lists = ["chunks_fts MATCH :match", "d.rag_id = :rag_id"], []
+        for key, column in (("filenames", "d.name"), ("types", "c.block_type")):
+            if filters.get(key) is not None:
+                where.append(f"{column} IN :{key}")
+                params[key] = list(filters[key])
+                lists.append(bindparam(key, expanding=True))
+        if filters.get("page_min") is not None:
+            where.append("c.page >= :page_min")
+            params["page_min"] = int(filters["page_min"])
+        if filters.get("page_max") is not None:
+            where.append("c.page <= :page_max")
+            params["page_max"] = int(filters["page_max"])
+        sql = text(
+            "SELECT c.chunk_id, bm25(chunks_fts) AS rank FROM chunks_fts "
+            "JOIN chunks c ON c.id = chunks_fts.rowid "
+            "JOIN documents d ON d.id = c.doc_id "
+            f"WHERE {' AND '.join(where)} "
+            "ORDER BY rank LIMIT :k"
+        ).bindparams(*lists)
+        with self.engine.connect() as conn:
+            rows = conn.execute(sql, params).all()
+        return [int(r[0]) for r in rows], [-float(r[1]) for r in rows]
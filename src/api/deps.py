@@ -3,10 +3,15 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from yaml import safe_load
 import os, jwt
 from passlib.hash import argon2, bcrypt
 from .db import SessionLocal
 from .models import User
+from ..core.Logger import LoggerManager
+from ..modules.model_registry import ModelRegistry, get_registry
 
 
 # --------------------------------------------------------------------
@@ -138,3 +143,43 @@ def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security), db
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
+
+
+# --------------------------------------------------------------------
+# Pipeline Runtime Dependencies
+# --------------------------------------------------------------------
+@lru_cache(maxsize=1)
+def get_pipeline_config() -> dict:
+    """
+    Load the pipeline configuration once per process.
+
+    `config/config.yaml` is the source of truth; the `VECTOR_DIR` environment
+    variable overrides `paths.vector_db` for containerized deployments.
+
+    Returns:
+        dict: Parsed pipeline configuration.
+    """
+    cfg = safe_load(Path("config/config.yaml").read_text(encoding="utf-8"))
+    cfg["paths"]["vector_db"] = os.getenv("VECTOR_DIR", cfg["paths"]["vector_db"])
+    return cfg
+
+
+@lru_cache(maxsize=1)
+def get_pipeline_logger():
+    """
+    Configure the pipeline logger once per process.
+
+    Returns:
+        loguru.Logger: The shared, preconfigured logger.
+    """
+    return LoggerManager(Path("storage/logs")).get_logger()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Provide the process-wide ModelRegistry to FastAPI endpoints.
+
+    Returns:
+        ModelRegistry: Registry holding the embedding model, reranker and Chroma clients.
+    """
+    return get_registry(get_pipeline_logger())
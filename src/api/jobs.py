@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import IngestJob, JobStateEnum
+
+
+# --------------------------------------------------------------------
+# Durable ingestion job queue
+# --------------------------------------------------------------------
+# Jobs live in the `ingest_jobs` table, so they survive API restarts and
+# worker crashes without an external broker. State transitions are single
+# conditional UPDATEs, and two partial unique indexes (see `IngestJob`)
+# make the guarantees hold across processes and nodes:
+#   - one queued job per RAG  → uploads arriving while a job waits coalesce;
+#   - one running job per RAG → a RAG's chunk files and index (see `Corpus`)
+#                               are never written by two workers at once.
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_ingest(db: Session, rag_id: int, user_id: int, max_attempts: int = 3) -> IngestJob:
+    """
+    Queue an ingestion + indexing run for a RAG, unless one is already waiting.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        rag_id (int): RAG whose documents changed.
+        user_id (int): Owner of the RAG's data directory (the RAG creator).
+        max_attempts (int): Runs allowed before the job is marked failed.
+
+    Returns:
+        IngestJob: The new job, or the queued job it was merged into.
+    """
+    existing = (db.query(IngestJob)
+                .filter(IngestJob.rag_id == rag_id, IngestJob.state == JobStateEnum.queued)
+                .first())
+    if existing:
+        return existing
+    job = IngestJob(rag_id=rag_id, user_id=user_id, max_attempts=max_attempts)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request queued a job for this RAG in the meantime
+        db.rollback()
+        return (db.query(IngestJob)
+                .filter(IngestJob.rag_id == rag_id, IngestJob.state == JobStateEnum.queued)
+                .one())
+    db.refresh(job)
+    return job
+
+
+def claim_next(db: Session, worker_id: str) -> Optional[IngestJob]:
+    """
+    Atomically move the next runnable job to `running` and return it.
+
+    Jobs of one RAG run strictly in enqueue order: only the RAG's oldest
+    queued job is a candidate, and only while none of its jobs is running.
+    Different RAGs (even of the same user) are processed in parallel.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        worker_id (str): Identifier of the claiming worker (stored on the job).
+
+    Returns:
+        Optional[IngestJob]: The claimed job, or None if nothing is runnable.
+    """
+    now = _now()
+    busy = {rid for (rid,) in db.query(IngestJob.rag_id).filter(IngestJob.state == JobStateEnum.running)}
+    queued: List[IngestJob] = (db.query(IngestJob)
+                               .filter(IngestJob.state == JobStateEnum.queued)
+                               .order_by(IngestJob.id.asc())
+                               .all())
+    for job in queued:
+        if job.rag_id in busy:
+            continue
+        busy.add(job.rag_id)
+        if job.available_at.replace(tzinfo=None) > now.replace(tzinfo=None):
+            continue
+        try:
+            res = db.execute(
+                update(IngestJob)
+                .where(IngestJob.id == job.id, IngestJob.state == JobStateEnum.queued)
+                .values(state=JobStateEnum.running, worker_id=worker_id, started_at=now,
+                        heartbeat_at=now, attempts=IngestJob.attempts + 1, error=None, progress=None)
+            )
+            db.commit()
+        except IntegrityError:
+            # Another worker started a job of the same RAG first
+            db.rollback()
+            continue
+        if res.rowcount == 1:
+            db.refresh(job)
+            return job
+        db.rollback()
+    return None
+
+
+def heartbeat(db: Session, job_id: int) -> None:
+    """
+    Record that the worker running `job_id` is still alive.
+    """
+    db.execute(update(IngestJob)
+               .where(IngestJob.id == job_id, IngestJob.state == JobStateEnum.running)
+               .values(heartbeat_at=_now()))
+    db.commit()
+
+
+def update_progress(db: Session, job_id: int, progress: dict) -> None:
+    """
+    Store a `JobProgress.snapshot()` on a running job (also refreshes its heartbeat).
+    """
+    db.execute(update(IngestJob)
+               .where(IngestJob.id == job_id, IngestJob.state == JobStateEnum.running)
+               .values(progress=progress, heartbeat_at=_now()))
+    db.commit()
+
+
+def complete(db: Session, job_id: int, progress: Optional[dict] = None) -> None:
+    """
+    Mark a running job as done, storing its final progress snapshot if given.
+    """
+    values = {"state": JobStateEnum.done, "finished_at": _now()}
+    if progress is not None:
+        values["progress"] = progress
+    db.execute(update(IngestJob)
+               .where(IngestJob.id == job_id, IngestJob.state == JobStateEnum.running)
+               .values(**values))
+    db.commit()
+
+
+def fail(db: Session, job_id: int, error: str, backoff_s: float = 30.0) -> JobStateEnum:
+    """
+    Record a failed run: requeue the job with exponential backoff, or give up.
+
+    If a newer job for the same RAG is already queued, the retry is merged
+    into it (both would re-ingest the same directory).
+
+    Args:
+        db (Session): SQLAlchemy session.
+        job_id (int): Job that failed.
+        error (str): Error message stored on the job.
+        backoff_s (float): Delay before the first retry; doubled on every attempt.
+
+    Returns:
+        JobStateEnum: The job's new state (`queued` or `failed`).
+    """
+    job = db.get(IngestJob, job_id)
+    if job is None or job.state != JobStateEnum.running:
+        return job.state if job else JobStateEnum.failed
+    job.error = error[-4000:]
+    job.finished_at = _now()
+    newer = (db.query(IngestJob)
+             .filter(IngestJob.rag_id == job.rag_id, IngestJob.state == JobStateEnum.queued)
+             .first())
+    if job.attempts >= job.max_attempts or newer is not None:
+        job.state = JobStateEnum.failed
+        if newer is not None and job.attempts < job.max_attempts:
+            job.error += f"\n(retry merged into job {newer.id})"
+    else:
+        job.state = JobStateEnum.queued
+        job.worker_id = None
+        job.available_at = _now() + timedelta(seconds=backoff_s * 2 ** (job.attempts - 1))
+    db.commit()
+    return job.state
+
+
+def requeue_stale(db: Session, timeout_s: float, backoff_s: float = 30.0) -> List[int]:
+    """
+    Fail over running jobs whose worker stopped sending heartbeats (crash, OOM kill).
+
+    Each counts as a failed attempt, so a document that crashes its worker
+    every time ends up `failed` instead of looping forever.
+
+    Args:
+        db (Session): SQLAlchemy session.
+        timeout_s (float): Heartbeat age after which a worker is considered dead.
+        backoff_s (float): Retry backoff, as in `fail()`.
+
+    Returns:
+        List[int]: Ids of the jobs that were failed over.
+    """
+    cutoff = _now() - timedelta(seconds=timeout_s)
+    stale = [jid for (jid,) in db.query(IngestJob.id)
+             .filter(IngestJob.state == JobStateEnum.running, IngestJob.heartbeat_at < cutoff)]
+    for jid in stale:
+        fail(db, jid, "worker lost (no heartbeat)", backoff_s)
+    return stale
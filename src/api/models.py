@@ -11,6 +11,13 @@ class RoleEnum(str, enum.Enum):
     admin = "admin"
     user = "user"
 
+class JobStateEnum(str, enum.Enum):
+    """Lifecycle states of a background ingestion job."""
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
 class Organization(Base):
     """
     Represents an organization (e.g., company or group) that owns users and RAGs.
@@ -88,12 +95,17 @@ class Document(Base):
 class Chunk(Base):
     """
     Represents a text chunk extracted from a document for embedding or retrieval.
+    `chunk_id` is the chunk's stable id (see `src.core.ids.chunk_id`). It is only
+    unique within a RAG: the same file uploaded to two RAGs yields the same ids.
     """
     __tablename__ = "chunks"
     id = Column(Integer, primary_key=True)
+    chunk_id = Column(BigInteger, nullable=False, index=True)
     doc_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
     chunk_index = Column(Integer, nullable=False)
     text = Column(Text, nullable=False)
+    page = Column(Integer, nullable=False, default=0)
+    block_type = Column(String(32), nullable=False, default="text")
     doc = relationship("Document", back_populates="chunks")
     __table_args__ = (Index("ix_chunk_doc_idx", "doc_id", "chunk_index", unique=True),)
 
@@ -136,3 +148,33 @@ class AuditLog(Base):
     details_json = Column(JSON, nullable=True)
     ip = Column(String(64), nullable=True)
     ts = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+class IngestJob(Base):
+    """
+    Represents a durable ingestion + indexing job processed by `src.worker`.
+
+    Partial unique indexes enforce, at the database level, that a RAG has at
+    most one queued job (later uploads coalesce into it) and at most one
+    running job (its chunk files and index have a single writer).
+    """
+    __tablename__ = "ingest_jobs"
+    id = Column(Integer, primary_key=True)
+    rag_id = Column(Integer, ForeignKey("rags.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    state = Column(Enum(JobStateEnum), nullable=False, default=JobStateEnum.queued, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    error = Column(Text, nullable=True)
+    worker_id = Column(String(128), nullable=True)
+    progress = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    available_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    __table_args__ = (
+        Index("ix_ingest_jobs_queued_rag", "rag_id", unique=True,
+              sqlite_where=state == JobStateEnum.queued.value, postgresql_where=state == JobStateEnum.queued.value),
+        Index("ix_ingest_jobs_running_rag", "rag_id", unique=True,
+              sqlite_where=state == JobStateEnum.running.value, postgresql_where=state == JobStateEnum.running.value),
+    )
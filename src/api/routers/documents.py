@@ -4,8 +4,9 @@ from sqlalchemy.orm import Session
 from pathlib import Path
 from datetime import datetime, timezone
 import shutil, os
-from ..deps import get_db, get_current_user
-from ..models import RAGMember, Document
+from ..deps import get_db, get_current_user, get_pipeline_config
+from ..models import RAG, RAGMember, Document
+from ..jobs import enqueue_ingest
 
 router = APIRouter(prefix="/rags", tags=["documents"])
 # Base directory for document storage (default: ./storage/data)
@@ -24,7 +25,8 @@ async def upload_document(rag_id: int,
 
     This endpoint allows authorized RAG members to upload files that will be
     stored on the server and registered in the database. Uploaded files are stored
-    under a directory structure specific to the RAG (e.g., `storage/data/rag_1/`).
+    in the RAG's corpus directory (e.g., `storage/data/<creator_id>/rag_1/`) and an
+    ingestion job is queued for the RAG.
 
     Args:
         rag_id (int): Identifier of the target RAG workspace.
@@ -41,6 +43,7 @@ async def upload_document(rag_id: int,
             - id (int): Document ID.
             - name (str): Original filename.
             - path (str): Absolute storage path on the server.
+            - job_id (int): Ingestion job that will index the document.
     """
     # Check RAG membership for access authorization
     m = db.query(RAGMember).filter(
@@ -48,9 +51,11 @@ async def upload_document(rag_id: int,
         RAGMember.user_id == user.id
         ).first()
     if not m: raise HTTPException(403, "No access to this RAG")
+    r = db.get(RAG, rag_id)
+    if not r: raise HTTPException(404, "Not found")
 
-    # Ensure RAG-specific storage directory exists
-    rag_dir = STORAGE_DATA / f"rag_{rag_id}"
+    # Ensure RAG-specific storage directory exists (the corpus of the RAG, see `Corpus`)
+    rag_dir = STORAGE_DATA / str(r.creator_user_id) / f"rag_{rag_id}"
     rag_dir.mkdir(parents=True, exist_ok=True)
 
     # Save the uploaded file to disk
@@ -66,4 +71,6 @@ async def upload_document(rag_id: int,
                  size_bytes=out_path.stat().st_size, 
                  uploaded_at=datetime.now(timezone.utc))
     db.add(d); db.commit(); db.refresh(d)
-    return {"id": d.id, "name": d.name, "path": d.path}
+    max_attempts = int(get_pipeline_config().get("jobs", {}).get("max_attempts", 3))
+    job = enqueue_ingest(db, rag_id, r.creator_user_id, max_attempts)
+    return {"id": d.id, "name": d.name, "path": d.path, "job_id": job.id}
@@ -0,0 +1,195 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..db import SessionLocal
+from ..deps import get_db, get_current_user
+from ..models import IngestJob, JobStateEnum, RAGMember, User
+
+router = APIRouter(prefix="/rags", tags=["jobs"])
+
+# Seconds between two reads of the job row while streaming progress events.
+SSE_POLL_INTERVAL = 1.0
+
+
+class JobOut(BaseModel):
+    """Output schema describing an ingestion job and its progress."""
+    id: int
+    rag_id: int
+    state: str
+    attempts: int
+    max_attempts: int
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    elapsed_s: float | None = None
+    pages_done: int = 0
+    pages_total: int = 0
+    docs_done: int = 0
+    docs_total: int = 0
+    chunks_searchable: int = 0
+    stage_seconds: Dict[str, float] = {}
+
+
+def _job_out(job: IngestJob) -> JobOut:
+    """
+    Build the API view of a job from its row and its last progress snapshot.
+
+    Args:
+        job (IngestJob): Job row.
+
+    Returns:
+        JobOut: State, counters and per-stage timings of the job.
+    """
+    progress = job.progress or {}
+    elapsed = None
+    if job.started_at is not None:
+        end = job.finished_at or datetime.now(timezone.utc)
+        elapsed = round((end.replace(tzinfo=None) - job.started_at.replace(tzinfo=None)).total_seconds(), 3)
+    return JobOut(
+        id=job.id,
+        rag_id=job.rag_id,
+        state=job.state.value,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        elapsed_s=elapsed,
+        pages_done=progress.get("pages_done", 0),
+        pages_total=progress.get("pages_total", 0),
+        docs_done=progress.get("docs_done", 0),
+        docs_total=progress.get("docs_total", 0),
+        chunks_searchable=progress.get("chunks_searchable", 0),
+        stage_seconds=progress.get("stage_seconds", {}),
+    )
+
+
+def _check_member(db: Session, rag_id: int, user: User) -> None:
+    """
+    Raise 403 unless `user` is an approved member of the RAG.
+    """
+    m = db.query(RAGMember).filter(
+        RAGMember.rag_id == rag_id,
+        RAGMember.user_id == user.id,
+        RAGMember.approved == True
+    ).first()
+    if not m:
+        raise HTTPException(403, "No access")
+
+
+def _get_job(db: Session, rag_id: int, job_id: int) -> IngestJob:
+    """
+    Load a job of the RAG or raise 404.
+    """
+    job = db.get(IngestJob, job_id)
+    if not job or job.rag_id != rag_id:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+@router.get("/{rag_id}/jobs", response_model=List[JobOut])
+def list_jobs(rag_id: int, limit: int = 20, db: Session = Depends(get_db),
+              user: User = Depends(get_current_user)) -> List[JobOut]:
+    """
+    List the most recent ingestion jobs of a RAG workspace.
+
+    Args:
+        rag_id (int): The RAG ID.
+        limit (int): Maximum number of jobs returned (newest first).
+        db (Session): SQLAlchemy session.
+        user (User): Authenticated user.
+
+    Returns:
+        List[JobOut]: Jobs with their state and progress.
+    """
+    _check_member(db, rag_id, user)
+    q = (db.query(IngestJob)
+         .filter(IngestJob.rag_id == rag_id)
+         .order_by(IngestJob.id.desc())
+         .limit(max(1, min(limit, 100)))
+         .all())
+    return [_job_out(job) for job in q]
+
+
+@router.get("/{rag_id}/jobs/{job_id}", response_model=JobOut)
+def get_job(rag_id: int, job_id: int, db: Session = Depends(get_db),
+            user: User = Depends(get_current_user)) -> JobOut:
+    """
+    Report the state and progress of one ingestion job.
+
+    `chunks_searchable` counts the chunks of the last saved index, so
+    documents are searchable before the job is `done` when streaming
+    indexing is enabled. `stage_seconds` holds the time spent in render,
+    layout, ocr, text, chunk, embed and index (summed over worker threads).
+
+    Args:
+        rag_id (int): The RAG ID.
+        job_id (int): The job ID returned by `POST /rags` or `PATCH /rags/{rag_id}`.
+        db (Session): SQLAlchemy session.
+        user (User): Authenticated user.
+
+    Returns:
+        JobOut: State, pages done/total and per-stage durations.
+    """
+    _check_member(db, rag_id, user)
+    return _job_out(_get_job(db, rag_id, job_id))
+
+
+@router.get("/{rag_id}/jobs/{job_id}/events")
+def job_events(rag_id: int, job_id: int, request: Request, db: Session = Depends(get_db),
+               user: User = Depends(get_current_user)) -> StreamingResponse:
+    """
+    Stream the progress of an ingestion job as Server-Sent Events.
+
+    Emits a `progress` event (a `JobOut` JSON payload) whenever the job
+    changes, and a final `done` or `failed` event before closing the stream.
+    Workers run in other processes, so changes are picked up by reading the
+    job row every `SSE_POLL_INTERVAL` seconds.
+
+    Args:
+        rag_id (int): The RAG ID.
+        job_id (int): The job ID.
+        request (Request): Incoming request (used to stop on client disconnect).
+        db (Session): SQLAlchemy session.
+        user (User): Authenticated user.
+
+    Returns:
+        StreamingResponse: `text/event-stream` of progress events.
+    """
+    _check_member(db, rag_id, user)
+    _get_job(db, rag_id, job_id)
+
+    def read() -> Optional[JobOut]:
+        s = SessionLocal()
+        try:
+            job = s.get(IngestJob, job_id)
+            return _job_out(job) if job else None
+        finally:
+            s.close()
+
+    async def events() -> AsyncIterator[str]:
+        last = None
+        while not await request.is_disconnected():
+            out = await run_in_threadpool(read)
+            if out is None:
+                return
+            payload = out.model_dump_json()
+            if payload != last:
+                last = payload
+                yield f"event: progress\ndata: {payload}\n\n"
+            if out.state in (JobStateEnum.done.value, JobStateEnum.failed.value):
+                yield f"event: {out.state}\ndata: {payload}\n\n"
+                return
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
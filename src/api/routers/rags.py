@@ -5,10 +5,11 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
 from pathlib import Path
-import shutil, os, threading
-import multiprocessing as mp
-from ..deps import get_db, get_current_user
-from ..models import RAG, RAGMember, RoleEnum, User, Document
+import shutil, os
+from ..deps import get_db, get_current_user, get_pipeline_config, get_model_registry
+from ..models import RAG, RAGMember, RoleEnum, User, Document, Chunk, IngestJob, JobStateEnum
+from ..jobs import enqueue_ingest
+from ...core.corpus import Corpus
 
 
 
@@ -19,6 +20,7 @@ class RAGOut(BaseModel):
     id: int
     name: str
     description: str | None = None
+    job_id: int | None = None
 
 class ShareIn(BaseModel):
     """Input schema for sharing a RAG with another user."""
@@ -28,93 +30,45 @@ class RagPatchOut(BaseModel):
     id: int
     name: str
     description: str | None = None
+    job_id: int | None = None
 
 
 
-def _background_ingest_index(user_id: str)-> None:
+def _enqueue_ingest(db: Session, rag_id: int, owner_id: int) -> int:
     """
-    Background ingestion and indexing pipeline.
+    Queue ingestion + indexing of a RAG's documents for the worker pool.
 
-    Runs the data ingestion and indexing process for uploaded documents.
-    The process spawns a separate model server for layout extraction,
-    processes files (OCR, chunking, entity extraction), and updates
-    the user’s RAG index.
+    Args:
+        db (Session): SQLAlchemy session.
+        rag_id (int): RAG whose documents changed.
+        owner_id (int): Owner of the data directory (the RAG creator).
+
+    Returns:
+        int: Id of the queued job (an already queued job is reused).
+    """
+    jobs_cfg = get_pipeline_config().get("jobs", {})
+    return enqueue_ingest(db, rag_id, owner_id, int(jobs_cfg.get("max_attempts", 3))).id
+
+def _drop_rag_storage(db: Session, r: RAG) -> None:
+    """
+    Delete a RAG's documents, chunk files, index and chunk store (or `chunks` rows, or Chroma collection).
+
+    Called when the RAG itself is deleted; jobs still waiting for it are dropped.
 
     Args:
-        user_id (str): The ID of the user initiating ingestion.
+        db (Session): SQLAlchemy session.
+        r (RAG): The RAG being deleted.
     """
-    import multiprocessing as mp
-    from yaml import safe_load
-    from ...core.Logger import LoggerManager
-    from ...core.utils import FileManager
-    from ...core.block_processor import BlockProcessor
-    from ...modules.layout_extractor import LayoutExtractor
-    from ...modules.document_loader import DocumentLoader
-    from ...modules.entity_extractor import EntityExtractor
-    from ...core.chunk_builder import ChunkBuilder
-    from ...pipeline.ingestor import Ingestor
-    from ...pipeline.indexer import Indexer
-    from ...modules.model_server import model_server
-    from pathlib import Path
-    import time
-
-    logger = LoggerManager(Path("storage/logs")).get_logger()
-    files = FileManager(logger)
-    cfg = safe_load(Path("config/config.yaml").read_text(encoding="utf-8"))
-
-    mp.set_start_method("spawn", force=True)
-    manager = mp.Manager()
-    server_req_q = manager.Queue()
-    server_resp_q = manager.Queue()
-    # Start model server for layout extraction
-    server = mp.Process(
-        target=model_server,
-        args=(server_req_q, server_resp_q, "models/yolov8n-doclaynet.pt"),
-    )
-    server.start()
-    time.sleep(3)
-    # Initialize processing components
-    blockproc = BlockProcessor(logger)
-    layout = LayoutExtractor(
-        files,
-        Path("config/config.yaml"),
-        server_req_q=server_req_q,
-        server_resp_q=server_resp_q,
-        ocr_lang="eng",
-    )
-    loader = DocumentLoader()
-    entities = EntityExtractor(files, Path("config/config.yaml"))
-    chunk_size = int(cfg["chunking"]["chunk_size"])
-    tokenizer_model = cfg["tokenizer"]["model"]
-    chunker = ChunkBuilder(
-        chunk_size=chunk_size, tokenizer_model=tokenizer_model, logger=logger
-    )
-
-    # Ingest documents
-    ing = Ingestor(
-        config=cfg,
-        file_manager=files,
-        layout_extractor=layout,
-        document_loader=loader,
-        block_processor=blockproc,
-        entity_extractor=entities,
-        chunk_builder=chunker,
-        logger=logger,
-        user_id=user_id,
-        mode="layout",
-        server_req_q=server_req_q,
-        server_resp_q=server_resp_q,
-    )
-    ing.run()
-
-    # Stop model server
-    server_req_q.put(None)
-    server_resp_q.put(None)
-    server.join()
-
-    # Index ingested documents
-    indexer = Indexer(cfg, files, logger, user_id)
-    indexer.run()
+    db.query(IngestJob).filter(IngestJob.rag_id == r.id, IngestJob.state == JobStateEnum.queued).delete()
+    # One bulk delete instead of loading every row through the documents' cascade.
+    doc_ids = db.query(Document.id).filter(Document.rag_id == r.id)
+    db.query(Chunk).filter(Chunk.doc_id.in_(doc_ids.scalar_subquery())).delete(synchronize_session=False)
+    cfg = get_pipeline_config()
+    registry = get_model_registry()
+    corpus = Corpus(cfg, str(r.creator_user_id), r.id)
+    corpus.delete(registry.get_chroma_client(Path(cfg["paths"]["vector_db"])) if corpus.uses_chroma else None)
+    registry.get_index_cache(int(cfg.get("retrieval", {}).get("index_cache_mb", 1024)) * 1024 * 1024).invalidate(corpus.index_path)
+    shutil.rmtree(corpus.data_dir, ignore_errors=True)
 
 @router.get("", response_model=list[RAGOut])
 def list_rags(db: Session = Depends(get_db), user: User = Depends(get_current_user))-> List[RAGOut]:
@@ -177,8 +131,8 @@ async def create_rag(
                      uploaded_at=datetime.now(timezone.utc))
         db.add(d)
     db.commit(); db.refresh(r)
-    mp.Process(target=_background_ingest_index, args=(str(user.id),)).start()
-    return RAGOut(id=r.id, name=r.name, description=r.description)
+    job_id = _enqueue_ingest(db, r.id, user.id)
+    return RAGOut(id=r.id, name=r.name, description=r.description, job_id=job_id)
 
 @router.delete("/{rag_id}")
 def delete_rag(
@@ -207,6 +161,7 @@ def delete_rag(
             raise HTTPException(403, "Only admin can delete globally")
         r = db.get(RAG, rag_id)
         if not r: raise HTTPException(404, "Not found")
+        _drop_rag_storage(db, r)
         db.delete(r); db.commit()
         return {"detail": "rag deleted globally"}
     else:
@@ -215,6 +170,7 @@ def delete_rag(
         if not remaining:
             r = db.get(RAG, rag_id)
             if r:
+                _drop_rag_storage(db, r)
                 db.delete(r); db.commit()
             return {"detail": "rag removed from your dashboard (rag deleted as no members left)"}
         if not any(mem.role == RoleEnum.admin for mem in remaining):
@@ -347,5 +303,5 @@ async def modify_rag(
             d = Document(rag_id=r.id, name=f.filename, path=str(outp), mime_type=f.content_type, size_bytes=outp.stat().st_size, uploaded_at=datetime.now(timezone.utc))
             db.add(d)
     db.commit(); db.refresh(r)
-    threading.Thread(target=_background_ingest_index, args=(str(r.creator_user_id),), daemon=True).start()
-    return RagPatchOut(id=r.id, name=r.name, description=r.description)
+    job_id = _enqueue_ingest(db, r.id, r.creator_user_id) if files else None
+    return RagPatchOut(id=r.id, name=r.name, description=r.description, job_id=job_id)
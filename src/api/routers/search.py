@@ -1,15 +1,17 @@
 import json
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 import os
-from ..deps import get_db, get_current_user
-from ..models import RAGMember
+from ..deps import get_db, get_current_user, get_pipeline_config, get_pipeline_logger, get_model_registry
+from ..models import RAG, RAGMember
+from ..chunk_table import ChunkTable
+from ..db import engine
 from ...pipeline.searcher import Searcher
 from ...core.utils import FileManager
-from ...core.Logger import LoggerManager
-from pathlib import Path
-from ...modules.reranker import Reranker
+from ...modules.model_registry import ModelRegistry
+from ...modules.reranker import Reranker, DEFAULT_RERANK_MODEL
 import requests
 
 router = APIRouter(prefix="/rags", tags=["search"])
@@ -18,6 +20,18 @@ class SearchIn(BaseModel):
     """Input schema for a RAG search request."""
     query: str
     top_k: int = 20
+    # "dense", "lexical" (BM25/FTS5) or "hybrid" (RRF fusion); defaults to `retrieval.search_mode`.
+    mode: Optional[Literal["dense", "lexical", "hybrid"]] = None
+    # Metadata filters, applied before ranking (AND-ed; pages are inclusive).
+    filenames: Optional[List[str]] = None
+    types: Optional[List[str]] = None
+    page_min: Optional[int] = None
+    page_max: Optional[int] = None
+
+    def filters(self) -> dict:
+        """Return the metadata filter passed to `Searcher.search`."""
+        return {"filenames": self.filenames, "types": self.types,
+                "page_min": self.page_min, "page_max": self.page_max}
 
 class AnswerIn(BaseModel):
     """Input schema for an answer-generation request."""
@@ -28,27 +42,34 @@ def search_rag(
     rag_id: int,
     body: SearchIn,
     db: Session = Depends(get_db),
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    registry: ModelRegistry = Depends(get_model_registry)
     )-> dict:
     """
-    Perform a semantic search within a RAG workspace.
+    Perform a semantic, lexical or hybrid search within a RAG workspace.
 
-    This endpoint retrieves the most relevant document chunks
-    for a given query using vector search.
+    This endpoint retrieves the most relevant document chunks for a given
+    query using vector search, BM25 keyword search, or both fused with
+    Reciprocal Rank Fusion (`mode`), optionally restricted to some files,
+    pages or block types (e.g. only `lecture_05.pdf`, only titles/tables).
 
     Args:
         rag_id (int): Identifier of the RAG workspace.
-        body (SearchIn): Contains the query and `top_k` parameter.
+        body (SearchIn): Contains the query, `top_k`, the search `mode` and metadata filters.
         db (Session): SQLAlchemy database session dependency.
         user: Authenticated user object from JWT.
+        registry (ModelRegistry): Process-wide models shared across requests.
 
     Raises:
         HTTPException: 
             - 403 if the user does not have access to the RAG.
+            - 409 if filters are given but the RAG must be re-indexed to support them.
 
     Returns:
-        dict: A dictionary containing a list of retrieved documents, e.g.
-              `{"results": [{"text": "...", "score": 0.83}, ...]}`
+        dict: A dictionary containing a list of retrieved documents and the search
+              path that produced them ("exact", "quantized", "hnsw", "bm25",
+              "<dense path>+bm25" for hybrid, or "empty"), e.g.
+              `{"results": [{"text": "...", "score": 0.17}, ...], "path": "exact"}`
     """
  
     m = db.query(RAGMember).filter(
@@ -58,34 +79,36 @@ def search_rag(
     if not m:
         raise HTTPException(403, "No access")
 
-   
-    log_manager = LoggerManager(Path("storage/logs"))
-    logger = log_manager.get_logger()
-    files = FileManager(logger)
-
-
-    cfg = {
-        "paths": {"vector_db": os.getenv("VECTOR_DIR", "storage/vectors")},
-        "models": {"embedding_model": "sentence-transformers/all-MiniLM-L6-v2"}
-    }
 
+    logger = get_pipeline_logger()
+    files = FileManager(logger)
+    cfg = get_pipeline_config()
 
-    searcher = Searcher(cfg, files, logger, str(user.id))
+    rag = db.get(RAG, rag_id)
+    if not rag:
+        raise HTTPException(404, "Not found")
+    # The RAG's own index: every member shares the owner's corpus (and its cached index)
+    searcher = Searcher(cfg, files, logger, str(rag.creator_user_id), registry=registry, rag_id=rag_id,
+                        chunk_table=ChunkTable(engine, rag_id, str(rag.creator_user_id)))
 
 
-    res = searcher.search(body.query, top_k=body.top_k)
+    filters = body.filters()
+    if any(v is not None for v in filters.values()) and not searcher.can_filter:
+        raise HTTPException(409, "This RAG was indexed before search filters existed; re-index it to filter")
+    res = searcher.search(body.query, top_k=body.top_k, mode=body.mode, filters=filters)
 
 
-    logger.info(f"Search done for user {user.id} | query='{body.query}' | results={len(res)}")
+    logger.info(f"Search done for user {user.id} | query='{body.query}' | results={len(res)} | path={searcher.last_path}")
 
-    return {"results": res}
+    return {"results": res, "path": searcher.last_path}
 
 @router.post("/{rag_id}/answer")
 def get_answer(
     rag_id: int,
     body: AnswerIn,
     db: Session = Depends(get_db),
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    registry: ModelRegistry = Depends(get_model_registry)
     )-> dict:
     """
     Generate a context-grounded answer from RAG documents.
@@ -100,6 +123,7 @@ def get_answer(
         body (AnswerIn): Contains the user's query.
         db (Session): SQLAlchemy database session dependency.
         user: Authenticated user.
+        registry (ModelRegistry): Process-wide models shared across requests.
 
     Raises:
         HTTPException:
@@ -124,26 +148,26 @@ def get_answer(
     if not m:
         raise HTTPException(403, "No access")
 
-
-    log_manager = LoggerManager(Path("storage/logs"))
-    logger = log_manager.get_logger()
+    logger = get_pipeline_logger()
     files = FileManager(logger)
-
-
-    cfg = {
-        "paths": {"vector_db": os.getenv("VECTOR_DIR", "storage/vectors")},
-        "models": {"embedding_model": "sentence-transformers/all-MiniLM-L6-v2"}
-    }
-
-
-    searcher = Searcher(cfg, files, logger, str(user.id))
+    cfg = get_pipeline_config()
+
+    rag = db.get(RAG, rag_id)
+    if not rag:
+        raise HTTPException(404, "Not found")
+    # The RAG's own index: every member shares the owner's corpus (and its cached index)
+    searcher = Searcher(cfg, files, logger, str(rag.creator_user_id), registry=registry, rag_id=rag_id,
+                        chunk_table=ChunkTable(engine, rag_id, str(rag.creator_user_id)))
     retrieved_docs = searcher.search(body.query, top_k=20)
 
     if not retrieved_docs:
         return {"answer": "No relevant documents found for this question."}
 
  
-    reranker = Reranker(logger=logger)
+    reranker = Reranker(
+        logger=logger,
+        model=registry.get_cross_encoder(cfg["models"].get("rerank_model", DEFAULT_RERANK_MODEL)),
+    )
     reranked_docs = reranker.rerank(body.query, retrieved_docs, top_k=5)
 
  
@@ -0,0 +1,104 @@
+import shutil
+from pathlib import Path
+from typing import Optional
+
+
+class Corpus:
+    """
+    Corpus — Storage layout of one searchable document set.
+
+    A corpus is a RAG workspace (`rag_id` given) or, for the CLI, the whole
+    data directory of a user. Every artifact of the pipeline is derived from
+    its `key` (`rag_<rag_id>` or `<user_id>`):
+
+        <paths.data_dir>/<user_id>/rag_<rag_id>/    uploaded documents
+        chunks_<key>.json, manifest_<key>.json,     ingestion output (next to
+        chunks_delta_<key>.json                     `paths.chunks_file`)
+        <paths.vector_db>/<key>/hnsw_index.bin      ANN index + label table
+        <paths.vector_db>/<key>/labels.npy
+        <paths.vector_db>/<key>/chunks.bin          chunk texts and metadata by label
+        <paths.vector_db>/<key>/chunk_offsets.npy   (`ChunkStore`, vector_store: hnsw)
+        <paths.vector_db>/<key>/vectors.*           flat float32 / quantized vectors by
+                                                    label (`VectorStore`)
+        <paths.vector_db>/<key>/bm25_*              BM25 forward index + postings
+                                                    (`Bm25Index`)
+        <paths.vector_db>/<key>/meta_*              file / page / block type per label +
+                                                    posting lists (`MetadataIndex`)
+        Chroma collection `chunks_<key>`            texts, metadata and a second copy
+                                                    of the vectors (vector_store: chroma)
+        `chunks` SQL table (+ `chunks_fts`)         texts by chunk id and FTS5 keyword
+                                                    index (vector_store: sql, `ChunkTable`)
+
+    Because the index of a RAG lives at one path, every member searching a
+    shared RAG hits the same entry of the process-wide IndexCache, and each
+    RAG's index can be loaded, evicted, rebuilt or deleted on its own.
+    """
+
+    def __init__(self, config: dict, user_id: str, rag_id: Optional[int] = None) -> None:
+        """
+        Args:
+            config (dict): Pipeline configuration (uses `paths.data_dir`,
+                `paths.chunks_file`, `paths.vector_db` and `indexing.vector_store`).
+            user_id (str): Owner of the documents (the RAG creator).
+            rag_id (Optional[int]): RAG workspace; None for the user's whole data directory.
+        """
+        paths = config["paths"]
+        self.user_id = str(user_id)
+        self.rag_id = rag_id
+        self.key = f"rag_{rag_id}" if rag_id is not None else self.user_id
+
+        self.data_dir = Path(paths["data_dir"]) / self.user_id
+        if rag_id is not None:
+            self.data_dir = self.data_dir / f"rag_{rag_id}"
+        chunks = Path(paths["chunks_file"])
+        self.chunks_file = chunks.with_name(f"chunks_{self.key}.json")
+        self.delta_file = chunks.with_name(f"chunks_delta_{self.key}.json")
+        self.manifest_file = chunks.with_name(f"manifest_{self.key}.json")
+        self.index_dir = Path(paths["vector_db"]) / self.key
+        self.index_path = self.index_dir / "hnsw_index.bin"
+        self.labels_path = self.index_dir / "labels.npy"
+        self.collection_name = f"chunks_{self.key}"
+        self.vector_store = str(config.get("indexing", {}).get("vector_store", "hnsw")).lower()
+        if self.vector_store not in ("hnsw", "chroma", "sql"):
+            raise ValueError(f"Unknown indexing.vector_store: {self.vector_store}")
+        if self.vector_store == "sql" and rag_id is None:
+            raise ValueError("indexing.vector_store: sql requires a RAG workspace")
+
+    @property
+    def uses_chroma(self) -> bool:
+        """
+        True when texts and metadata live in a Chroma collection instead of the `ChunkStore`.
+        """
+        return self.vector_store == "chroma"
+
+    @property
+    def uses_sql(self) -> bool:
+        """
+        True when texts live in the `chunks` SQL table, searched lexically with FTS5.
+        """
+        return self.vector_store == "sql"
+
+    @property
+    def uses_chunk_store(self) -> bool:
+        """
+        True when texts and metadata live in the corpus' `ChunkStore`.
+        """
+        return self.vector_store == "hnsw"
+
+    def delete(self, chroma_client=None) -> None:
+        """
+        Remove the corpus' ingestion output, index files and Chroma collection.
+
+        Uploaded documents are left in place.
+
+        Args:
+            chroma_client (Optional[PersistentClient]): Client holding the collection.
+        """
+        for path in (self.chunks_file, self.delta_file, self.manifest_file):
+            path.unlink(missing_ok=True)
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+        if chroma_client is not None:
+            try:
+                chroma_client.delete_collection(self.collection_name)
+            except Exception:
+                pass
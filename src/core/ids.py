@@ -0,0 +1,83 @@
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+# Low bits of a chunk id hold the chunk's position inside its document,
+# the high bits hold a fingerprint of the document. 20 bits allow ~1M chunks
+# per document; the remaining 43 bits keep ids positive in a signed int64.
+CHUNK_INDEX_BITS = 20
+DOC_NUM_BITS = 43
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 digest of a file's content.
+
+    Args:
+        path (Path): File to hash.
+        block_size (int): Read size in bytes.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def document_id(path: Path, root: Path, content_hash: Optional[str] = None) -> str:
+    """
+    Compute a stable identifier for a document.
+
+    The id depends on the file's path relative to `root` and on its content,
+    so re-ingesting an unchanged file yields the same id, while editing or
+    renaming it yields a new one (its old chunks are then removed from the index).
+
+    Args:
+        path (Path): Document file.
+        root (Path): Directory the relative path is computed from (the user's data dir).
+        content_hash (Optional[str]): Precomputed `file_sha256(path)`, if already known.
+
+    Returns:
+        str: 40-character hex document id.
+    """
+    try:
+        rel = path.relative_to(root).as_posix()
+    except ValueError:
+        rel = path.name
+    payload = f"{rel}\x00{content_hash or file_sha256(path)}".encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def doc_num(doc_id: str) -> int:
+    """
+    Reduce a document id to the fingerprint stored in the high bits of its chunk ids.
+
+    Args:
+        doc_id (str): Hex document id from `document_id()`.
+
+    Returns:
+        int: 43-bit document fingerprint.
+    """
+    return int(doc_id[:16], 16) >> (64 - DOC_NUM_BITS)
+
+
+def chunk_id(doc_id: str, index: int) -> int:
+    """
+    Build the stable, document-scoped integer id of a chunk.
+
+    Args:
+        doc_id (str): Hex document id from `document_id()`.
+        index (int): Position of the chunk inside the document.
+
+    Returns:
+        int: Positive int64 chunk id, usable as Chroma id and SQL primary key.
+
+    Raises:
+        ValueError: If the document has more chunks than `CHUNK_INDEX_BITS` can address.
+    """
+    if index >= (1 << CHUNK_INDEX_BITS):
+        raise ValueError(f"Too many chunks in document {doc_id}: {index}")
+    return (doc_num(doc_id) << CHUNK_INDEX_BITS) | index
@@ -0,0 +1,126 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.core.ids import chunk_id, document_id, file_sha256
+from src.core.utils import FileManager
+
+
+class IngestionManifest:
+    """
+    IngestionManifest — Per-user record of which files were ingested, and into which chunks.
+
+    For every document (keyed by its path relative to the user's data dir)
+    the manifest stores its content hash, size and mtime, its `doc_id` and
+    the range of chunk ids it produced. Comparing it with the data directory
+    tells the Ingestor which files were added, modified or deleted since the
+    last run, so only those are extracted and chunked again.
+
+    A file whose size and mtime are unchanged is trusted without reading it;
+    otherwise its content hash decides (a `touch` does not trigger re-ingestion).
+
+    Stored as JSON next to the chunks file (`manifest_<key>.json`, see `Corpus`).
+    """
+
+    def __init__(self, path: Path, file_manager: FileManager) -> None:
+        """
+        Load the manifest at `path`, or start an empty one.
+
+        Args:
+            path (Path): Location of the manifest JSON file.
+            file_manager (FileManager): Utility for JSON I/O.
+        """
+        self.path = path
+        self.files = file_manager
+        self.entries: Dict[str, Dict] = self.files.load_json(path) if path.exists() else {}
+
+    @staticmethod
+    def _rel(path: Path, root: Path) -> str:
+        try:
+            return path.relative_to(root).as_posix()
+        except ValueError:
+            return path.name
+
+    def diff(self, docs: List[Path], root: Path) -> Tuple[Dict[Path, str], List[str], Dict[str, Dict]]:
+        """
+        Compare the documents on disk with the manifest.
+
+        Args:
+            docs (List[Path]): Documents currently in the user's data directory.
+            root (Path): The user's data directory.
+
+        Returns:
+            Tuple:
+                - Dict[Path, str]: Added or modified documents → their new `doc_id`.
+                - List[str]: `doc_id`s whose chunks are obsolete (modified or deleted files).
+                - Dict[str, Dict]: Pending manifest entries of the added/modified
+                  documents (pass to `record()` once they are chunked).
+        """
+        changed: Dict[Path, str] = {}
+        pending: Dict[str, Dict] = {}
+        obsolete: List[str] = []
+        seen = set()
+
+        for doc in docs:
+            rel = self._rel(doc, root)
+            seen.add(rel)
+            st = doc.stat()
+            entry = self.entries.get(rel)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+                continue
+            sha = file_sha256(doc)
+            if entry and entry["sha256"] == sha:
+                entry["mtime_ns"] = st.st_mtime_ns
+                continue
+            if entry:
+                obsolete.append(entry["doc_id"])
+            doc_id = document_id(doc, root, content_hash=sha)
+            changed[doc] = doc_id
+            pending[rel] = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "doc_id": doc_id}
+
+        for rel in list(self.entries):
+            if rel not in seen:
+                obsolete.append(self.entries.pop(rel)["doc_id"])
+        return changed, obsolete, pending
+
+    def record(self, pending: Dict[str, Dict], num_chunks: Dict[str, int]) -> None:
+        """
+        Add (or replace) entries for freshly chunked documents.
+
+        Args:
+            pending (Dict[str, Dict]): Entries returned by `diff()` or `entries_for()`.
+            num_chunks (Dict[str, int]): Number of chunks produced per `doc_id`.
+        """
+        for rel, entry in pending.items():
+            n = num_chunks.get(entry["doc_id"], 0)
+            entry["num_chunks"] = n
+            entry["chunk_ids"] = [chunk_id(entry["doc_id"], 0), chunk_id(entry["doc_id"], n - 1)] if n else []
+            self.entries[rel] = entry
+
+    def entries_for(self, docs: List[Path], root: Path) -> Tuple[Dict[Path, str], Dict[str, Dict]]:
+        """
+        Build fresh entries for all `docs` (full re-ingestion).
+
+        Args:
+            docs (List[Path]): Documents to ingest.
+            root (Path): The user's data directory.
+
+        Returns:
+            Tuple[Dict[Path, str], Dict[str, Dict]]: Documents → `doc_id`, and pending entries.
+        """
+        self.entries = {}
+        doc_ids, pending = {}, {}
+        for doc in docs:
+            st = doc.stat()
+            sha = file_sha256(doc)
+            doc_id = document_id(doc, root, content_hash=sha)
+            doc_ids[doc] = doc_id
+            pending[self._rel(doc, root)] = {
+                "sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "doc_id": doc_id,
+            }
+        return doc_ids, pending
+
+    def save(self) -> None:
+        """
+        Write the manifest to disk.
+        """
+        self.files.save_json(self.entries, self.path)
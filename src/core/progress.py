@@ -0,0 +1,132 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+
+# Pipeline stages timed by `JobProgress`:
+#   render – rasterizing scanned PDF pages          layout – YOLO round trips
+#   ocr    – Tesseract on detected regions          text   – text layer / DOCX / TXT reading
+#   chunk  – header/footer cleanup + chunking       embed  – SentenceTransformer encoding
+#   index  – HNSW + chunk store writes and index saves
+STAGES = ("render", "layout", "ocr", "text", "chunk", "embed", "index")
+
+
+class JobProgress:
+    """
+    JobProgress — Thread-safe progress counters and per-stage timings of one ingestion run.
+
+    Shared by the LayoutExtractor (pages), the Ingestor (documents, chunking)
+    and the Indexer (embedding, indexing, searchable chunks). Stage times
+    are summed over all threads, so with several page workers `ocr` can
+    exceed the wall-clock time; their ratios show which stage dominates.
+
+    An optional `sink` receives a snapshot whenever something changed, at
+    most every `interval` seconds (and on `flush()`); the ingestion worker
+    uses it to persist progress on the job row.
+    """
+
+    def __init__(self, sink: Optional[Callable[[Dict], None]] = None, interval: float = 1.0) -> None:
+        """
+        Args:
+            sink (Optional[Callable[[Dict], None]]): Called with `snapshot()` on changes.
+            interval (float): Minimum seconds between two sink calls.
+        """
+        self._lock = threading.Lock()
+        self._sink = sink
+        self._interval = interval
+        self._last_emit = float("-inf")
+        self.pages_total = 0
+        self.pages_done = 0
+        self.docs_total = 0
+        self.docs_done = 0
+        self.chunks_searchable = 0
+        self.stage_seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+
+    def add_pages(self, n: int) -> None:
+        """
+        Add `n` pages to the total to process.
+        """
+        with self._lock:
+            self.pages_total += n
+        self._emit()
+
+    def page_done(self, n: int = 1) -> None:
+        """
+        Count `n` pages as extracted.
+        """
+        with self._lock:
+            self.pages_done += n
+        self._emit()
+
+    def set_docs(self, total: int) -> None:
+        """
+        Set the number of documents this run processes.
+        """
+        with self._lock:
+            self.docs_total = total
+        self._emit()
+
+    def doc_done(self) -> None:
+        """
+        Count one document as extracted.
+        """
+        with self._lock:
+            self.docs_done += 1
+        self._emit()
+
+    def set_searchable(self, n: int) -> None:
+        """
+        Record how many chunks the last saved index makes searchable.
+        """
+        with self._lock:
+            self.chunks_searchable = n
+        self._emit()
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        """
+        Add `seconds` to the time spent in `stage`.
+        """
+        with self._lock:
+            self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """
+        Time the enclosed block and add it to `stage`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict:
+        """
+        Return a JSON-serializable copy of the counters and timings.
+        """
+        with self._lock:
+            return {
+                "pages_total": self.pages_total,
+                "pages_done": self.pages_done,
+                "docs_total": self.docs_total,
+                "docs_done": self.docs_done,
+                "chunks_searchable": self.chunks_searchable,
+                "stage_seconds": {k: round(v, 3) for k, v in self.stage_seconds.items()},
+            }
+
+    def _emit(self, force: bool = False) -> None:
+        if self._sink is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_emit < self._interval:
+                return
+            self._last_emit = now
+        self._sink(self.snapshot())
+
+    def flush(self) -> None:
+        """
+        Send the current snapshot to the sink, regardless of the throttle.
+        """
+        self._emit(force=True)
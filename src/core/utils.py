@@ -1,6 +1,8 @@
 
 from pathlib import Path
 import json
+import os
+import numpy as np
 import yaml
 
 class FileManager:
@@ -114,3 +116,24 @@ class FileManager:
         if self.logger:
             self.logger.info(f'Loaded JSON from: {path}')
         return data
+
+
+
+    def save_npy(self, array: np.ndarray, path: Path):
+        """
+        Save a NumPy array as a `.npy` file, replacing any previous file atomically.
+
+        The array is written to a temporary file first and then renamed over
+        `path`, so readers that memory-map the file never see a partial write.
+
+        Args:
+            array (np.ndarray): Array to save.
+            path (Path): Destination `.npy` path.
+        """
+        self.ensure_dir(path.parent)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+        if self.logger:
+            self.logger.info(f"Saved array {array.shape} to: {path}")
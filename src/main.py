@@ -4,6 +4,7 @@ Main entrypoint for the RAG (Retrieval-Augmented Generation) pipeline.
 This script orchestrates the full pipeline stages for each user:
     1. ingest   – Extract structured text chunks from documents.
     2. index    – Embed chunks and store them in the vector database.
+       pipeline – Both of the above, concurrently (documents are indexed as they are chunked).
     3. search   – Retrieve and rerank relevant chunks for a given query.
     4. answer   – Generate a contextual answer using an LLM (Ollama).
 
@@ -13,6 +14,7 @@ Usage:
 Example:
     python -m src.main ingest user123
     python -m src.main index user123
+    python -m src.main pipeline user123
     python -m src.main search user123 "What is supply chain management?"
     python -m src.main answer user123 "Summarize this document set."
 """
@@ -25,8 +27,10 @@ from src.pipeline.answerer import Answerer
 from src.pipeline.searcher import Searcher
 from src.pipeline.indexer import Indexer
 from src.pipeline.ingestor import Ingestor
-from src.modules.model_server import model_server
-from src.modules.reranker import Reranker
+from src.pipeline.streaming import ingest_and_index
+from src.modules.layout_service import LayoutService, DEFAULT_LAYOUT_MODEL
+from src.modules.reranker import Reranker, DEFAULT_RERANK_MODEL
+from src.modules.model_registry import get_registry
 
 from src.core.Logger import LoggerManager
 from src.core.utils import FileManager
@@ -37,7 +41,7 @@ from src.modules.document_loader import DocumentLoader
 from src.modules.entity_extractor import EntityExtractor
 
 
-def run_ingest_stage(config: dict, files: FileManager, logger, user_id: str) -> None:
+def run_ingest_stage(config: dict, files: FileManager, logger, user_id: str, stream: bool = False) -> None:
     """
     Run the ingestion stage: extract, clean, and chunk documents for a given user.
 
@@ -46,28 +50,27 @@ def run_ingest_stage(config: dict, files: FileManager, logger, user_id: str) ->
         - Extract layout blocks from documents
         - Remove headers/footers and duplicates
         - Split text into chunks and save them as JSON
+        - With `stream=True`, also index each document as soon as it is chunked
     """
     logger.info(f"Starting ingestion stage for user '{user_id}'...")
 
-    manager = mp.Manager()
-    server_req_q = manager.Queue()
-    server_resp_q = manager.Queue()
-
-    # Start the YOLO-based document layout model server in a separate process
-    server = mp.Process(
-        target=model_server,
-        args=(server_req_q, server_resp_q, "models/yolov8n-doclaynet.pt"),
-        daemon=True,
+    # Start the YOLO-based document layout model server and wait until it is ready
+    service = LayoutService(
+        config["layout"].get("model_path", DEFAULT_LAYOUT_MODEL),
+        logger,
+        reply_slots=int(config["layout"].get("reply_slots", 32)),
+        max_batch_size=int(config["layout"].get("max_batch_size", 8)),
+        max_wait_ms=float(config["layout"].get("max_wait_ms", 10)),
     )
-    server.start()
+    service.start()
+    layout_client = service.client()
 
     # Initialize processing modules
     blockproc = BlockProcessor(logger)
     layout = LayoutExtractor(
         file_manager=files,
         config_path=Path("config/config.yaml"),
-        server_req_q=server_req_q,
-        server_resp_q=server_resp_q,
+        layout_client=layout_client,
         ocr_lang="eng",
     )
     loader = DocumentLoader()
@@ -90,17 +93,18 @@ def run_ingest_stage(config: dict, files: FileManager, logger, user_id: str) ->
         logger=logger,
         user_id=user_id,
         mode="layout",
-        server_req_q=server_req_q,
-        server_resp_q=server_resp_q,
     )
 
-    # Run ingestion
-    ingestor.run()
-
-    # Stop model server cleanly
-    server_req_q.put(None)
-    server_resp_q.put(None)
-    server.join()
+    try:
+        if stream:
+            # Index each document as soon as it is chunked
+            indexer = Indexer(config, files, logger, user_id)
+            ingest_and_index(ingestor, indexer, int(config.get("indexing", {}).get("stream_queue_size", 8)))
+        else:
+            ingestor.run()
+    finally:
+        # Stop model server cleanly
+        service.shutdown()
     logger.info(f"Ingestion stage completed for user '{user_id}'.")
 
 
@@ -124,7 +128,8 @@ def run_search_stage(config: dict, files: FileManager, logger, user_id: str, que
     searcher = Searcher(config, files, logger, user_id)
     results = searcher.search(query, top_k=20)
 
-    reranker = Reranker(logger=logger)
+    rerank_model = config["models"].get("rerank_model", DEFAULT_RERANK_MODEL)
+    reranker = Reranker(logger=logger, model=get_registry(logger).get_cross_encoder(rerank_model))
     reranked = reranker.rerank(query, results, top_k=5)
 
     print("\n🔍 Top 5 Re-ranked Results:")
@@ -164,6 +169,7 @@ if __name__ == "__main__":
         print("Available stages:")
         print("  ingest   – Extract and chunk documents")
         print("  index    – Generate embeddings and build vector DB")
+        print("  pipeline – Ingest and index concurrently (streaming)")
         print("  search   – Perform semantic retrieval")
         print("  answer   – Generate contextual answers with LLM\n")
         sys.exit(1)
@@ -175,6 +181,8 @@ if __name__ == "__main__":
     try:
         if stage == "ingest":
             run_ingest_stage(config, files, logger, user_id)
+        elif stage == "pipeline":
+            run_ingest_stage(config, files, logger, user_id, stream=True)
         elif stage == "index":
             run_index_stage(config, files, logger, user_id)
         elif stage == "search":
@@ -184,7 +192,7 @@ if __name__ == "__main__":
             question = extra or "Generate me exams for these courses."
             run_answer_stage(config, files, logger, user_id, question)
         else:
-            logger.error(f"Unknown stage: '{stage}'. Please specify one of: ingest | index | search | answer")
+            logger.error(f"Unknown stage: '{stage}'. Please specify one of: ingest | index | pipeline | search | answer")
     except Exception as e:
         logger.exception(f"Pipeline execution failed: {e}")
         sys.exit(1)
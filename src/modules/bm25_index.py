@@ -0,0 +1,261 @@
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Okapi BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, acronyms, codes and numbers ("HCL", "CS101", "H2O") are kept whole.
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase lexical terms.
+
+    Args:
+        text (str): Chunk text or query.
+
+    Returns:
+        List[str]: Terms in order of appearance.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+class Bm25Index:
+    """
+    Bm25Index — Persistent BM25 inverted index of a corpus, addressed by HNSW label.
+
+    Two array-backed structures live in the corpus' index directory:
+
+      - a forward index, appended as chunks are indexed (one
+        `(term_id, tf)` run per label), so that postings can be rebuilt
+        without re-reading or re-tokenizing any text:
+
+            bm25_vocab.json          term → term id
+            bm25_fwd_terms.u32       term ids, label after label
+            bm25_fwd_tfs.u16         their term frequencies
+            bm25_fwd_offsets.npy     int64 run offsets, len(labels) + 1 entries
+
+      - the inverted index read by searchers, memory-mapped:
+
+            bm25_post_offsets.npy    int64 posting offsets per term id
+            bm25_post_labels.npy     int32 labels, grouped by term
+            bm25_post_weights.npy    float32 BM25 impacts of (term, label)
+
+    Impacts (`idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))`)
+    are computed over live labels when postings are built, so scoring a
+    query is a gather of its terms' postings and one `bincount` — a few
+    milliseconds even for large corpora.
+
+    Postings are rebuilt on `save(..., postings=True)` (end of an indexing
+    run); streaming saves only persist the forward index, so chunks indexed
+    mid-run are found by dense search first and by lexical search once the
+    run is over.
+    """
+
+    VOCAB_FILE = "bm25_vocab.json"
+    FWD_TERMS = "bm25_fwd_terms.u32"
+    FWD_TFS = "bm25_fwd_tfs.u16"
+    FWD_OFFSETS = "bm25_fwd_offsets.npy"
+    POST_OFFSETS = "bm25_post_offsets.npy"
+    POST_LABELS = "bm25_post_labels.npy"
+    POST_WEIGHTS = "bm25_post_weights.npy"
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Args:
+            directory (Path): Directory of the index (the corpus' index directory).
+        """
+        self.dir = Path(directory)
+        self.vocab: Dict[str, int] = {}
+        self._offsets: List[int] = [0]
+        self._replace = False
+        self._post_offsets: Optional[np.ndarray] = None
+        self._post_labels: Optional[np.ndarray] = None
+        self._post_weights: Optional[np.ndarray] = None
+
+    def _path(self, name: str, tmp: bool = False) -> Path:
+        return self.dir / (name + ".tmp" if tmp else name)
+
+    def _save_npy(self, name: str, array: np.ndarray) -> None:
+        tmp = self._path(name, tmp=True)
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, self._path(name))
+
+    # --- writer -------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def load(self, count: int) -> bool:
+        """
+        Open the forward index for appending after the first `count` labels.
+
+        Args:
+            count (int): Number of labels of the index.
+
+        Returns:
+            bool: False if the forward index does not cover `count` labels (the index must be rebuilt).
+        """
+        offsets_path = self._path(self.FWD_OFFSETS)
+        if not (offsets_path.exists() and self._path(self.VOCAB_FILE).exists()):
+            return False
+        offsets = np.load(offsets_path)
+        if len(offsets) < count + 1:
+            return False
+        self._offsets = offsets[:count + 1].astype(np.int64).tolist()
+        self.vocab = json.loads(self._path(self.VOCAB_FILE).read_text(encoding="utf-8"))
+        end = self._offsets[-1]
+        os.truncate(self._path(self.FWD_TERMS), end * 4)
+        os.truncate(self._path(self.FWD_TFS), end * 2)
+        return True
+
+    def reset(self) -> None:
+        """
+        Start an empty generation of the index (made visible by `save()`).
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        for name in (self.FWD_TERMS, self.FWD_TFS):
+            open(self._path(name, tmp=True), "wb").close()
+        self.vocab, self._offsets, self._replace = {}, [0], True
+
+    def append(self, texts: Sequence[str]) -> None:
+        """
+        Add the terms of chunks that were just given consecutive new labels.
+
+        Args:
+            texts (Sequence[str]): Chunk texts, in label order.
+        """
+        if not texts:
+            return
+        base = self._offsets[-1]
+        terms: List[int] = []
+        tfs: List[int] = []
+        for text in texts:
+            for term, tf in Counter(tokenize(text)).items():
+                tid = self.vocab.get(term)
+                if tid is None:
+                    tid = self.vocab[term] = len(self.vocab)
+                terms.append(tid)
+                tfs.append(min(tf, 65535))
+            self._offsets.append(base + len(terms))
+        with open(self._path(self.FWD_TERMS, tmp=self._replace), "ab") as f:
+            f.write(np.asarray(terms, dtype=np.uint32).tobytes())
+        with open(self._path(self.FWD_TFS, tmp=self._replace), "ab") as f:
+            f.write(np.asarray(tfs, dtype=np.uint16).tobytes())
+
+    def save(self, labels: np.ndarray, postings: bool = True) -> None:
+        """
+        Persist the forward index and, optionally, rebuild the postings.
+
+        Args:
+            labels (np.ndarray): Label table of the index (-1 = deleted), `len(self)` entries.
+            postings (bool): Rebuild the inverted index read by searchers.
+        """
+        if self._replace:
+            for name in (self.FWD_TERMS, self.FWD_TFS):
+                os.replace(self._path(name, tmp=True), self._path(name))
+            self._replace = False
+        tmp = self._path(self.VOCAB_FILE, tmp=True)
+        tmp.write_text(json.dumps(self.vocab, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self._path(self.VOCAB_FILE))
+        self._save_npy(self.FWD_OFFSETS, np.asarray(self._offsets, dtype=np.int64))
+        if postings:
+            self._build_postings(np.asarray(labels))
+
+    def _build_postings(self, labels: np.ndarray) -> None:
+        """
+        Rebuild the term → (label, impact) postings of the live labels from the forward index.
+
+        Args:
+            labels (np.ndarray): Label table of the index (-1 = deleted).
+        """
+        n, end = len(self), self._offsets[-1]
+        terms = np.fromfile(self._path(self.FWD_TERMS), dtype=np.uint32, count=end).astype(np.int64)
+        tfs = np.fromfile(self._path(self.FWD_TFS), dtype=np.uint16, count=end).astype(np.float32)
+        docs = np.repeat(np.arange(n, dtype=np.int64), np.diff(np.asarray(self._offsets, dtype=np.int64)))
+        live = labels[:n] >= 0
+        keep = live[docs]
+        terms, tfs, docs = terms[keep], tfs[keep], docs[keep]
+
+        n_live = int(np.count_nonzero(live))
+        df = np.bincount(terms, minlength=len(self.vocab))
+        dl = np.bincount(docs, weights=tfs, minlength=n)
+        avgdl = max(float(dl.sum()) / max(n_live, 1), 1e-9)
+        idf = np.log1p((n_live - df + 0.5) / (df + 0.5))
+        weights = idf[terms] * tfs * (BM25_K1 + 1) / (tfs + BM25_K1 * (1 - BM25_B + BM25_B * dl[docs] / avgdl))
+
+        order = np.argsort(terms, kind="stable")
+        offsets = np.zeros(len(df) + 1, dtype=np.int64)
+        np.cumsum(df, out=offsets[1:])
+        self._save_npy(self.POST_LABELS, docs[order].astype(np.int32))
+        self._save_npy(self.POST_WEIGHTS, weights[order].astype(np.float32))
+        self._save_npy(self.POST_OFFSETS, offsets)
+
+    # --- reader -------------------------------------------------------------------------
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        """
+        True if postings have been built in `directory`.
+        """
+        return (Path(directory) / cls.POST_OFFSETS).exists()
+
+    @classmethod
+    def reader(cls, directory: Path) -> "Bm25Index":
+        """
+        Open the vocabulary and memory-map the postings for searching.
+
+        Args:
+            directory (Path): Directory of the index.
+
+        Returns:
+            Bm25Index: Index supporting `search()`.
+
+        Raises:
+            FileNotFoundError: If no postings have been built yet.
+        """
+        idx = cls(directory)
+        idx.vocab = json.loads(idx._path(cls.VOCAB_FILE).read_text(encoding="utf-8"))
+        idx._post_offsets = np.load(idx._path(cls.POST_OFFSETS), mmap_mode="r")
+        idx._post_labels = np.load(idx._path(cls.POST_LABELS), mmap_mode="r")
+        idx._post_weights = np.load(idx._path(cls.POST_WEIGHTS), mmap_mode="r")
+        return idx
+
+    def search(self, query: str, k: int, live: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the `k` labels with the highest BM25 score for `query`.
+
+        Args:
+            query (str): Natural-language query.
+            k (int): Number of results.
+            live (Optional[np.ndarray]): Boolean mask of searchable labels.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Labels and BM25 scores, best first
+            (fewer than `k` if fewer labels contain a query term).
+        """
+        n_terms = len(self._post_offsets) - 1
+        ids = {self.vocab.get(t) for t in tokenize(query)} - {None}
+        ranges = [(int(self._post_offsets[t]), int(self._post_offsets[t + 1])) for t in ids if t < n_terms]
+        ranges = [(a, b) for a, b in ranges if b > a]
+        if not ranges or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        labels = np.concatenate([self._post_labels[a:b] for a, b in ranges])
+        weights = np.concatenate([self._post_weights[a:b] for a, b in ranges])
+        scores = np.bincount(labels, weights=weights)
+        if live is not None:
+            scores[~live[:len(scores)]] = 0.0
+        hits = np.flatnonzero(scores > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return hits.astype(np.int64), scores[hits].astype(np.float32)
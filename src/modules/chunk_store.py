@@ -0,0 +1,158 @@
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class ChunkStore:
+    """
+    ChunkStore — Compact side store of chunk texts and metadata, addressed by HNSW label.
+
+    With `indexing.vector_store: hnsw` the vectors live only in the corpus'
+    HNSW index; this store keeps what a search result needs besides the
+    vector. Records are appended in label order, so label `i` is the byte
+    range `offsets[i]:offsets[i + 1]` of the data file:
+
+        <index_dir>/chunks.bin          concatenated UTF-8 JSON records
+        <index_dir>/chunk_offsets.npy   int64 offsets, len(labels) + 1 entries
+
+    Hydrating `k` search hits is `k` slices of a memory-mapped file; no
+    collection lookup, no JSON file of the whole corpus.
+
+    Writers (the Indexer) append to the data file and persist the offsets
+    on `save()`; bytes past the last saved offset (a crash between the two)
+    are truncated on the next `load()`. `reset()` writes a fresh data file
+    next to the old one and swaps it in atomically on `save()`, so readers
+    that still map the previous generation never see it change. Records of
+    deleted labels stay in the file until the index is rebuilt.
+    """
+
+    DATA_FILE = "chunks.bin"
+    OFFSETS_FILE = "chunk_offsets.npy"
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Args:
+            directory (Path): Directory of the store (the corpus' index directory).
+        """
+        self.dir = Path(directory)
+        self.data_path = self.dir / self.DATA_FILE
+        self.offsets_path = self.dir / self.OFFSETS_FILE
+        self._tmp_data = self.data_path.with_name(self.DATA_FILE + ".tmp")
+        self._offsets: List[int] = [0]
+        self._replace = False
+        self._mm: Optional[mmap.mmap] = None
+        self._read_offsets: Optional[np.ndarray] = None
+
+    # --- writer -------------------------------------------------------------------------
+
+    def load(self) -> "ChunkStore":
+        """
+        Open the store for appending, repairing a torn last write.
+
+        Returns:
+            ChunkStore: self.
+        """
+        if self.offsets_path.exists() and self.data_path.exists():
+            self._offsets = np.load(self.offsets_path).astype(np.int64).tolist()
+            if self.data_path.stat().st_size > self._offsets[-1]:
+                os.truncate(self.data_path, self._offsets[-1])
+        else:
+            self.reset()
+        return self
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def reset(self) -> None:
+        """
+        Start an empty generation of the store (made visible by `save()`).
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        open(self._tmp_data, "wb").close()
+        self._offsets = [0]
+        self._replace = True
+
+    def append(self, records: Sequence[Dict]) -> None:
+        """
+        Append records; the `i`-th one gets label `len(self) + i`.
+
+        Args:
+            records (Sequence[Dict]): `{"text": str, "metadata": dict}` per chunk.
+        """
+        if not records:
+            return
+        path = self._tmp_data if self._replace else self.data_path
+        with open(path, "ab") as f:
+            pos = self._offsets[-1]
+            for rec in records:
+                raw = json.dumps(rec, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                f.write(raw)
+                pos += len(raw)
+                self._offsets.append(pos)
+
+    def save(self) -> None:
+        """
+        Persist the data file and then the offsets (which make the new records visible).
+        """
+        if self._replace:
+            os.replace(self._tmp_data, self.data_path)
+            self._replace = False
+        tmp = self.offsets_path.with_name(self.OFFSETS_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(self._offsets, dtype=np.int64))
+        os.replace(tmp, self.offsets_path)
+
+    # --- reader -------------------------------------------------------------------------
+
+    @classmethod
+    def reader(cls, directory: Path) -> "ChunkStore":
+        """
+        Open a read-only, memory-mapped view of the store's current generation.
+
+        Args:
+            directory (Path): Directory of the store.
+
+        Returns:
+            ChunkStore: Store supporting `get()`.
+
+        Raises:
+            FileNotFoundError: If the store has not been written yet.
+        """
+        store = cls(directory)
+        store._read_offsets = np.load(store.offsets_path, mmap_mode="r")
+        if store._read_offsets[-1] > 0:
+            with open(store.data_path, "rb") as f:
+                store._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return store
+
+    @property
+    def count(self) -> int:
+        """
+        Number of records visible to this reader.
+        """
+        return len(self._read_offsets) - 1 if self._read_offsets is not None else len(self)
+
+    def get(self, labels: Sequence[int]) -> List[Optional[Dict]]:
+        """
+        Read the records of `labels`.
+
+        Args:
+            labels (Sequence[int]): HNSW labels.
+
+        Returns:
+            List[Optional[Dict]]: Records aligned with `labels` (None for unknown labels).
+        """
+        out: List[Optional[Dict]] = []
+        offsets, n = self._read_offsets, self.count
+        for label in labels:
+            label = int(label)
+            if self._mm is None or not 0 <= label < n:
+                out.append(None)
+                continue
+            start, end = int(offsets[label]), int(offsets[label + 1])
+            out.append(json.loads(self._mm[start:end]))
+        return out
@@ -0,0 +1,187 @@
+import os
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from src.modules.embedding_cache import EmbeddingCache
+
+
+class Embedder:
+    """
+    Embedder — Batched, optionally multi-process text embedding for indexing.
+
+    Encoding chunks one at a time throws away SentenceTransformer's internal
+    batching. This class encodes whole lists of texts in batches of
+    `batch_size` and returns L2-normalized float32 vectors ready for cosine
+    search. For large corpora it can spread the work over a pool of CPU
+    worker processes (`start_multi_process_pool`), which pays a one-off
+    startup cost and is therefore only used above `multi_process_min` texts.
+
+    When an `EmbeddingCache` is attached, texts whose (model, content) hash
+    was embedded before are served from the cache and only new texts reach
+    the model.
+
+    Every call logs its throughput in chunks/sec.
+
+    Typical usage:
+        ```python
+        embedder = Embedder(model, batch_size=64, multi_process=True, logger=logger)
+        vectors = embedder.encode([c["text"] for c in chunks])   # (n, dim) float32
+        ```
+    """
+
+    def __init__(
+        self,
+        model: SentenceTransformer,
+        batch_size: int = 64,
+        multi_process: bool = False,
+        num_workers: int = 0,
+        multi_process_min: int = 2000,
+        cache: Optional[EmbeddingCache] = None,
+        logger=None,
+    ) -> None:
+        """
+        Initialize the embedder.
+
+        Args:
+            model (SentenceTransformer): Loaded embedding model (e.g. from the ModelRegistry).
+            batch_size (int): Number of texts encoded per forward pass.
+            multi_process (bool): Enable the multi-process CPU pool for large inputs.
+            num_workers (int): Pool size; 0 means one worker per CPU core.
+            multi_process_min (int): Minimum number of texts before the pool is used.
+            cache (Optional[EmbeddingCache]): Persistent content-hash cache of vectors.
+            logger (Optional[Logger]): Optional logger for throughput messages.
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.multi_process = multi_process
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.multi_process_min = multi_process_min
+        self.cache = cache
+        self.logger = logger
+
+    @classmethod
+    def from_config(cls, model: SentenceTransformer, config: dict, logger=None) -> "Embedder":
+        """
+        Build an Embedder from the `indexing` section of the pipeline config.
+
+        Args:
+            model (SentenceTransformer): Loaded embedding model.
+            config (dict): Pipeline configuration. Optional keys:
+                - indexing.batch_size (default: 64)
+                - indexing.multi_process (default: False)
+                - indexing.num_workers (default: 0 = all cores)
+                - indexing.multi_process_min_chunks (default: 2000)
+                - indexing.embedding_cache (default: True)
+                - indexing.embedding_cache_mb (default: 2048)
+                - paths.embedding_cache (default: storage/cache/embeddings)
+            logger (Optional[Logger]): Optional logger.
+
+        Returns:
+            Embedder: Configured embedder.
+        """
+        cfg = config.get("indexing", {})
+        cache = None
+        if cfg.get("embedding_cache", True):
+            cache = EmbeddingCache(
+                Path(config["paths"].get("embedding_cache", "storage/cache/embeddings")),
+                config["models"]["embedding_model"],
+                size_limit=int(cfg.get("embedding_cache_mb", 2048)) * 1024 * 1024,
+                logger=logger,
+            )
+        return cls(
+            model,
+            batch_size=int(cfg.get("batch_size", 64)),
+            multi_process=bool(cfg.get("multi_process", False)),
+            num_workers=int(cfg.get("num_workers", 0)),
+            multi_process_min=int(cfg.get("multi_process_min_chunks", 2000)),
+            cache=cache,
+            logger=logger,
+        )
+
+    @property
+    def dim(self) -> int:
+        """
+        Embedding dimension of the underlying model.
+        """
+        return self.model.get_sentence_embedding_dimension()
+
+    def _encode_multi_process(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts with a temporary pool of CPU worker processes.
+
+        Args:
+            texts (List[str]): Texts to encode.
+
+        Returns:
+            np.ndarray: Raw (not yet normalized) embeddings.
+        """
+        pool = self.model.start_multi_process_pool(target_devices=["cpu"] * self.num_workers)
+        try:
+            return self.model.encode_multi_process(texts, pool, batch_size=self.batch_size)
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        """
+        Run the model over `texts`, in-process or through the worker pool.
+
+        Args:
+            texts (List[str]): Texts to encode.
+
+        Returns:
+            np.ndarray: L2-normalized float32 embeddings.
+        """
+        if self.multi_process and self.num_workers > 1 and len(texts) >= self.multi_process_min:
+            emb = self._encode_multi_process(texts).astype(np.float32)
+            emb /= np.linalg.norm(emb, axis=1, keepdims=True) + 1e-12
+            return emb
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ).astype(np.float32)
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts into L2-normalized float32 vectors.
+
+        Args:
+            texts (List[str]): Texts to encode.
+
+        Returns:
+            np.ndarray: Array of shape `(len(texts), dim)`, dtype float32.
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        start = time.perf_counter()
+        if self.cache is None:
+            emb = self._encode_uncached(texts)
+            hits = 0
+        else:
+            keys = [self.cache.key(t) for t in texts]
+            cached = self.cache.get_many(keys)
+            hits = len(cached)
+            miss = [i for i in range(len(texts)) if i not in cached]
+            emb = np.empty((len(texts), self.dim), dtype=np.float32)
+            for i, vec in cached.items():
+                emb[i] = vec
+            if miss:
+                fresh = self._encode_uncached([texts[i] for i in miss])
+                emb[miss] = fresh
+                self.cache.set_many([keys[i] for i in miss], fresh)
+        elapsed = time.perf_counter() - start
+
+        if self.logger:
+            self.logger.info(
+                f"Embedded {len(texts)} chunks in {elapsed:.2f}s "
+                f"({len(texts) / max(elapsed, 1e-9):.1f} chunks/sec, batch_size={self.batch_size}, "
+                f"cache hits={hits}/{len(texts)})"
+            )
+        return emb
@@ -0,0 +1,92 @@
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from diskcache import Cache
+
+
+class EmbeddingCache:
+    """
+    EmbeddingCache — Persistent, size-bounded store of chunk embeddings keyed by content.
+
+    Keys are `sha256(model_name + normalized text)`, so:
+      - re-indexing a user whose chunks did not change embeds nothing;
+      - identical boilerplate (e.g. a course syllabus uploaded by many
+        students) is embedded once for all tenants;
+      - switching the embedding model never returns stale vectors.
+
+    Vectors are stored as raw float32 bytes in a `diskcache.Cache` (SQLite +
+    files), which is safe to share between processes and evicts least
+    recently used entries once `size_limit` bytes are exceeded.
+    """
+
+    def __init__(self, directory: Path, model_name: str, size_limit: int, logger=None) -> None:
+        """
+        Open (or create) the cache directory.
+
+        Args:
+            directory (Path): Directory of the on-disk cache.
+            model_name (str): Embedding model name, part of every key.
+            size_limit (int): Maximum cache size in bytes before LRU eviction.
+            logger (Optional[Logger]): Optional logger.
+        """
+        self.model_name = model_name
+        self.logger = logger
+        self.cache = Cache(str(directory), size_limit=size_limit, eviction_policy="least-recently-used")
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """
+        Collapse whitespace so that trivially different copies share a key.
+        """
+        return re.sub(r"\s+", " ", text).strip()
+
+    def key(self, text: str) -> str:
+        """
+        Compute the cache key of a chunk text.
+
+        Args:
+            text (str): Chunk text.
+
+        Returns:
+            str: Hex digest identifying (model, normalized text).
+        """
+        payload = f"{self.model_name}\x00{self._normalize(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[int, np.ndarray]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys (List[str]): Keys computed with `key()`.
+
+        Returns:
+            Dict[int, np.ndarray]: Mapping position in `keys` → cached float32 vector, hits only.
+        """
+        hits = {}
+        for i, k in enumerate(keys):
+            raw = self.cache.get(k)
+            if raw is not None:
+                hits[i] = np.frombuffer(raw, dtype=np.float32)
+        return hits
+
+    def set_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        """
+        Store vectors for the given keys in a single transaction.
+
+        Args:
+            keys (List[str]): Keys computed with `key()`.
+            vectors (np.ndarray): Array of shape `(len(keys), dim)`.
+        """
+        with self.cache.transact():
+            for k, vec in zip(keys, vectors):
+                self.cache.set(k, np.asarray(vec, dtype=np.float32).tobytes())
+
+    def close(self) -> None:
+        """
+        Close the underlying SQLite connection.
+        """
+        self.cache.close()
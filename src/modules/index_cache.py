@@ -0,0 +1,332 @@
+from collections import OrderedDict
+from pathlib import Path
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import hnswlib
+import numpy as np
+
+from src.modules.bm25_index import Bm25Index
+from src.modules.chunk_store import ChunkStore
+from src.modules.metadata_index import MetadataIndex
+from src.modules.vector_store import VectorStore
+
+# Attempts (and pause between them, in seconds) at loading a consistent
+# generation of an index that the Indexer is saving at the same time.
+LOAD_ATTEMPTS = 10
+LOAD_RETRY_S = 0.1
+
+
+class CachedIndex:
+    """
+    An HNSW index (or the vectors replacing it) kept in memory together with
+    its label table, chunk store, BM25 postings, metadata index and the
+    on-disk version it was loaded from.
+    """
+
+    def __init__(self, index: Optional[hnswlib.Index], labels: Optional[np.ndarray],
+                 version: Tuple[int, int, int], nbytes: int,
+                 store: Optional[ChunkStore] = None,
+                 vectors: Optional[VectorStore] = None,
+                 bm25: Optional[Bm25Index] = None,
+                 meta: Optional[MetadataIndex] = None,
+                 rows: Optional[VectorStore] = None) -> None:
+        """
+        Args:
+            index (Optional[hnswlib.Index]): The loaded index (None when `vectors` serve the queries).
+            labels (Optional[np.ndarray]): Memory-mapped int64 array mapping HNSW label → chunk id
+                (-1 marks deleted labels).
+            version (Tuple[int, int, int]): `(inode, mtime_ns, size)` of the index file at load time.
+            nbytes (int): Estimated resident size of the index in bytes.
+            store (Optional[ChunkStore]): Memory-mapped texts and metadata of the
+                index' labels (`indexing.vector_store: hnsw`).
+            vectors (Optional[VectorStore]): Memory-mapped float32 or quantized vectors
+                searched instead of the HNSW index.
+            bm25 (Optional[Bm25Index]): Memory-mapped BM25 postings of the index' labels.
+            meta (Optional[MetadataIndex]): Posting lists of the labels' file names,
+                pages and block types, for filtered searches.
+            rows (Optional[VectorStore]): Memory-mapped float32 vectors, searched exactly
+                over the labels of selective filters (`vectors` itself on the flat paths).
+        """
+        self.index = index
+        self.labels = labels
+        self.store = store
+        self.vectors = vectors
+        self.bm25 = bm25
+        self.meta = meta
+        self.rows = rows if rows is not None else vectors
+        # Search path answering queries on this entry: "hnsw", "exact" or "quantized".
+        if vectors is None:
+            self.mode = "hnsw"
+        else:
+            self.mode = "quantized" if vectors.codes is not None else "exact"
+        self.version = version
+        self.nbytes = nbytes
+        self.live_count = int(np.count_nonzero(labels >= 0)) if labels is not None else index.get_current_count()
+
+
+class IndexCache:
+    """
+    IndexCache — In-process LRU cache of per-tenant HNSW indexes under a byte budget.
+
+    `Searcher` instances are short-lived (one per request), but loading an
+    HNSW index from disk costs far more than querying it. The cache keeps hot
+    indexes resident and loads cold ones lazily:
+
+      - Entries are keyed by the index file path, so each user/RAG has its own slot.
+      - The total resident size is bounded by `max_bytes`; least recently used
+        indexes are evicted first. An index larger than the budget is still
+        served, it simply becomes the only resident entry.
+      - Every lookup compares the file's `(inode, mtime_ns, size)` with the
+        cached version. The Indexer replaces index files atomically, so a new
+        index version is picked up on the next query without explicit
+        invalidation.
+      - The Indexer replaces the side files (BM25 and metadata postings,
+        label table) before the index file, so a load racing a save could
+        pair files of two generations. A load is only kept if the index and
+        label files did not change while it ran, the index has no label
+        beyond the label table and no side file is newer than the label
+        table; otherwise it is retried (see `LOAD_ATTEMPTS`).
+
+    Loads of different keys proceed in parallel; concurrent loads of the same
+    key are collapsed into one.
+    """
+
+    def __init__(self, max_bytes: int, logger=None) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): Memory budget for all resident indexes, in bytes.
+            logger (Optional[Logger]): Optional logger for load/eviction messages.
+        """
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._entries: "OrderedDict[str, CachedIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.total_bytes = 0
+
+    @staticmethod
+    def _file_version(path: Path) -> Tuple[int, int, int]:
+        """
+        Return the version signature of an index file.
+
+        Args:
+            path (Path): Index file path.
+
+        Returns:
+            Tuple[int, int, int]: `(inode, mtime_ns, size)`.
+        """
+        st = os.stat(path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        """
+        Return the lock serializing loads of one key.
+        """
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _lookup(self, key: str, version: Tuple[int, int, int]) -> Optional[CachedIndex]:
+        """
+        Return the cached entry for `key` if it matches `version`, marking it as recently used.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                return entry
+        return None
+
+    def get(self, path: Path, dim: int, labels_path: Optional[Path] = None,
+            space: str = "cosine", store_dir: Optional[Path] = None,
+            quantization: str = "none", exact_max: int = 0,
+            bm25_dir: Optional[Path] = None, meta_dir: Optional[Path] = None,
+            ef: Optional[int] = None, quantized_max: int = 0) -> CachedIndex:
+        """
+        Return the HNSW index stored at `path`, loading it if absent or stale.
+
+        Args:
+            path (Path): Index file written by the Indexer.
+            dim (int): Embedding dimension.
+            labels_path (Optional[Path]): `.npy` label table written next to the index.
+                It is memory-mapped once per index version.
+            space (str): hnswlib distance space (default: "cosine").
+            store_dir (Optional[Path]): Directory of the `ChunkStore` written with the
+                index. It is memory-mapped once per index version and, like the
+                label table, not counted against the budget (page cache).
+            quantization (str): With "float16"/"int8", serve the index from the
+                quantized `VectorStore` in `path`'s directory instead of loading
+                the HNSW index (falls back to HNSW until the vectors cover every
+                label, and above `quantized_max` labels). The code file size is counted against the budget.
+            exact_max (int): Serve indexes of at most this many labels by exact
+                search over the memory-mapped float32 vectors (takes precedence
+                over `quantization`; 0 disables). Small HNSW indexes are then
+                never loaded.
+            bm25_dir (Optional[Path]): Directory of the `Bm25Index` built with the index;
+                its postings are memory-mapped once per index version (None
+                until the first postings are built).
+            meta_dir (Optional[Path]): Directory of the `MetadataIndex` built with the
+                index, loaded once per index version. The float32 vectors are then
+                also memory-mapped on the HNSW path, for exact filtered searches.
+            ef (Optional[int]): HNSW search breadth, set once when the index is loaded:
+                the index is shared by concurrent queries, which must not change it
+                (hnswlib searches with `max(ef, k)`).
+            quantized_max (int): Serve indexes from the quantized codes only up to
+                this many labels (0: no limit). A code scan is linear in the corpus
+                size, so larger indexes load the HNSW index instead.
+
+        Returns:
+            CachedIndex: The resident index, its label table and chunk store.
+
+        Raises:
+            FileNotFoundError: If the index or label file does not exist.
+            RuntimeError: If no consistent generation could be loaded while
+                the index is being saved and no earlier one is cached.
+        """
+        key = str(Path(path).resolve())
+        version = self._file_version(path)
+        entry = self._lookup(key, version)
+        if entry is not None:
+            return entry
+
+        with self._key_lock(key):
+            for _ in range(LOAD_ATTEMPTS):
+                version = self._file_version(path)
+                entry = self._lookup(key, version)
+                if entry is not None:
+                    return entry
+                labels_version = self._file_version(labels_path) if labels_path is not None else None
+                entry = self._load(path, version, dim, labels_path, space, store_dir, quantization,
+                                   exact_max, bm25_dir, meta_dir, ef, quantized_max)
+                if self._consistent(entry, path, labels_path, labels_version, bm25_dir, meta_dir):
+                    break
+                if self.logger:
+                    self.logger.info(f"IndexCache: {path} changed while loading; retrying")
+                time.sleep(LOAD_RETRY_S)
+            else:
+                with self._lock:
+                    stale = self._entries.get(key)
+                if stale is not None:
+                    # Still being rewritten: keep serving the last consistent generation.
+                    return stale
+                raise RuntimeError(f"Index {path} kept changing while loading; retry later")
+
+            with self._lock:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self.total_bytes -= old.nbytes
+                self._entries[key] = entry
+                self.total_bytes += entry.nbytes
+                self._evict_locked(keep=key)
+
+        if self.logger:
+            self.logger.info(
+                f"IndexCache loaded {path} as {entry.mode} ({entry.nbytes / 1e6:.1f} MB, "
+                f"resident {self.total_bytes / 1e6:.1f}/{self.max_bytes / 1e6:.1f} MB)"
+            )
+        return entry
+
+    def _load(self, path: Path, version: Tuple[int, int, int], dim: int, labels_path: Optional[Path],
+              space: str, store_dir: Optional[Path], quantization: str, exact_max: int,
+              bm25_dir: Optional[Path], meta_dir: Optional[Path], ef: Optional[int],
+              quantized_max: int) -> CachedIndex:
+        """
+        Load one index with its side files (see `get` for the arguments).
+        """
+        labels = np.load(labels_path, mmap_mode="r") if labels_path is not None else None
+        store = ChunkStore.reader(store_dir) if store_dir is not None else None
+        bm25 = Bm25Index.reader(bm25_dir) if bm25_dir is not None and Bm25Index.exists(bm25_dir) else None
+        meta = None
+        if meta_dir is not None and labels is not None and MetadataIndex.exists(meta_dir):
+            meta = MetadataIndex.reader(meta_dir, len(labels))
+        vectors_dir = Path(path).parent
+        flat = None
+        if labels is not None:
+            if len(labels) <= exact_max and VectorStore.covers(vectors_dir, dim, len(labels)):
+                flat = "none"
+            elif (quantization != "none" and (not quantized_max or len(labels) <= quantized_max)
+                  and VectorStore.covers(vectors_dir, dim, len(labels), quantization)):
+                flat = quantization
+        if flat is not None:
+            vectors = VectorStore.reader(vectors_dir, dim, len(labels), flat)
+            return CachedIndex(None, labels, version, vectors.nbytes, store, vectors, bm25, meta)
+        index = hnswlib.Index(space=space, dim=dim)
+        index.load_index(str(path))
+        if ef is not None:
+            index.set_ef(ef)
+        rows = None
+        if meta is not None and VectorStore.covers(vectors_dir, dim, len(labels)):
+            rows = VectorStore.reader(vectors_dir, dim, len(labels))
+        return CachedIndex(index, labels, version, version[2], store, bm25=bm25, meta=meta, rows=rows)
+
+    def _consistent(self, entry: CachedIndex, path: Path, labels_path: Optional[Path],
+                    labels_version: Optional[Tuple[int, int, int]],
+                    bm25_dir: Optional[Path], meta_dir: Optional[Path]) -> bool:
+        """
+        Return True if every file of `entry` belongs to the same saved generation.
+
+        Args:
+            entry (CachedIndex): Entry just loaded.
+            path (Path): Index file.
+            labels_path (Optional[Path]): Label table file.
+            labels_version (Optional[Tuple[int, int, int]]): Label table version before the load.
+            bm25_dir (Optional[Path]): Directory of the BM25 postings.
+            meta_dir (Optional[Path]): Directory of the metadata postings.
+
+        Returns:
+            bool: False if a save ran during the load or is in progress.
+        """
+        if self._file_version(path) != entry.version:
+            return False
+        if labels_path is None:
+            return True
+        if self._file_version(labels_path) != labels_version:
+            return False
+        if entry.index is not None and entry.index.get_current_count() > len(entry.labels):
+            return False
+        side_files = []
+        if entry.bm25 is not None:
+            side_files.append(Path(bm25_dir) / Bm25Index.POST_LABELS)
+        if entry.meta is not None:
+            side_files.append(Path(meta_dir) / MetadataIndex.POSTINGS_FILE)
+        # Side files are replaced before the label table: a newer one belongs to a save in progress.
+        return all(os.stat(f).st_mtime_ns <= labels_version[1] for f in side_files)
+
+    def _evict_locked(self, keep: str) -> None:
+        """
+        Evict least recently used entries until the budget is met. Caller holds `self._lock`.
+
+        Args:
+            keep (str): Key that must not be evicted (the entry just loaded).
+        """
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            del self._entries[key]
+            self._key_locks.pop(key, None)
+            self.total_bytes -= entry.nbytes
+            if self.logger:
+                self.logger.info(f"IndexCache evicted {key} ({entry.nbytes / 1e6:.1f} MB)")
+
+    def invalidate(self, path: Path) -> None:
+        """
+        Drop the cached index for `path`, if any.
+
+        Args:
+            path (Path): Index file path used as cache key.
+        """
+        key = str(Path(path).resolve())
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            self._key_locks.pop(key, None)
+            if entry is not None:
+                self.total_bytes -= entry.nbytes
@@ -0,0 +1,74 @@
+import uuid
+from queue import Empty
+from typing import Any, List
+
+
+class LayoutClient:
+    """
+    LayoutClient — Picklable handle used by page workers to call the layout model server.
+
+    Responses are routed straight to their requester instead of going through
+    one shared response queue that every worker drains and re-fills. The
+    LayoutService pre-allocates a fixed set of reply queues ("slots") and a
+    queue of free slot numbers:
+
+      1. The caller leases a free slot (blocking if all are in use, which
+         doubles as backpressure on the model server).
+      2. It sends `(job_id, payload, slot)` on the request queue.
+      3. The server puts `(job_id, results)` on `reply_qs[slot]`, so only
+         this caller ever reads it.
+      4. The slot is returned to the free list.
+
+    A reply that arrives after its caller timed out is discarded by the next
+    lessee of the slot (its `job_id` does not match), never re-queued.
+
+    The object holds only Manager queue proxies, so it can be passed to
+    spawned processes and thread pools.
+    """
+
+    def __init__(self, req_q, reply_qs: List[Any], free_slots) -> None:
+        """
+        Args:
+            req_q: Request queue of the model server.
+            reply_qs (List[Any]): Per-slot reply queues.
+            free_slots: Queue holding the indices of unleased reply slots.
+        """
+        self.req_q = req_q
+        self.reply_qs = reply_qs
+        self.free_slots = free_slots
+
+    def predict(self, payload: Any, timeout: float = 30.0) -> Any:
+        """
+        Send one page to the model server and wait for its own result.
+
+        Args:
+            payload (Any): Page payload understood by `model_server`.
+            timeout (float): Seconds to wait for a free slot and for the reply.
+
+        Returns:
+            Any: The server's layout results for this page.
+
+        Raises:
+            TimeoutError: If no slot frees up or the server does not answer in time.
+            RuntimeError: If inference failed on this page.
+        """
+        try:
+            slot = self.free_slots.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError("No free layout reply slot (model server saturated)")
+        try:
+            job_id = str(uuid.uuid4())
+            self.req_q.put((job_id, payload, slot))
+            reply_q = self.reply_qs[slot]
+            while True:
+                try:
+                    jid, results = reply_q.get(timeout=timeout)
+                except Empty:
+                    raise TimeoutError(f"Layout model server did not answer job {job_id} within {timeout}s")
+                if jid == job_id:
+                    if isinstance(results, Exception):
+                        raise results
+                    return results
+                # Late reply for a previous lessee of this slot: drop it.
+        finally:
+            self.free_slots.put(slot)
@@ -1,10 +1,22 @@
 
 from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import os
+import queue
+import statistics
+import threading
 import fitz
+from loguru import logger
 from docx import Document as DocxDocument
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from src.core.utils import FileManager
+from src.core.ids import file_sha256
+from src.core.progress import JobProgress
+from src.modules.layout_client import LayoutClient
+from src.modules.ocr_engine import ocr_version
+from src.modules.page_cache import PageCache
+from src.modules.page_buffer import PageBuffer
 from src.modules.page_job import page_job
 
 
@@ -18,19 +30,17 @@ class LayoutExtractor:
     """
 
     def __init__(self, file_manager: FileManager, config_path: Path, 
-                 server_req_q=None,
-                    server_resp_q=None,
- 
-                     ocr_lang="eng")-> None:
+                 layout_client: Optional[LayoutClient] = None,
+                 ocr_lang="eng", progress: Optional[JobProgress] = None)-> None:
         """
-        Initialize the LayoutExtractor with configuration and optional OCR queues.
+        Initialize the LayoutExtractor with configuration and an optional layout server client.
 
         Args:
             file_manager (FileManager): Utility for reading configuration files and managing storage.
             config_path (Path): Path to the YAML configuration file for layout settings.
-            server_req_q (Optional[Any]): Multiprocessing queue to send page data to the model server.
-            server_resp_q (Optional[Any]): Multiprocessing queue to receive OCR/layout results.
+            layout_client (Optional[LayoutClient]): Handle to the shared layout model server.
             ocr_lang (str): OCR language code (default: "eng").
+            progress (Optional[JobProgress]): Receives page counts and render/layout/OCR timings.
         """
         self.files = file_manager
         cfg = self.files.load_config(config_path)
@@ -38,18 +48,286 @@ class LayoutExtractor:
 
         self.dpi = layout_cfg.get("pdf_dpi", 150)
         self.score_thresh = layout_cfg.get("score_thresh", 0.5)
-        self.server_req_q = server_req_q
-  
-        self.server_resp_q = server_resp_q
+        self.layout_client = layout_client
         self.ocr_lang = ocr_lang
+        self.progress = progress or JobProgress()
+        self.page_workers = int(layout_cfg.get("page_workers", 0)) or os.cpu_count() or 1
+        self.max_pages_in_flight = int(layout_cfg.get("max_pages_in_flight", 0)) or 2 * self.page_workers
+        if self.page_workers > 1:
+            # Tesseract's own OpenMP threads would oversubscribe the cores
+            # once several pages are OCRed in parallel.
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        self.ocr_backend = layout_cfg.get("ocr_backend", "auto")
+        self.native_text = bool(layout_cfg.get("native_text", True))
+        self.native_min_chars = int(layout_cfg.get("native_min_chars", 50))
+        self.page_cache = None
+        if layout_cfg.get("page_cache", True):
+            self.page_cache = PageCache(
+                Path(cfg.get("paths", {}).get("page_cache", "storage/cache/pages")),
+                lambda: self._pipeline_version(layout_cfg.get("model_path", "models/yolov8n-doclaynet.pt")),
+                size_limit=int(layout_cfg.get("page_cache_mb", 1024)) * 1024 * 1024,
+            )
+
+    def _pipeline_version(self, model_path: str) -> str:
+        """
+        Fingerprint the layout model and OCR engine whose output the page cache holds.
+
+        Called by the page cache on the first lookup of a page that needs OCR,
+        so hosts without Tesseract can still ingest DOCX/TXT files and
+        born-digital PDFs.
+
+        Args:
+            model_path (str): Path to the YOLO layout weights.
+
+        Returns:
+            str: Identifier of the weights (name and size), OCR backend/version (or
+            "no-ocr" if Tesseract is not installed) and language.
+        """
+        weights = Path(model_path)
+        size = weights.stat().st_size if weights.exists() else 0
+        try:
+            ocr = ocr_version(self.ocr_backend)
+        except Exception as e:
+            logger.warning(f"OCR engine unavailable ({e}); page cache keys use 'no-ocr'")
+            ocr = "no-ocr"
+        return f"{weights.name}:{size}|{ocr}|{self.ocr_lang}"
+
+    def _native_blocks(self, page) -> Optional[list[dict]]:
+        """
+        Build blocks straight from a page's embedded text layer, if it is usable.
+
+        Born-digital PDFs (slides, LaTeX notes, exported documents) carry the
+        exact text and its coordinates; rasterizing and OCRing them is slow
+        and less accurate. A text layer is considered usable when it holds at
+        least `native_min_chars` characters, most of them decodable (fonts
+        without a Unicode map come out as U+FFFD and need OCR).
+
+        Block types are derived from the text layer instead of YOLO:
+          - short blocks in the top/bottom 5% of the page → "page-header"/"page-footer"
+          - blocks whose font is clearly larger than the page's body text → "section-header"
+          - everything else → "text"
+        `y` is expressed in pixels at `pdf_dpi`, like OCR blocks, so header/
+        footer heuristics downstream behave the same for both paths.
+
+        Args:
+            page (fitz.Page): Page to read.
+
+        Returns:
+            Optional[List[Dict]]: Blocks of the page, or None if the page must be OCRed.
+        """
+        data = page.get_text("dict", flags=fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP)
+        raw = []
+        for block in data.get("blocks", []):
+            if block.get("type") != 0:
+                continue
+            lines, sizes = [], []
+            for line in block.get("lines", []):
+                spans = line.get("spans", [])
+                text = "".join(span.get("text", "") for span in spans).strip()
+                if text:
+                    lines.append(text)
+                    sizes.extend(span.get("size", 0.0) for span in spans if span.get("text", "").strip())
+            text = "\n".join(lines)
+            if text:
+                raw.append((text, block["bbox"], max(sizes) if sizes else 0.0))
+
+        chars = sum(len(t) for t, _, _ in raw)
+        if chars < self.native_min_chars:
+            return None
+        if sum(t.count("\ufffd") for t, _, _ in raw) > 0.1 * chars:
+            return None
+
+        body_size = statistics.median(size for _, _, size in raw)
+        height = page.rect.height or 1.0
+        scale = self.dpi / 72.0
+        blocks = []
+        for text, (x0, y0, x1, y1), size in raw:
+            if y1 <= 0.05 * height and len(text) < 100:
+                btype = "page-header"
+            elif y0 >= 0.95 * height and len(text) < 100:
+                btype = "page-footer"
+            elif size >= 1.2 * body_size and len(text) < 200:
+                btype = "section-header"
+            else:
+                btype = "text"
+            blocks.append({
+                "type": btype,
+                "text": text,
+                "page": page.number,
+                "y": float(y0 * scale)
+            })
+        return blocks
+
+    def _run_page(self, page_number: int, page: PageBuffer, cache_key: Optional[str] = None) -> list[dict]:
+        """
+        Run `page_job` on one rendered page and free its shared memory afterwards.
+
+        Args:
+            page_number (int): Page index in the document.
+            page (PageBuffer): Owning buffer with the rendered page.
+            cache_key (Optional[str]): Page cache key to store the result under.
+
+        Returns:
+            List[Dict]: Blocks extracted from the page.
+        """
+        try:
+            blocks = page_job((page_number, page, self.ocr_lang, self.layout_client, self.ocr_backend, self.progress))
+        finally:
+            page.release()
+        if cache_key is not None:
+            self.page_cache.set(cache_key, blocks)
+        self.progress.page_done()
+        return blocks
+
+    @staticmethod
+    def _page_count(path: Path) -> int:
+        """
+        Number of pages `iter_extract` reports for a document (1 for DOCX and TXT files).
+        """
+        if Path(path).suffix.lower() != ".pdf":
+            return 1
+        with fitz.open(path) as doc:
+            return doc.page_count
+
+    def _schedule_pdf(self, path: Path, executor: ThreadPoolExecutor, in_flight: threading.Semaphore) -> list:
+        """
+        Split one PDF into page tasks and queue its scanned pages on the shared pool.
+
+        Pages with a usable text layer are read immediately (see
+        `_native_blocks`), pages found in the page cache are reused as is;
+        every other page is rendered into shared memory once a slot of
+        `in_flight` is free and submitted to `executor`.
+
+        Args:
+            path (Path): Path to the PDF document.
+            executor (ThreadPoolExecutor): Page pool shared by all documents.
+            in_flight (threading.Semaphore): Bounds the number of rendered pages alive at once.
+
+        Returns:
+            List: One entry per page, in page order — a block list for native
+                  pages, a Future of a block list for OCRed pages.
+        """
+        doc = fitz.open(path)
+        pages = []
+        native_pages = cached_pages = 0
+        content_hash = None
+        try:
+            for page in doc:
+                if self.native_text:
+                    with self.progress.timed("text"):
+                        native = self._native_blocks(page)
+                    if native is not None:
+                        pages.append(native)
+                        native_pages += 1
+                        self.progress.page_done()
+                        continue
+                key = None
+                if self.page_cache is not None:
+                    content_hash = content_hash or file_sha256(Path(path))
+                    key = self.page_cache.key(content_hash, page.number, self.dpi)
+                    cached = self.page_cache.get(key)
+                    if cached is not None:
+                        pages.append(cached)
+                        cached_pages += 1
+                        self.progress.page_done()
+                        continue
+                in_flight.acquire()
+                with self.progress.timed("render"):
+                    buf = PageBuffer.from_pixmap(page.get_pixmap(dpi=self.dpi))
+                fut = executor.submit(self._run_page, page.number, buf, key)
+                fut.add_done_callback(lambda _: in_flight.release())
+                pages.append(fut)
+            logger.debug(f"{Path(path).name}: {native_pages}/{doc.page_count} pages read from the text layer, "
+                         f"{cached_pages} from the page cache, "
+                         f"{doc.page_count - native_pages - cached_pages} queued for OCR")
+        finally:
+            doc.close()
+        return pages
+
+    def iter_extract(self, paths: list[Path]) -> Iterator[Tuple[Path, list[dict]]]:
+        """
+        Extract blocks from several documents with one page-level scheduler,
+        yielding each document as soon as all of its pages are done.
+
+        Instead of one task per document (where a single 400-page PDF keeps
+        one worker busy while the others idle), every scanned PDF page of
+        every document becomes its own task on a pool of `page_workers`
+        threads. Idle workers always pick up the next queued page, whatever
+        document it belongs to, so wall-clock time follows
+        total pages / workers rather than the size of the largest file.
+        Threads are enough: the heavy lifting (YOLO in the model server,
+        Tesseract in its own subprocess) happens outside the GIL.
+
+        Pages are queued by a background thread (bounded by
+        `max_pages_in_flight` rendered pages) while finished documents are
+        reassembled in page order and yielded in the order of `paths`, so a
+        caller can chunk and index the first document while later ones are
+        still being OCRed.
+
+        Args:
+            paths (List[Path]): Documents to extract (PDF, DOCX or TXT).
+
+        Yields:
+            Tuple[Path, List[Dict]]: Each document and its blocks, sorted by
+                                     page and vertical position.
+
+        Raises:
+            ValueError: If a file type is unsupported.
+        """
+        in_flight = threading.BoundedSemaphore(self.max_pages_in_flight)
+        scheduled: queue.Queue = queue.Queue()
+
+        with ThreadPoolExecutor(max_workers=self.page_workers) as executor:
+            def schedule() -> None:
+                try:
+                    self.progress.add_pages(sum(self._page_count(path) for path in paths))
+                    for path in paths:
+                        if Path(path).suffix.lower() == ".pdf":
+                            scheduled.put(self._schedule_pdf(path, executor, in_flight))
+                        else:
+                            with self.progress.timed("text"):
+                                scheduled.put([self.extract(path)])
+                            self.progress.page_done()
+                except BaseException as e:
+                    scheduled.put(e)
+
+            scheduler = threading.Thread(target=schedule, daemon=True)
+            scheduler.start()
+            for path in paths:
+                pages = scheduled.get()
+                if isinstance(pages, BaseException):
+                    raise pages
+                blocks = [blk for p in pages for blk in (p.result() if isinstance(p, Future) else p)]
+                yield path, sorted(blocks, key=lambda b: (b["page"], b["y"]))
+            scheduler.join()
+
+    def extract_many(self, paths: list[Path]) -> list[list[dict]]:
+        """
+        Extract blocks from several documents with one page-level scheduler (see `iter_extract`).
+
+        Args:
+            paths (List[Path]): Documents to extract (PDF, DOCX or TXT).
+
+        Returns:
+            List[List[Dict]]: Blocks of each document, aligned with `paths`,
+                              sorted by page and vertical position.
+
+        Raises:
+            ValueError: If a file type is unsupported.
+        """
+        return [blocks for _, blocks in self.iter_extract(paths)]
 
     def _extract_pdf(self, path: Path) -> list[dict]:
         """
         Extract structured layout blocks from a PDF file using OCR and layout analysis.
 
         This method:
-            - Converts each PDF page into a high-resolution image.
-            - Sends the page image to a model server for OCR/layout detection.
+            - Reads pages with a usable embedded text layer directly (see
+              `_native_blocks`) when `layout.native_text` is enabled.
+            - Converts every other (scanned) page into a high-resolution image held in shared
+              memory (at most `max_pages_in_flight` pages at a time).
+            - Sends the page descriptor to a model server for layout detection
+              and OCRs the detected regions, `page_workers` pages in parallel.
             - Collects and sorts all detected text blocks by page and vertical position.
 
         Args:
@@ -62,26 +340,7 @@ class LayoutExtractor:
                 - "page": Page number
                 - "y": Vertical coordinate on the page
         """
-        doc = fitz.open(path)
-        print(doc)
-        tasks = []
-
-        for page in doc:
-            pix = page.get_pixmap(dpi=self.dpi)
-       
-            tasks.append((page.number, pix.tobytes("png"), self.ocr_lang, 
-                          self.server_req_q, 
-                          self.server_resp_q
-
-                          ))
-
-        page_blocks_lists = []
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            for result in executor.map(page_job, tasks):
-                page_blocks_lists.append(result)
-
-        blocks = [blk for lst in page_blocks_lists for blk in lst]
-        return sorted(blocks, key=lambda b: (b["page"], b["y"]))
+        return self.extract_many([path])[0]
 
     def _extract_docx(self, path: Path) -> list[dict]:
         """
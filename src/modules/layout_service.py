@@ -0,0 +1,265 @@
+import multiprocessing as mp
+import threading
+import time
+import uuid
+from queue import Empty
+from typing import Optional
+
+from src.modules.model_server import model_server, READY, PONG, PING
+from src.modules.layout_client import LayoutClient
+
+DEFAULT_LAYOUT_MODEL = "models/yolov8n-doclaynet.pt"
+
+
+class LayoutService:
+    """
+    LayoutService — One long-lived YOLO layout-inference server shared by all ingestion jobs.
+
+    Starting a `model_server` per ingestion reloads the YOLO weights every
+    time and, with a fixed `time.sleep`, only hopes that the model is ready.
+    This class owns a single server process (plus the Manager that hosts its
+    queues) for the lifetime of the host process:
+
+      - `start()` spawns the server and blocks on an explicit readiness
+        handshake: the server announces itself only after the weights are
+        loaded and a warmup prediction has run.
+      - `is_healthy()` checks that the process is alive and answers a ping
+        sent through the request queue.
+      - `restart_server()` replaces a dead or hung server process but keeps
+        the Manager and its queues, so clients already handed to workers
+        stay valid.
+      - `shutdown()` sends the stop sentinel, waits for the server to drain,
+        and only terminates it if it does not exit in time.
+
+    Results are routed to their requester through `reply_slots` dedicated
+    reply queues (see `LayoutClient`), so concurrent page workers never read
+    or re-queue each other's responses. All queues are Manager proxies and
+    the `LayoutClient` returned by `client()` can be handed to spawned
+    ingestion processes and pool workers.
+
+    Typical usage:
+        ```python
+        service = get_layout_service("models/yolov8n-doclaynet.pt", logger)
+        layout = LayoutExtractor(files, cfg_path, layout_client=service.client())
+        ```
+    """
+
+    def __init__(self, model_path: str = DEFAULT_LAYOUT_MODEL, logger=None,
+                 ready_timeout: float = 300.0, reply_slots: int = 32,
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0) -> None:
+        """
+        Prepare (but do not start) the service.
+
+        Args:
+            model_path (str): Path to the YOLO layout weights.
+            logger (Optional[Logger]): Optional logger.
+            ready_timeout (float): Seconds to wait for the readiness handshake.
+            reply_slots (int): Number of reply queues, i.e. maximum number of
+                pages in flight at once.
+            max_batch_size (int): Maximum number of pages per YOLO `predict` call.
+            max_wait_ms (float): Maximum time the server waits for a batch to fill.
+        """
+        self.model_path = model_path
+        self.logger = logger
+        self.ready_timeout = ready_timeout
+        self.reply_slots = reply_slots
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._ctx = mp.get_context("spawn")
+        self._lock = threading.Lock()
+        self.manager = None
+        self.process = None
+        self.req_q = None
+        self.reply_qs = None
+        self.free_slots = None
+        self.ctrl_q = None
+
+    def start(self) -> None:
+        """
+        Spawn the model server and wait until it reports ready.
+
+        Raises:
+            RuntimeError: If the server dies or is not ready within `ready_timeout`.
+        """
+        self.manager = self._ctx.Manager()
+        self.req_q = self.manager.Queue()
+        self.reply_qs = [self.manager.Queue() for _ in range(self.reply_slots)]
+        self.free_slots = self.manager.Queue()
+        for slot in range(self.reply_slots):
+            self.free_slots.put(slot)
+        self.ctrl_q = self.manager.Queue()
+        self._spawn_server()
+
+    def _spawn_server(self) -> None:
+        self.process = self._ctx.Process(
+            target=model_server,
+            args=(self.req_q, self.reply_qs, self.model_path, self.ctrl_q,
+                  self.max_batch_size, self.max_wait_ms),
+            daemon=True,
+        )
+        self.process.start()
+        self.wait_ready(self.ready_timeout)
+
+    def restart_server(self) -> None:
+        """
+        Replace a dead or unresponsive server process, keeping the Manager and its queues.
+
+        Clients handed out by `client()` hold proxies to these queues, so
+        they keep working once the new server is ready; pages that the old
+        server had taken but not answered time out in their requester.
+
+        Raises:
+            RuntimeError: If the new server dies or is not ready within `ready_timeout`.
+        """
+        with self._lock:
+            if self.process is not None and self.process.is_alive():
+                self.process.terminate()
+                self.process.join(5)
+            if self.logger:
+                exit_code = self.process.exitcode if self.process is not None else None
+                self.logger.warning(f"Restarting the layout model server (previous exit code {exit_code})")
+            self._spawn_server()
+
+    def wait_ready(self, timeout: float) -> None:
+        """
+        Block until the server sends its READY message.
+
+        Args:
+            timeout (float): Maximum number of seconds to wait.
+
+        Raises:
+            RuntimeError: If the server exits or does not become ready in time.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.process.is_alive():
+                raise RuntimeError(f"Layout model server exited during startup (exit code {self.process.exitcode})")
+            try:
+                msg, payload = self.ctrl_q.get(timeout=1.0)
+            except Empty:
+                continue
+            if msg == READY:
+                if self.logger:
+                    self.logger.info(
+                        f"Layout model server ready (pid {payload}, model {self.model_path}, "
+                        f"max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms})"
+                    )
+                return
+        raise RuntimeError(f"Layout model server not ready after {timeout:.0f}s")
+
+    def client(self) -> LayoutClient:
+        """
+        Return a picklable client for page workers.
+
+        Returns:
+            LayoutClient: Handle sending pages to this service.
+        """
+        return LayoutClient(self.req_q, self.reply_qs, self.free_slots)
+
+    def is_alive(self) -> bool:
+        """
+        Return True if the server process is running.
+        """
+        return self.process is not None and self.process.is_alive()
+
+    def is_healthy(self, timeout: float = 10.0) -> bool:
+        """
+        End-to-end health check: the process is alive and answers a ping.
+
+        The ping travels through the request queue, so a heavily loaded
+        server may need a larger `timeout`.
+
+        Args:
+            timeout (float): Seconds to wait for the PONG reply.
+
+        Returns:
+            bool: True if the server replied in time.
+        """
+        if not self.is_alive():
+            return False
+        with self._lock:
+            token = str(uuid.uuid4())
+            try:
+                self.req_q.put((PING, token))
+                deadline = time.monotonic() + timeout
+                while time.monotonic() < deadline:
+                    try:
+                        msg, payload = self.ctrl_q.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except Empty:
+                        break
+                    if msg == PONG and payload == token:
+                        return True
+            except (OSError, EOFError):
+                # The Manager hosting the queues is gone.
+                return False
+        return False
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """
+        Stop the server gracefully, terminating it only if it does not exit in time.
+
+        Args:
+            timeout (float): Seconds to wait for the server to exit after the stop sentinel.
+        """
+        if self.process is not None:
+            if self.process.is_alive():
+                try:
+                    self.req_q.put(None)
+                except Exception:
+                    pass
+                self.process.join(timeout)
+            if self.process.is_alive():
+                if self.logger:
+                    self.logger.warning("Layout model server did not stop in time; terminating")
+                self.process.terminate()
+                self.process.join()
+        if self.manager is not None:
+            self.manager.shutdown()
+        self.process = None
+        self.manager = None
+        if self.logger:
+            self.logger.info("Layout model server stopped")
+
+
+_service: Optional[LayoutService] = None
+_service_lock = threading.Lock()
+
+
+def get_layout_service(model_path: str = DEFAULT_LAYOUT_MODEL, logger=None, reply_slots: int = 32,
+                       max_batch_size: int = 8, max_wait_ms: float = 10.0) -> LayoutService:
+    """
+    Return this process's shared LayoutService, starting (or restarting) it if needed.
+
+    Args:
+        model_path (str): Path to the YOLO layout weights.
+        logger (Optional[Logger]): Optional logger.
+        reply_slots (int): Number of reply queues when the service is created.
+        max_batch_size (int): Maximum number of pages per YOLO `predict` call.
+        max_wait_ms (float): Maximum time the server waits for a batch to fill.
+
+    Returns:
+        LayoutService: A started, ready service.
+    """
+    global _service
+    with _service_lock:
+        if _service is not None and not _service.is_alive():
+            if logger:
+                logger.warning("Layout model server is down; restarting it")
+            _service.restart_server()
+        if _service is None:
+            service = LayoutService(model_path, logger, reply_slots=reply_slots,
+                                    max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+            service.start()
+            _service = service
+        return _service
+
+
+def shutdown_layout_service() -> None:
+    """
+    Stop this process's shared LayoutService, if one was started.
+    """
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.shutdown()
+            _service = None
@@ -0,0 +1,230 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class MetadataIndex:
+    """
+    MetadataIndex — Filterable chunk metadata (file name, page, block type), addressed by HNSW label.
+
+    Searchers restrict queries to a subset of labels *before* scoring, so a
+    filter never empties the top-k the way post-filtering does. Three files
+    live in the corpus' index directory:
+
+        meta_fields.json         file names and block types, by id
+        meta_rows.i32            (file id, page, type id) per label, appended
+        meta_postings.npz        per-field posting lists over live labels
+
+    The posting lists (labels grouped by file id and by type id, with their
+    offsets, and labels sorted by page next to their sorted pages) are
+    rebuilt on every `save()` — a stable sort of three int32 columns — so
+    selecting the labels of some files, block types or a page range costs
+    the size of the answer, not the size of the corpus: a page range is two
+    binary searches over the sorted pages. Combined conditions start from
+    the smallest selection and check the others on its rows.
+    """
+
+    FIELDS_FILE = "meta_fields.json"
+    ROWS_FILE = "meta_rows.i32"
+    POSTINGS_FILE = "meta_postings.npz"
+
+    def __init__(self, directory: Path) -> None:
+        """
+        Args:
+            directory (Path): Directory of the index (the corpus' index directory).
+        """
+        self.dir = Path(directory)
+        self.rows_path = self.dir / self.ROWS_FILE
+        self.filenames: List[str] = []
+        self.types: List[str] = []
+        self._file_ids: Dict[str, int] = {}
+        self._type_ids: Dict[str, int] = {}
+        self._count = 0
+        self._replace = False
+        self._rows: Optional[np.ndarray] = None
+        self._postings: Dict[str, np.ndarray] = {}
+
+    def _tmp(self, path: Path) -> Path:
+        return path.with_name(path.name + ".tmp")
+
+    def _set_fields(self, fields: Dict[str, List[str]]) -> None:
+        self.filenames, self.types = list(fields["filenames"]), list(fields["types"])
+        self._file_ids = {name: i for i, name in enumerate(self.filenames)}
+        self._type_ids = {name: i for i, name in enumerate(self.types)}
+
+    # --- writer -------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._count
+
+    def load(self, count: int) -> bool:
+        """
+        Open the index for appending after the first `count` labels.
+
+        Args:
+            count (int): Number of labels of the index.
+
+        Returns:
+            bool: False if the rows do not cover `count` labels (the index must be rebuilt).
+        """
+        fields_path = self.dir / self.FIELDS_FILE
+        if not (fields_path.exists() and self.rows_path.exists()):
+            return False
+        if self.rows_path.stat().st_size < count * 12:
+            return False
+        self._set_fields(json.loads(fields_path.read_text(encoding="utf-8")))
+        os.truncate(self.rows_path, count * 12)
+        self._count = count
+        return True
+
+    def reset(self) -> None:
+        """
+        Start an empty generation of the index (made visible by `save()`).
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        open(self._tmp(self.rows_path), "wb").close()
+        self._set_fields({"filenames": [], "types": []})
+        self._count, self._replace = 0, True
+
+    def append(self, chunks: Sequence[Dict]) -> None:
+        """
+        Add the metadata of chunks that were just given consecutive new labels.
+
+        Args:
+            chunks (Sequence[Dict]): Chunks, in label order.
+        """
+        if not chunks:
+            return
+        rows = np.empty((len(chunks), 3), dtype=np.int32)
+        for i, ch in enumerate(chunks):
+            name, btype = ch["filename"], ch.get("type", "text")
+            if name not in self._file_ids:
+                self._file_ids[name] = len(self.filenames)
+                self.filenames.append(name)
+            if btype not in self._type_ids:
+                self._type_ids[btype] = len(self.types)
+                self.types.append(btype)
+            rows[i] = (self._file_ids[name], int(ch.get("page", 0)), self._type_ids[btype])
+        with open(self._tmp(self.rows_path) if self._replace else self.rows_path, "ab") as f:
+            f.write(rows.tobytes())
+        self._count += len(chunks)
+
+    def save(self, labels: np.ndarray) -> None:
+        """
+        Persist the rows and field names, and rebuild the posting lists of the live labels.
+
+        Args:
+            labels (np.ndarray): Label table of the index (-1 = deleted), `len(self)` entries.
+        """
+        if self._replace:
+            os.replace(self._tmp(self.rows_path), self.rows_path)
+            self._replace = False
+        tmp = self._tmp(self.dir / self.FIELDS_FILE)
+        tmp.write_text(json.dumps({"filenames": self.filenames, "types": self.types}, ensure_ascii=False),
+                       encoding="utf-8")
+        os.replace(tmp, self.dir / self.FIELDS_FILE)
+
+        rows = np.fromfile(self.rows_path, dtype=np.int32, count=self._count * 3).reshape(-1, 3)
+        live = np.flatnonzero(np.asarray(labels)[:self._count] >= 0).astype(np.int32)
+        postings = {}
+        for field, col, size in (("file", 0, len(self.filenames)), ("type", 2, len(self.types))):
+            values = rows[live, col]
+            order = np.argsort(values, kind="stable")
+            offsets = np.zeros(size + 1, dtype=np.int64)
+            np.cumsum(np.bincount(values, minlength=size), out=offsets[1:])
+            postings[f"{field}_labels"] = live[order]
+            postings[f"{field}_offsets"] = offsets
+        pages = rows[live, 1]
+        order = np.argsort(pages, kind="stable")
+        postings["page_labels"] = live[order]
+        postings["page_values"] = pages[order]
+        tmp = self._tmp(self.dir / self.POSTINGS_FILE)
+        with open(tmp, "wb") as f:
+            np.savez(f, **postings)
+        os.replace(tmp, self.dir / self.POSTINGS_FILE)
+
+    # --- reader -------------------------------------------------------------------------
+
+    @classmethod
+    def exists(cls, directory: Path) -> bool:
+        """
+        True if posting lists have been built in `directory`.
+        """
+        return (Path(directory) / cls.POSTINGS_FILE).exists()
+
+    @classmethod
+    def reader(cls, directory: Path, count: int) -> "MetadataIndex":
+        """
+        Load the field names and posting lists and memory-map the rows for filtering.
+
+        Args:
+            directory (Path): Directory of the index.
+            count (int): Number of labels of the index.
+
+        Returns:
+            MetadataIndex: Index supporting `select()`.
+        """
+        idx = cls(directory)
+        idx._set_fields(json.loads((idx.dir / cls.FIELDS_FILE).read_text(encoding="utf-8")))
+        idx._count = count
+        idx._rows = (np.memmap(idx.rows_path, dtype=np.int32, mode="r", shape=(count, 3))
+                     if count else np.zeros((0, 3), dtype=np.int32))
+        with np.load(idx.dir / cls.POSTINGS_FILE) as postings:
+            idx._postings = {name: postings[name] for name in postings.files}
+        return idx
+
+    def _posting(self, field: str, ids: Sequence[int]) -> np.ndarray:
+        """
+        Return the sorted union of the posting lists of `ids` in `field`.
+        """
+        offsets, labels = self._postings[f"{field}_offsets"], self._postings[f"{field}_labels"]
+        parts = [labels[offsets[i]:offsets[i + 1]] for i in ids]
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int32)
+
+    def select(self, filenames: Optional[Sequence[str]] = None, types: Optional[Sequence[str]] = None,
+               page_min: Optional[int] = None, page_max: Optional[int] = None,
+               live: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the labels matching every given condition.
+
+        Args:
+            filenames (Optional[Sequence[str]]): Keep chunks of these files.
+            types (Optional[Sequence[str]]): Keep chunks of these block types.
+            page_min (Optional[int]): Keep chunks from this page on.
+            page_max (Optional[int]): Keep chunks up to this page.
+            live (Optional[np.ndarray]): Boolean mask of searchable labels.
+
+        Returns:
+            np.ndarray: Sorted int64 labels.
+        """
+        selected: Optional[np.ndarray] = None
+        if filenames is not None:
+            selected = self._posting("file", [self._file_ids[n] for n in filenames if n in self._file_ids])
+        if types is not None:
+            by_type = self._posting("type", [self._type_ids[t] for t in types if t in self._type_ids])
+            selected = by_type if selected is None else np.intersect1d(selected, by_type, assume_unique=True)
+        if page_min is not None or page_max is not None:
+            values = self._postings["page_values"]
+            lo = np.searchsorted(values, page_min, side="left") if page_min is not None else 0
+            hi = np.searchsorted(values, page_max, side="right") if page_max is not None else len(values)
+            hi = max(lo, hi)
+            if selected is None or hi - lo < len(selected):
+                by_page = np.sort(self._postings["page_labels"][lo:hi])
+                selected = by_page if selected is None else np.intersect1d(selected, by_page, assume_unique=True)
+            else:
+                pages = np.asarray(self._rows[selected, 1])
+                keep = np.ones(len(selected), dtype=bool)
+                if page_min is not None:
+                    keep &= pages >= page_min
+                if page_max is not None:
+                    keep &= pages <= page_max
+                selected = selected[keep]
+        if selected is None:
+            selected = np.arange(self._count)
+        selected = selected.astype(np.int64)
+        if live is not None:
+            selected = selected[live[selected]]
+        return selected
@@ -0,0 +1,169 @@
+from pathlib import Path
+import threading
+from typing import Any, Dict, Optional
+
+from sentence_transformers import SentenceTransformer, CrossEncoder
+from chromadb import PersistentClient
+
+from src.modules.reranker import DEFAULT_RERANK_MODEL
+from src.modules.index_cache import IndexCache
+
+
+class ModelRegistry:
+    """
+    ModelRegistry — Process-wide holder of the heavy retrieval resources.
+
+    Loading a SentenceTransformer, a CrossEncoder or opening a Chroma
+    `PersistentClient` costs from hundreds of milliseconds to several seconds.
+    The registry loads each resource once per process (keyed by model name or
+    storage path) and hands the shared instances to `Searcher`, `Indexer`,
+    `Reranker` and `Answerer` through their constructors.
+
+    All getters are thread-safe: FastAPI runs sync endpoints in a thread pool,
+    so concurrent first requests must not load the same model twice.
+
+    Typical usage:
+        ```python
+        registry = get_registry()
+        registry.warmup(config)
+        searcher = Searcher(config, files, logger, user_id, registry=registry)
+        ```
+    """
+
+    def __init__(self, logger=None) -> None:
+        """
+        Initialize an empty registry.
+
+        Args:
+            logger (Optional[Logger]): Optional logger for load/warmup messages.
+        """
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._embedders: Dict[str, SentenceTransformer] = {}
+        self._cross_encoders: Dict[str, CrossEncoder] = {}
+        self._chroma_clients: Dict[str, PersistentClient] = {}
+        self._index_cache: Optional[IndexCache] = None
+
+    def _get_or_load(self, cache: Dict[str, Any], key: str, loader) -> Any:
+        """
+        Return a cached resource or load it exactly once under the registry lock.
+
+        Args:
+            cache (Dict[str, Any]): The per-kind cache dictionary.
+            key (str): Cache key (model name or resolved path).
+            loader (Callable[[], Any]): Factory invoked on a cache miss.
+
+        Returns:
+            Any: The shared resource.
+        """
+        obj = cache.get(key)
+        if obj is not None:
+            return obj
+        with self._lock:
+            obj = cache.get(key)
+            if obj is None:
+                obj = loader()
+                cache[key] = obj
+                if self.logger:
+                    self.logger.info(f"ModelRegistry loaded {key}")
+        return obj
+
+    def get_embedding_model(self, model_name: str) -> SentenceTransformer:
+        """
+        Get the shared SentenceTransformer for `model_name`.
+
+        Args:
+            model_name (str): SentenceTransformer model name or path.
+
+        Returns:
+            SentenceTransformer: The loaded embedding model.
+        """
+        return self._get_or_load(self._embedders, model_name, lambda: SentenceTransformer(model_name))
+
+    def get_cross_encoder(self, model_name: str = DEFAULT_RERANK_MODEL) -> CrossEncoder:
+        """
+        Get the shared CrossEncoder used for reranking.
+
+        Args:
+            model_name (str): CrossEncoder model name or path.
+
+        Returns:
+            CrossEncoder: The loaded cross-encoder model.
+        """
+        return self._get_or_load(self._cross_encoders, model_name, lambda: CrossEncoder(model_name))
+
+    def get_chroma_client(self, path: Path) -> PersistentClient:
+        """
+        Get the shared Chroma `PersistentClient` for a storage directory.
+
+        Args:
+            path (Path): Directory of the persistent Chroma store.
+
+        Returns:
+            PersistentClient: The opened Chroma client.
+        """
+        key = str(Path(path).resolve())
+        return self._get_or_load(self._chroma_clients, key, lambda: PersistentClient(path=str(path)))
+
+    def get_index_cache(self, max_bytes: int) -> IndexCache:
+        """
+        Get the shared cache of resident HNSW indexes.
+
+        The budget given on the first call wins; later calls return the same cache.
+
+        Args:
+            max_bytes (int): Memory budget for resident indexes, in bytes.
+
+        Returns:
+            IndexCache: The process-wide index cache.
+        """
+        if self._index_cache is None:
+            with self._lock:
+                if self._index_cache is None:
+                    self._index_cache = IndexCache(max_bytes, self.logger)
+        return self._index_cache
+
+    def warmup(self, config: dict) -> None:
+        """
+        Load and exercise every model used on the query path.
+
+        One dummy encode/predict is run so that lazy kernel initialization
+        happens at startup rather than on the first user query.
+
+        Args:
+            config (dict): Pipeline configuration. Uses:
+                - models.embedding_model
+                - models.rerank_model (optional)
+                - paths.vector_db (the Chroma client is only opened with
+                  `indexing.vector_store: chroma`)
+        """
+        embed = self.get_embedding_model(config["models"]["embedding_model"])
+        embed.encode("warmup")
+        rerank_name = config["models"].get("rerank_model", DEFAULT_RERANK_MODEL)
+        self.get_cross_encoder(rerank_name).predict([("warmup", "warmup")])
+        if config.get("indexing", {}).get("vector_store", "hnsw") == "chroma":
+            self.get_chroma_client(Path(config["paths"]["vector_db"]))
+        if self.logger:
+            self.logger.info("ModelRegistry warmed up")
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(logger=None) -> ModelRegistry:
+    """
+    Return the process-wide ModelRegistry, creating it on first use.
+
+    Args:
+        logger (Optional[Logger]): Logger attached to the registry when it is created.
+
+    Returns:
+        ModelRegistry: The shared registry of this process.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(logger)
+    return _registry
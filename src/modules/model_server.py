@@ -1,33 +1,174 @@
 
 from ultralytics import YOLO
-import io
-from PIL import Image
+import os
+import time
+from queue import Empty
+from loguru import logger
+import numpy as np
 
+# Control messages exchanged with LayoutService on the control queue.
+READY = "__ready__"
+PING = "__ping__"
+PONG = "__pong__"
 
-def model_server(server_req_q, server_resp_q, model_path):
+
+def _collect_batch(server_req_q, first_job, max_batch_size, max_wait_ms):
+    """
+    Drain the request queue into one batch.
+
+    Starting from a job that was already received, keep taking jobs until
+    the batch holds `max_batch_size` entries or `max_wait_ms` milliseconds
+    have passed since the first one arrived.
+
+    Args:
+        server_req_q (multiprocessing.Queue): Request queue of the server.
+        first_job (tuple): Job that opened the batch.
+        max_batch_size (int): Maximum number of jobs in the batch.
+        max_wait_ms (float): Maximum time to wait for more jobs, in milliseconds.
+
+    Returns:
+        Tuple[List[tuple], List[tuple], bool]:
+            - page jobs of the batch,
+            - control jobs (pings) received meanwhile,
+            - True if the stop sentinel was received.
+    """
+    jobs, control, stop = [first_job], [], False
+    deadline = time.monotonic() + max_wait_ms / 1000.0
+    while len(jobs) < max_batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            job = server_req_q.get(timeout=remaining)
+        except Empty:
+            break
+        if job is None:
+            stop = True
+            break
+        if job[0] == PING:
+            control.append(job)
+            continue
+        jobs.append(job)
+    return jobs, control, stop
+
+
+def _load_page(page):
+    """
+    Copy a shared-memory page into the BGR array layout YOLO expects for NumPy input.
+
+    Args:
+        page (PageBuffer): Descriptor of the page pixels.
+
+    Returns:
+        np.ndarray: Contiguous `(height, width, 3)` uint8 BGR image.
+    """
+    arr = page.array()
+    try:
+        if arr.shape[2] == 1:
+            return np.ascontiguousarray(np.repeat(arr, 3, axis=2))
+        return np.ascontiguousarray(arr[..., 2::-1])
+    finally:
+        del arr
+        page.close()
+
+
+def _to_boxes(result):
+    """
+    Reduce a YOLO result to the plain detections page workers need.
+
+    Pickling the full `Results` object would send the original image back
+    through the queue; only labels, scores and coordinates are returned.
+
+    Args:
+        result (ultralytics.engine.results.Results): Prediction for one page.
+
+    Returns:
+        List[dict]: `{"label": str, "conf": float, "xyxy": (x1, y1, x2, y2)}` per box.
+    """
+    boxes = []
+    for b in result.boxes:
+        boxes.append({
+            "label": result.names[int(b.cls.item())],
+            "conf": float(b.conf.item()),
+            "xyxy": tuple(float(v) for v in b.xyxy[0].tolist()),
+        })
+    return boxes
+
+
+def _predict(model, jobs, images):
+    """
+    Run one `predict` over a batch, isolating the pages that make it fail.
+
+    If the batched call raises, every page is predicted on its own so that
+    a corrupt image (or an out-of-memory error on an oversized page) only
+    fails its own request instead of the whole batch or the server.
+
+    Args:
+        model (YOLO): Loaded layout model.
+        jobs (List[tuple]): Page jobs of the batch.
+        images (List[np.ndarray]): Pixels of the pages, aligned with `jobs`.
+
+    Returns:
+        List: Per job, its list of boxes or the `RuntimeError` to raise in the requester.
+    """
+    try:
+        return [_to_boxes(r) for r in model.predict(source=images, imgsz=640, verbose=False)]
+    except Exception as e:
+        if len(images) == 1:
+            logger.error(f"Layout job {jobs[0][0]}: inference failed: {e}")
+            return [RuntimeError(f"Layout inference failed: {e}")]
+        logger.warning(f"Layout batch of {len(images)} pages failed ({e}); retrying page by page")
+    return [_predict(model, [job], [image])[0] for job, image in zip(jobs, images)]
+
+
+def model_server(server_req_q, reply_qs, model_path, ctrl_q=None,
+                 max_batch_size=8, max_wait_ms=10.0):
     """
     Run a YOLO model server process for document layout detection.
 
     This function is designed to run as a background worker in a separate process.
     It continuously listens for incoming OCR/layout requests via a multiprocessing
-    queue, performs inference using a YOLO model, and sends the results back through
-    a response queue.
+    queue, performs inference using a YOLO model, and sends each result straight
+    to the reply queue of the slot its requester leased (see `LayoutClient`).
+
+    Requests are micro-batched: once a job arrives, the server keeps draining
+    the queue for up to `max_wait_ms` milliseconds (or until `max_batch_size`
+    jobs are collected) and runs a single `predict` over the whole list. On
+    CPU this amortizes the per-call overhead of YOLO over many pages of large
+    PDFs, at the cost of at most `max_wait_ms` extra latency per page.
+    Every batch logs its size, queueing wait and inference time at DEBUG
+    level; `max_batch_size=1` restores one-image-per-call inference.
 
     Workflow:
-        1. Wait for an incoming job tuple: (job_id, page_png_bytes)
-        2. Load the PNG bytes into a PIL Image
-        3. Perform layout detection using a YOLO model
-        4. Put the (job_id, results) tuple back into the response queue
-        5. Exit cleanly when a `None` job is received
+        1. Load the YOLO weights, run one warmup prediction and announce
+           `(READY, pid)` on the control queue
+        2. Wait for an incoming job tuple: (job_id, page, slot), where `page`
+           is a `PageBuffer` descriptor of pixels living in shared memory
+        3. Collect more jobs into a batch (bounded by size and wait time)
+        4. Map the pixels of each page (no PNG decoding)
+        5. Perform layout detection on the whole batch with one YOLO call
+        6. Put each (job_id, boxes) tuple on `reply_qs[slot]`, where `boxes`
+           is a list of `{"label", "conf", "xyxy"}` dicts (or the exception
+           of a page whose inference failed, see `_predict`)
+        7. Exit cleanly when a `None` job is received
+
+    A `(PING, token)` job is answered with `(PONG, token)` on the control
+    queue; `LayoutService.is_healthy()` uses it as an end-to-end health check.
 
     Args:
         server_req_q (multiprocessing.Queue):
             Queue from which to receive incoming page jobs. Each job is expected
-            to be a tuple `(job_id: int, page_png_bytes: bytes)`.
-        server_resp_q (multiprocessing.Queue):
-            Queue through which inference results will be sent back.
+            to be a tuple `(job_id: str, page: PageBuffer, slot: int)`.
+        reply_qs (List[multiprocessing.Queue]):
+            Per-slot reply queues; the result of a job goes to `reply_qs[slot]`.
         model_path (str):
             Path to the YOLO model file (e.g., "models/yolov8n-doclaynet.pt").
+        ctrl_q (Optional[multiprocessing.Queue]):
+            Queue for the readiness handshake and health-check replies.
+        max_batch_size (int):
+            Maximum number of pages per `predict` call (default: 8).
+        max_wait_ms (float):
+            Maximum time to wait for a batch to fill, in milliseconds (default: 10).
 
     Example:
         ```python
@@ -36,17 +177,19 @@ def model_server(server_req_q, server_resp_q, model_path):
 
         manager = Manager()
         req_q = manager.Queue()
-        resp_q = manager.Queue()
+        reply_qs = [manager.Queue()]
 
-        server = Process(target=model_server, args=(req_q, resp_q, "models/yolo-layout.pt"))
+        server = Process(target=model_server, args=(req_q, reply_qs, "models/yolo-layout.pt"))
         server.start()
 
-        # Send a sample image job
-        req_q.put((1, open("page.png", "rb").read()))
+        # Send a rendered page, answered on reply slot 0
+        page = PageBuffer.from_pixmap(fitz.open("doc.pdf")[0].get_pixmap(dpi=150))
+        req_q.put(("job-1", page, 0))
 
         # Get results
-        job_id, result = resp_q.get()
-        print(job_id, result)
+        job_id, boxes = reply_qs[0].get()
+        print(job_id, boxes)
+        page.release()
 
         # Shut down gracefully
         req_q.put(None)
@@ -56,18 +199,61 @@ def model_server(server_req_q, server_resp_q, model_path):
     
    
     model = YOLO(model_path)
+    model.predict(source=np.full((640, 640, 3), 255, dtype=np.uint8), imgsz=640, verbose=False)
+    if ctrl_q is not None:
+        ctrl_q.put((READY, os.getpid()))
 
+    max_batch_size = max(1, int(max_batch_size))
+    batches, pages, infer_total = 0, 0, 0.0
 
-    while True:
+    stop = False
+    while not stop:
         job = server_req_q.get()
         
         if job is None :
             break
 
-        job_id, page_png_bytes = job
+        if job[0] == PING:
+            jobs, control = [], [job]
+        else:
+            received = time.monotonic()
+            jobs, control, stop = _collect_batch(server_req_q, job, max_batch_size, max_wait_ms)
+
+        for _, token in control:
+            if ctrl_q is not None:
+                ctrl_q.put((PONG, token))
+
+        if not jobs:
+            continue
+
+        start = time.monotonic()
+        images, loaded = [], []
+        for job in jobs:
+            try:
+                images.append(_load_page(job[1]))
+                loaded.append(job)
+            except FileNotFoundError:
+                # The requester gave up and released the page before we got to it.
+                logger.warning(f"Layout job {job[0]}: page buffer no longer exists, skipping")
+        jobs = loaded
+        if not jobs:
+            continue
+        replies = _predict(model, jobs, images)
+        elapsed = time.monotonic() - start
 
+        for (job_id, _, slot), reply in zip(jobs, replies):
+            reply_qs[slot].put((job_id, reply))
 
-        img = Image.open(io.BytesIO(page_png_bytes))
-        results = model.predict(source=img, imgsz=640, verbose=False)
+        batches += 1
+        pages += len(jobs)
+        infer_total += elapsed
+        logger.debug(
+            f"Layout batch size={len(jobs)} wait={(start - received) * 1000:.1f}ms "
+            f"infer={elapsed * 1000:.1f}ms ({elapsed * 1000 / len(jobs):.1f}ms/page)"
+        )
 
-        server_resp_q.put((job_id, results))
+    if batches:
+        logger.info(
+            f"Layout server processed {pages} pages in {batches} batches "
+            f"(avg batch {pages / batches:.1f}, {infer_total * 1000 / pages:.1f}ms/page)"
+        )
@@ -0,0 +1,166 @@
+import threading
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+Box = Tuple[int, int, int, int]
+
+
+class PytesseractEngine:
+    """
+    Fallback OCR backend: one `tesseract` CLI run per region via pytesseract.
+
+    Every call spawns a process and writes temporary image files, so it is
+    only used when `tesserocr` is not installed (or explicitly requested).
+    """
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = "eng") -> None:
+        """
+        Args:
+            lang (str): Tesseract language code (e.g. "eng", "fra").
+        """
+        self.lang = lang
+
+    def recognize(self, image: Image.Image, boxes: Sequence[Box]) -> List[str]:
+        """
+        OCR several regions of one page.
+
+        Args:
+            image (Image.Image): Full page image.
+            boxes (Sequence[Box]): Regions as `(x1, y1, x2, y2)` pixel coordinates.
+
+        Returns:
+            List[str]: Stripped text of each region, aligned with `boxes`.
+        """
+        return [
+            pytesseract.image_to_string(image.crop(box), lang=self.lang).strip()
+            for box in boxes
+        ]
+
+
+class TesserocrEngine:
+    """
+    In-process OCR backend built on tesserocr's `PyTessBaseAPI`.
+
+    The Tesseract engine (language model included) is initialized once and
+    reused: each page is handed over with one `SetImage`, and each detected
+    region is recognized with `SetRectangle` + `GetUTF8Text`, without any
+    subprocess or temporary file. A `PyTessBaseAPI` is not thread-safe, so
+    each worker thread gets its own engine (see `get_ocr_engine`).
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng") -> None:
+        """
+        Args:
+            lang (str): Tesseract language code (e.g. "eng", "fra").
+        """
+        self.lang = lang
+        self.api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def recognize(self, image: Image.Image, boxes: Sequence[Box]) -> List[str]:
+        """
+        OCR several regions of one page with a single `SetImage`.
+
+        Args:
+            image (Image.Image): Full page image.
+            boxes (Sequence[Box]): Regions as `(x1, y1, x2, y2)` pixel coordinates.
+
+        Returns:
+            List[str]: Stripped text of each region, aligned with `boxes`.
+        """
+        if not boxes:
+            return []
+        self.api.SetImage(image)
+        texts = []
+        for x1, y1, x2, y2 in boxes:
+            if x2 <= x1 or y2 <= y1:
+                texts.append("")
+                continue
+            self.api.SetRectangle(x1, y1, x2 - x1, y2 - y1)
+            texts.append(self.api.GetUTF8Text().strip())
+        self.api.Clear()
+        return texts
+
+    def close(self) -> None:
+        """
+        Release the native Tesseract engine.
+        """
+        self.api.End()
+
+
+_local = threading.local()
+
+
+def get_ocr_engine(lang: str = "eng", backend: str = "auto"):
+    """
+    Return the calling thread's OCR engine for `lang`, creating it on first use.
+
+    Engines live as long as their worker thread, so the Tesseract
+    initialization cost is paid once per worker and language, not per region.
+
+    Args:
+        lang (str): Tesseract language code.
+        backend (str): "tesserocr", "pytesseract" or "auto" (tesserocr when installed).
+
+    Returns:
+        TesserocrEngine | PytesseractEngine: Engine exposing `recognize(image, boxes)`.
+    """
+    engines = getattr(_local, "engines", None)
+    if engines is None:
+        engines = _local.engines = {}
+    key = (lang, backend)
+    engine = engines.get(key)
+    if engine is None:
+        if backend == "tesserocr" or (backend == "auto" and tesserocr is not None):
+            if tesserocr is None:
+                raise RuntimeError("OCR backend 'tesserocr' requested but tesserocr is not installed")
+            engine = TesserocrEngine(lang)
+        else:
+            engine = PytesseractEngine(lang)
+        engines[key] = engine
+    return engine
+
+
+@lru_cache(maxsize=None)
+def ocr_version(backend: str = "auto") -> str:
+    """
+    Describe the OCR backend that `get_ocr_engine(backend=...)` resolves to, with its Tesseract version.
+
+    Used to key cached OCR output, so upgrading Tesseract or switching
+    backends never serves text produced by the previous engine.
+
+    Args:
+        backend (str): "tesserocr", "pytesseract" or "auto".
+
+    Returns:
+        str: E.g. "tesserocr 5.3.0" or "pytesseract 5.3.0".
+    """
+    if backend == "tesserocr" or (backend == "auto" and tesserocr is not None):
+        return f"tesserocr {tesserocr.tesseract_version().split()[1]}"
+    return f"pytesseract {pytesseract.get_tesseract_version()}"
+
+
+def to_pil(array: np.ndarray) -> Image.Image:
+    """
+    Wrap an `(h, w, c)` uint8 page array as a PIL image for OCR.
+
+    Args:
+        array (np.ndarray): RGB (3 channels) or grayscale (1 channel) pixels.
+
+    Returns:
+        Image.Image: Image sharing nothing with `array` once created.
+    """
+    return Image.fromarray(array[..., 0].copy() if array.shape[2] == 1 else array)
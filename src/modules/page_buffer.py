@@ -0,0 +1,134 @@
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing shared memory block without taking ownership of it.
+
+    On Python < 3.13 attaching registers the block with the resource tracker
+    of the attaching process, which would then unlink it (or warn about a
+    "leak") on exit even though the creator owns it. Undo that registration.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class PageBuffer:
+    """
+    PageBuffer — Raw page pixels in shared memory, passed between processes by name.
+
+    Sending a page to the layout server used to mean PNG-encoding the
+    rendered pixmap, pickling the bytes through a Manager queue and decoding
+    the PNG again in both `model_server` and `page_job`. A PageBuffer copies
+    the pixmap samples once into a `multiprocessing.shared_memory` block;
+    only the small descriptor `(name, width, height, channels)` is pickled,
+    and every process maps the same pixels as a NumPy array.
+
+    Ownership:
+        - The process that calls `from_pixmap()` owns the block and must call
+          `release()` once the page is processed (it unlinks the block). The
+          owner keeps its creating handle until then, so `close()` in the
+          owner only drops the view and the block is unlinked (and
+          unregistered from the resource tracker) exactly once.
+        - Other processes only `array()` / `close()` it.
+
+    Typical usage:
+        ```python
+        buf = PageBuffer.from_pixmap(page.get_pixmap(dpi=150))
+        try:
+            page_job((page.number, buf, "eng", layout_client))
+        finally:
+            buf.release()
+        ```
+    """
+
+    def __init__(self, name: str, width: int, height: int, channels: int = 3) -> None:
+        """
+        Args:
+            name (str): Name of the shared memory block.
+            width (int): Page width in pixels.
+            height (int): Page height in pixels.
+            channels (int): Number of 8-bit channels per pixel (3 for RGB).
+        """
+        self.name = name
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        # Creating handle, kept by the owning process until `release()`.
+        self._owned: Optional[shared_memory.SharedMemory] = None
+
+    @classmethod
+    def from_pixmap(cls, pix) -> "PageBuffer":
+        """
+        Copy a rendered PyMuPDF pixmap into a new shared memory block.
+
+        Args:
+            pix (fitz.Pixmap): Rendered page (RGB, no alpha).
+
+        Returns:
+            PageBuffer: Owning buffer holding the page pixels.
+        """
+        row = pix.width * pix.n
+        shm = shared_memory.SharedMemory(create=True, size=max(1, row * pix.height))
+        buf = cls(shm.name, pix.width, pix.height, pix.n)
+        buf._shm = buf._owned = shm
+        src = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+        buf.array()[:] = src[:, :row].reshape(pix.height, pix.width, pix.n)
+        return buf
+
+    def __getstate__(self) -> dict:
+        """
+        Pickle only the descriptor, never the mapping.
+        """
+        return {"name": self.name, "width": self.width, "height": self.height, "channels": self.channels}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def array(self) -> np.ndarray:
+        """
+        Map the page as an `(height, width, channels)` uint8 array (RGB order).
+
+        The array is a view on shared memory: copy it if it must outlive `close()`.
+
+        Returns:
+            np.ndarray: Zero-copy view of the page pixels.
+        """
+        if self._shm is None:
+            self._shm = _attach(self.name)
+        return np.ndarray((self.height, self.width, self.channels), dtype=np.uint8, buffer=self._shm.buf)
+
+    def close(self) -> None:
+        """
+        Unmap the block in this process. Views returned by `array()` must be dropped first.
+
+        In the owning process the creating handle is kept for `release()`.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def release(self) -> None:
+        """
+        Unmap and, in the owning process, destroy the block.
+        """
+        self.close()
+        shm, self._owned = self._owned, None
+        if shm is not None:
+            shm.close()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
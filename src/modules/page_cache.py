@@ -0,0 +1,85 @@
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from diskcache import Cache
+
+
+class PageCache:
+    """
+    PageCache — Persistent, size-bounded store of per-page layout + OCR output.
+
+    Rendering a scanned page, detecting its layout and OCRing every region
+    costs seconds, and `modify_rag` re-ingests every document of a user each
+    time a file is added. Results are therefore cached per page under
+    `sha256(document content hash, page number, dpi, pipeline version)`:
+
+      - re-ingesting an unchanged document skips all vision work;
+      - the same PDF uploaded by several students is processed once,
+        whatever its file name;
+      - changing the DPI, the YOLO weights, the OCR backend/version or the
+        language yields new keys instead of stale blocks.
+
+    Entries are pickled block lists in a `diskcache.Cache` (SQLite + files),
+    shared by threads and processes and evicted least-recently-used once
+    `size_limit` bytes are exceeded.
+    """
+
+    def __init__(self, directory: Path, version: Union[str, Callable[[], str]], size_limit: int,
+                 logger=None) -> None:
+        """
+        Open (or create) the cache directory.
+
+        Args:
+            directory (Path): Directory of the on-disk cache.
+            version (Union[str, Callable[[], str]]): Fingerprint of the layout/OCR pipeline,
+                part of every key, or a function computing it on the first lookup
+                (probing the OCR engine is then skipped for jobs that never OCR).
+            size_limit (int): Maximum cache size in bytes before LRU eviction.
+            logger (Optional[Logger]): Optional logger.
+        """
+        self._version = version
+        self.logger = logger
+        self.cache = Cache(str(directory), size_limit=size_limit, eviction_policy="least-recently-used")
+
+    @property
+    def version(self) -> str:
+        """
+        The pipeline fingerprint, computed once on first use.
+        """
+        if callable(self._version):
+            self._version = self._version()
+        return self._version
+
+    def key(self, content_hash: str, page_number: int, dpi: int) -> str:
+        """
+        Compute the cache key of one page.
+
+        Args:
+            content_hash (str): SHA-256 of the document file content.
+            page_number (int): Page index in the document.
+            dpi (int): Rendering resolution.
+
+        Returns:
+            str: Hex digest identifying the page and the pipeline that processed it.
+        """
+        payload = f"{content_hash}\x00{page_number}\x00{dpi}\x00{self.version}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """
+        Return the cached blocks of a page, or None on a miss.
+        """
+        return self.cache.get(key)
+
+    def set(self, key: str, blocks: List[Dict]) -> None:
+        """
+        Store the blocks extracted from a page.
+        """
+        self.cache.set(key, blocks)
+
+    def close(self) -> None:
+        """
+        Close the underlying SQLite connection.
+        """
+        self.cache.close()
@@ -1,12 +1,13 @@
 
-import io
-from typing import Any, Dict, List, Tuple
-import pytesseract
-from PIL import Image
-import uuid
+from typing import Dict, List, Optional, Tuple
 
+from src.core.progress import JobProgress
+from src.modules.layout_client import LayoutClient
+from src.modules.ocr_engine import get_ocr_engine, to_pil
+from src.modules.page_buffer import PageBuffer
 
-def page_job(args: Tuple[int, bytes, str, Any, Any]) -> List[Dict]:
+
+def page_job(args: Tuple[int, PageBuffer, str, LayoutClient, str, Optional[JobProgress]]) -> List[Dict]:
     """
     Process a single document page for layout detection and OCR text extraction.
 
@@ -15,23 +16,29 @@ def page_job(args: Tuple[int, bytes, str, Any, Any]) -> List[Dict]:
     layout elements (e.g., text, titles, tables), and then performs OCR on each
     detected region using Tesseract.
 
+    OCR goes through the worker thread's long-lived engine (`get_ocr_engine`):
+    with tesserocr installed the page is loaded once and every region is read
+    in-process; otherwise pytesseract runs the CLI per region.
+
     Workflow:
-        1. Send the page image bytes to the model server via the request queue.
-        2. Wait for the server response using a unique job ID.
-        3. For each detected bounding box:
-            - Crop the corresponding image region.
-            - Run OCR (Optical Character Recognition) on it.
-            - Collect structured text block data.
-        4. Return all extracted text blocks in a sorted list.
+        1. Send the page's shared-memory descriptor to the model server through
+           the LayoutClient (the pixels themselves are never copied or encoded).
+        2. Wait for the server response on the client's leased reply slot
+           (responses of other workers are never seen here).
+        3. Hand the page and all detected bounding boxes to the OCR engine.
+        4. Collect structured text block data for every non-empty region.
+        5. Return all extracted text blocks in a sorted list.
 
     Args:
-        args (Tuple[int, bytes, str, Any, Any]):
+        args (Tuple[int, PageBuffer, str, LayoutClient, str, Optional[JobProgress]]):
             A tuple containing:
                 - page_number (int): Page index in the document.
-                - page_png_bytes (bytes): PNG image data of the page.
+                - page (PageBuffer): Rendered RGB page pixels in shared memory.
+                  The caller owns the buffer and releases it afterwards.
                 - ocr_lang (str): OCR language code for Tesseract (e.g., "eng", "fra").
-                - server_req_q (multiprocessing.Queue): Queue used to send page jobs to the model server.
-                - server_resp_q (multiprocessing.Queue): Queue used to receive inference results.
+                - layout_client (LayoutClient): Handle to the shared layout model server.
+                - ocr_backend (str): "auto", "tesserocr" or "pytesseract".
+                - progress (Optional[JobProgress]): Receives the layout and OCR timings.
 
     Returns:
         List[Dict]: A list of structured OCR block dictionaries, where each entry includes:
@@ -41,39 +48,37 @@ def page_job(args: Tuple[int, bytes, str, Any, Any]) -> List[Dict]:
             - "y" (float): The top Y-coordinate position of the block in the page.
 
     Raises:
-        RuntimeError: If `server_req_q` or `server_resp_q` are not provided.
+        RuntimeError: If no `layout_client` is provided.
         TimeoutError: If the model server does not respond within 30 seconds.
     """
-    page_number, page_png_bytes, ocr_lang, server_req_q, server_resp_q = args
-
-    if server_req_q is None or server_resp_q is None:
+    page_number, page, ocr_lang, layout_client, ocr_backend, progress = args
+    progress = progress or JobProgress()
 
-        raise RuntimeError("server_req_q or server_resp_q were not provided to page_job!")
+    if layout_client is None:
+        raise RuntimeError("layout_client was not provided to page_job!")
 
-    job_id = str(uuid.uuid4())
+    with progress.timed("layout"):
+        boxes = layout_client.predict(page, timeout=30)
+    if not boxes:
+        page.close()
+        return []
 
-    server_req_q.put((job_id, page_png_bytes))
+    arr = page.array()
+    try:
+        img = to_pil(arr)
+    finally:
+        del arr
+        page.close()
 
-    while True:
-        jid, results = server_resp_q.get(timeout=30)
-        if jid == job_id:  
-            break
-        else:
+    regions = [tuple(map(int, box["xyxy"])) for box in boxes]
+    with progress.timed("ocr"):
+        texts = get_ocr_engine(ocr_lang, ocr_backend).recognize(img, regions)
 
-            server_resp_q.put((jid, results))
-
-    img = Image.open(io.BytesIO(page_png_bytes))
     blocks = []
-    for r in results[0].boxes:
-        cls_id = int(r.cls.item())
-        label = results[0].names[cls_id]
-        x1, y1, x2, y2 = map(int, r.xyxy[0].tolist())
-        cropped = img.crop((x1, y1, x2, y2))
-        text = pytesseract.image_to_string(cropped, lang=ocr_lang).strip()
-
+    for box, (x1, y1, x2, y2), text in zip(boxes, regions, texts):
         if text:
             blocks.append({
-                "type": label.lower(),
+                "type": box["label"].lower(),
                 "text": text,
                 "page": page_number,
                 "y": float(y1)
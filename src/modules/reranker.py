@@ -1,7 +1,9 @@
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from sentence_transformers import CrossEncoder
 
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
 class Reranker:
     """
     Reranker — Re-rank retrieved documents using a cross-encoder model.
@@ -17,7 +19,7 @@ class Reranker:
         reranked_docs = reranker.rerank(query="what is quantum computing?", docs=docs, top_k=5)
         ```
     """
-    def __init__(self, model_name="cross-encoder/ms-marco-MiniLM-L-6-v2", logger=None)-> None:
+    def __init__(self, model_name=DEFAULT_RERANK_MODEL, logger=None, model: Optional[CrossEncoder] = None)-> None:
         """
         Initialize the reranker with a given cross-encoder model.
 
@@ -25,9 +27,11 @@ class Reranker:
             model_name (str): Name or path of the pretrained CrossEncoder model.
                               Defaults to `"cross-encoder/ms-marco-MiniLM-L-6-v2"`.
             logger (Optional[Logger]): Optional logger for status messages.
+            model (Optional[CrossEncoder]): Already loaded cross-encoder (e.g. from the
+                              ModelRegistry). When given, no model is loaded here.
         """
         self.logger = logger
-        self.reranker = CrossEncoder(model_name)
+        self.reranker = model if model is not None else CrossEncoder(model_name)
         if self.logger:
             self.logger.info(f"Reranker initialized with {model_name}")
 
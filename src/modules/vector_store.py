@@ -0,0 +1,431 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Supported values of `indexing.quantization`.
+QUANTIZATIONS = ("none", "float16", "int8")
+
+# Rows converted to float32 at once while scanning. Bounds the temporary memory of
+# each concurrent query (~6 MB at dim 384) and keeps blocks cache-resident.
+SCAN_BLOCK_ROWS = 4096
+
+
+def _code_dtype(quantization: str) -> np.dtype:
+    return np.dtype(np.float16 if quantization == "float16" else np.int8)
+
+
+def _header_bytes(quantization: str, dim: int) -> int:
+    # int8 files start with the per-dimension float32 scales they were encoded with.
+    return 4 * dim if quantization == "int8" else 0
+
+
+def _encode(x: np.ndarray, quantization: str, scale: Optional[np.ndarray]) -> np.ndarray:
+    if quantization == "float16":
+        return x.astype(np.float16)
+    return np.clip(np.rint(x / scale), -127, 127).astype(np.int8)
+
+
+def _keep_top(c: int, ids: np.ndarray, scores: np.ndarray, *extra: np.ndarray) -> Tuple[np.ndarray, ...]:
+    # Keep the `c` best-scored columns of every row of `ids`, `scores` and `extra`.
+    if scores.shape[1] <= c:
+        return (ids, scores) + extra
+    top = np.argpartition(-scores, c - 1, axis=1)[:, :c]
+    return tuple(np.take_along_axis(a, top, axis=1) for a in (ids, scores) + extra)
+
+
+class VectorStore:
+    """
+    VectorStore — Flat, label-addressed copy of a corpus' embeddings, optionally scalar-quantized.
+
+    Row `i` of every file is the normalized embedding of HNSW label `i`:
+
+        <index_dir>/vectors.f32     float32 rows (memory-mapped, read for rescoring)
+        <index_dir>/vectors.f16     float16 rows                     (quantization: float16)
+        <index_dir>/vectors.i8      float32 scales[dim] + int8 rows  (quantization: int8)
+        <index_dir>/vectors.json    quantization, fitted rows, measured recall
+
+    hnswlib only stores float32 vectors, so with `indexing.quantization` set
+    the Searcher does not load the HNSW index of corpora up to
+    `retrieval.quantized_max_chunks` labels: it scans the 2x (float16) or
+    4x (int8) smaller codes block by block and rescores the best
+    `retrieval.rescore_k` candidates exactly against the float32 rows, of
+    which only those candidates are paged in. The scan is linear in the
+    corpus size (~47 ms per query at 300k x 384 int8), which is why larger
+    corpora keep HNSW. Corpora of at most
+    `retrieval.exact_max_chunks` labels are searched exactly over the
+    float32 rows instead (one matrix-vector product, no HNSW index loaded).
+
+    int8 uses symmetric per-dimension scaling (`x ≈ scale[d] * code`, with
+    `scale[d] = max |x[:, d]| / 127`). Scales are fitted on the rows present
+    when the code file is (re)written and refitted whenever the collection
+    has doubled since; rows appended in between are clipped to the fitted
+    range. Every refit measures recall@k of the quantized search against
+    exact float32 search (see `measure_recall`) and stores it in
+    `vectors.json`.
+
+    Like `ChunkStore`, writers append rows and make them visible on `save()`,
+    `reset()` starts a new generation swapped in atomically, and the label
+    table is authoritative for the number of rows a reader uses.
+    """
+
+    F32_FILE = "vectors.f32"
+    CODE_FILES = {"float16": "vectors.f16", "int8": "vectors.i8"}
+    META_FILE = "vectors.json"
+
+    def __init__(self, directory: Path, dim: int, quantization: str = "none") -> None:
+        """
+        Args:
+            directory (Path): Directory of the store (the corpus' index directory).
+            dim (int): Embedding dimension.
+            quantization (str): "none", "float16" or "int8".
+
+        Raises:
+            ValueError: If `quantization` is not supported.
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.dir = Path(directory)
+        self.dim = int(dim)
+        self.quantization = quantization
+        self.f32_path = self.dir / self.F32_FILE
+        self.code_path = self.dir / self.CODE_FILES[quantization] if quantization != "none" else None
+        self.meta_path = self.dir / self.META_FILE
+        self._count = 0
+        self._code_rows = 0
+        self._fitted_rows = 0
+        self._scale: Optional[np.ndarray] = None
+        self._recall: Optional[Dict] = None
+        self._replace = False
+        self.vectors: Optional[np.ndarray] = None
+        self.codes: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _tmp(self, path: Path) -> Path:
+        return path.with_name(path.name + ".tmp")
+
+    def _f32_rows(self) -> np.ndarray:
+        """
+        Memory-map the float32 rows written so far.
+        """
+        path = self._tmp(self.f32_path) if self._replace else self.f32_path
+        if self._count == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.memmap(path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+
+    # --- writer -------------------------------------------------------------------------
+
+    def load(self, count: int) -> bool:
+        """
+        Open the store for appending after the first `count` rows (the label table's length).
+
+        Rows past `count` (a crash before the label table was saved) are
+        truncated; a missing or foreign code file is re-encoded on `save()`.
+
+        Args:
+            count (int): Number of labels of the index.
+
+        Returns:
+            bool: False if the float32 rows do not cover `count` labels (the index must be rebuilt).
+        """
+        meta = json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+        row_bytes = 4 * self.dim
+        if (not self.f32_path.exists() or self.f32_path.stat().st_size < count * row_bytes
+                or int(meta.get("dim", self.dim)) != self.dim):
+            return False
+        os.truncate(self.f32_path, count * row_bytes)
+        self._count, self._code_rows, self._fitted_rows, self._scale = count, 0, 0, None
+        self._recall = meta.get("recall")
+        if (self.code_path is not None and self.code_path.exists()
+                and meta.get("quantization") == self.quantization):
+            header = _header_bytes(self.quantization, self.dim)
+            code_bytes = _code_dtype(self.quantization).itemsize * self.dim
+            size = self.code_path.stat().st_size
+            if size >= header:
+                self._code_rows = min(count, (size - header) // code_bytes)
+                os.truncate(self.code_path, header + self._code_rows * code_bytes)
+                self._fitted_rows = int(meta.get("fitted_rows", 0))
+                if header:
+                    self._scale = np.fromfile(self.code_path, dtype=np.float32, count=self.dim)
+        return True
+
+    def reset(self) -> None:
+        """
+        Start an empty generation of the store (made visible by `save()`).
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        open(self._tmp(self.f32_path), "wb").close()
+        self._count, self._code_rows, self._fitted_rows, self._scale = 0, 0, 0, None
+        self._replace = True
+
+    def append(self, vectors: np.ndarray) -> None:
+        """
+        Append normalized embeddings; row `i` gets label `len(self) + i`.
+
+        Args:
+            vectors (np.ndarray): `(n, dim)` float32 embeddings.
+        """
+        if not len(vectors):
+            return
+        path = self._tmp(self.f32_path) if self._replace else self.f32_path
+        with open(path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._count += len(vectors)
+
+    def save(self, rescore_k: int = 0) -> Optional[Dict]:
+        """
+        Persist the float32 rows, then encode the new rows (refitting scales when due).
+
+        Args:
+            rescore_k (int): Rescoring depth used for the recall measurement of a refit.
+
+        Returns:
+            Optional[Dict]: The recall report when the codes were refitted, else None.
+        """
+        if self._replace:
+            os.replace(self._tmp(self.f32_path), self.f32_path)
+            self._replace = False
+        if self.code_path is None:
+            return None
+        report = None
+        refit = self._fitted_rows == 0 or (
+            self.quantization == "int8" and self._count >= 2 * self._fitted_rows
+        )
+        if refit:
+            self._write_codes()
+            if self._count:
+                report = self._recall = self.measure_recall(rescore_k=rescore_k)
+        elif self._code_rows < self._count:
+            rows = self._f32_rows()
+            with open(self.code_path, "ab") as f:
+                for start in range(self._code_rows, self._count, SCAN_BLOCK_ROWS):
+                    f.write(_encode(rows[start:start + SCAN_BLOCK_ROWS], self.quantization, self._scale).tobytes())
+            self._code_rows = self._count
+        tmp = self._tmp(self.meta_path)
+        tmp.write_text(json.dumps({
+            "dim": self.dim,
+            "quantization": self.quantization,
+            "fitted_rows": self._fitted_rows,
+            "recall": self._recall,
+        }))
+        os.replace(tmp, self.meta_path)
+        return report
+
+    def _write_codes(self) -> None:
+        """
+        Fit the scales on all current rows and rewrite the code file atomically.
+        """
+        rows = self._f32_rows()
+        scale = None
+        if self.quantization == "int8":
+            maxabs = np.zeros(self.dim, dtype=np.float32)
+            for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+                np.maximum(maxabs, np.abs(rows[start:start + SCAN_BLOCK_ROWS]).max(axis=0), out=maxabs)
+            scale = (np.maximum(maxabs, 1e-6) / 127.0).astype(np.float32)
+        tmp = self._tmp(self.code_path)
+        with open(tmp, "wb") as f:
+            if scale is not None:
+                f.write(scale.tobytes())
+            for start in range(0, len(rows), SCAN_BLOCK_ROWS):
+                f.write(_encode(rows[start:start + SCAN_BLOCK_ROWS], self.quantization, scale).tobytes())
+        os.replace(tmp, self.code_path)
+        self._scale, self._fitted_rows, self._code_rows = scale, self._count, self._count
+
+    def measure_recall(self, k: int = 10, rescore_k: int = 0, sample: int = 100) -> Optional[Dict]:
+        """
+        Measure recall@k of the quantized search against exact float32 search.
+
+        A sample of stored vectors is used as queries (each one excluded from
+        its own results), so no query log is needed. All queries are scored
+        together in one pass over the rows: each block is read and decoded
+        once, and only the running top candidates of every query are kept,
+        so the cost is about one scan of the corpus rather than three per query.
+
+        Args:
+            k (int): Cut-off of the recall.
+            rescore_k (int): Also measure recall with float32 rescoring of this many candidates.
+            sample (int): Number of queries.
+
+        Returns:
+            Optional[Dict]: `{"k", "queries", "recall", "recall_rescored", "rescore_k",
+            "compression"}`, or None if the collection has at most `k` rows.
+        """
+        n = self._count
+        if self.code_path is None or n <= k:
+            return None
+        reader = VectorStore.reader(self.dir, self.dim, n, self.quantization)
+        picks = np.random.default_rng(0).choice(n, size=min(sample, n), replace=False)
+        queries = np.asarray(reader.vectors[picks], dtype=np.float32)
+        scaled = queries * reader._scale if reader._scale is not None else queries
+        c = max(k, rescore_k)
+        m = len(picks)
+        # Running best labels per query: exact top-k, and quantized top-c with their exact scores.
+        truth_ids, truth_scores = np.zeros((m, 0), dtype=np.int64), np.zeros((m, 0), dtype=np.float32)
+        cand_ids, cand_scores = np.zeros((m, 0), dtype=np.int64), np.zeros((m, 0), dtype=np.float32)
+        cand_exact = np.zeros((m, 0), dtype=np.float32)
+        for start in range(0, n, SCAN_BLOCK_ROWS):
+            stop = min(n, start + SCAN_BLOCK_ROWS)
+            ids = np.broadcast_to(np.arange(start, stop, dtype=np.int64), (m, stop - start))
+            exact = queries @ np.asarray(reader.vectors[start:stop], dtype=np.float32).T
+            quant = scaled @ np.asarray(reader.codes[start:stop], dtype=np.float32).T
+            own = ids == picks[:, None]
+            exact[own] = quant[own] = -np.inf
+            truth_ids, truth_scores = _keep_top(k, np.hstack([truth_ids, ids]), np.hstack([truth_scores, exact]))
+            cand_ids, cand_scores, cand_exact = _keep_top(
+                c, np.hstack([cand_ids, ids]), np.hstack([cand_scores, quant]), np.hstack([cand_exact, exact])
+            )
+        hits = hits_rescored = 0
+        for i in range(m):
+            truth = set(truth_ids[i].tolist())
+            by_code = np.argsort(-cand_scores[i], kind="stable")
+            hits += len(truth & set(cand_ids[i][by_code[:k]].tolist()))
+            if rescore_k:
+                rescored = np.argsort(-cand_exact[i], kind="stable")[:k]
+                hits_rescored += len(truth & set(cand_ids[i][rescored].tolist()))
+        total = k * m
+        return {
+            "k": k,
+            "queries": int(m),
+            "recall": round(hits / total, 4),
+            "recall_rescored": round(hits_rescored / total, 4) if rescore_k else None,
+            "rescore_k": int(rescore_k),
+            "compression": round(4 / _code_dtype(self.quantization).itemsize, 1),
+        }
+
+    # --- reader -------------------------------------------------------------------------
+
+    @classmethod
+    def covers(cls, directory: Path, dim: int, count: int, quantization: str = "none") -> bool:
+        """
+        Check that the files of a store hold at least `count` rows.
+
+        Args:
+            directory (Path): Directory of the store.
+            dim (int): Embedding dimension.
+            count (int): Number of labels of the index.
+            quantization (str): Quantization whose code file is required as well.
+
+        Returns:
+            bool: True if `reader()` can serve `count` labels.
+        """
+        store = cls(directory, dim, quantization)
+        if not store.f32_path.exists() or store.f32_path.stat().st_size < count * 4 * dim:
+            return False
+        if store.code_path is None:
+            return True
+        need = _header_bytes(quantization, dim) + count * _code_dtype(quantization).itemsize * dim
+        return store.code_path.exists() and store.code_path.stat().st_size >= need
+
+    @classmethod
+    def reader(cls, directory: Path, dim: int, count: int, quantization: str = "none") -> "VectorStore":
+        """
+        Memory-map the first `count` rows of a store for searching.
+
+        Args:
+            directory (Path): Directory of the store.
+            dim (int): Embedding dimension.
+            count (int): Number of labels of the index.
+            quantization (str): "none" to search the float32 rows, else the code file to scan.
+
+        Returns:
+            VectorStore: Store supporting `scan()` and `search()`.
+        """
+        store = cls(directory, dim, quantization)
+        store._count = count
+        store.vectors = store._f32_rows()
+        if store.code_path is not None:
+            header = _header_bytes(quantization, dim)
+            if header:
+                store._scale = np.fromfile(store.code_path, dtype=np.float32, count=dim)
+            store.codes = (np.memmap(store.code_path, dtype=_code_dtype(quantization), mode="r",
+                                     offset=header, shape=(count, dim))
+                           if count else np.zeros((0, dim), dtype=_code_dtype(quantization)))
+        return store
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes touched by a full scan (the code file when quantized).
+        """
+        rows = self.codes if self.codes is not None else self.vectors
+        return int(rows.nbytes) if rows is not None else 0
+
+    def scan(self, q: np.ndarray, quantized: bool = True) -> np.ndarray:
+        """
+        Score every row against a normalized query.
+
+        Args:
+            q (np.ndarray): Normalized float32 query.
+            quantized (bool): Scan the codes (if any) instead of the float32 rows.
+
+        Returns:
+            np.ndarray: `(count,)` float32 inner products (cosine similarities).
+        """
+        rows, qv = self.vectors, q
+        if quantized and self.codes is not None:
+            rows = self.codes
+            if self._scale is not None:
+                qv = q * self._scale
+        out = np.empty(self._count, dtype=np.float32)
+        for start in range(0, self._count, SCAN_BLOCK_ROWS):
+            out[start:start + SCAN_BLOCK_ROWS] = np.asarray(rows[start:start + SCAN_BLOCK_ROWS], dtype=np.float32) @ qv
+        return out
+
+    def search(self, q: np.ndarray, k: int, rescore_k: int = 0,
+               live: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the `k` most similar labels, rescoring quantized candidates in float32.
+
+        Args:
+            q (np.ndarray): Normalized float32 query.
+            k (int): Number of results.
+            rescore_k (int): Number of quantized candidates rescored exactly (0 disables).
+            live (Optional[np.ndarray]): Boolean mask of searchable labels.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Labels and cosine similarities, best first.
+        """
+        scores = self.scan(q)
+        if live is not None:
+            scores[~live[:self._count]] = -np.inf
+        n = len(scores)
+        c = min(n, max(k, rescore_k) if self.codes is not None else k)
+        cand = np.argpartition(-scores, c - 1)[:c] if c < n else np.arange(n)
+        cand_scores = scores[cand]
+        if self.codes is not None and rescore_k:
+            order = np.argsort(cand)
+            cand, cand_scores = cand[order], cand_scores[order]
+            exact = np.asarray(self.vectors[cand], dtype=np.float32) @ q
+            cand_scores = np.where(np.isfinite(cand_scores), exact, -np.inf).astype(np.float32)
+        top = np.argsort(-cand_scores)[:k]
+        top = top[np.isfinite(cand_scores[top])]
+        return cand[top], cand_scores[top]
+
+    def search_subset(self, q: np.ndarray, k: int, labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the `k` labels of `labels` most similar to the query, scored exactly in float32.
+
+        Only the rows of `labels` are read, so the cost follows the size of
+        the subset (e.g. the chunks matching a metadata filter), not of the corpus.
+
+        Args:
+            q (np.ndarray): Normalized float32 query.
+            k (int): Number of results.
+            labels (np.ndarray): Sorted candidate labels.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Labels and cosine similarities, best first.
+        """
+        if len(labels) == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = np.empty(len(labels), dtype=np.float32)
+        for start in range(0, len(labels), SCAN_BLOCK_ROWS):
+            block = labels[start:start + SCAN_BLOCK_ROWS]
+            scores[start:start + len(block)] = np.asarray(self.vectors[block], dtype=np.float32) @ q
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return labels[top].astype(np.int64), scores[top]
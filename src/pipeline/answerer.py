@@ -1,6 +1,7 @@
 
-from typing import List, Dict
-from src.modules.reranker import Reranker
+from typing import List, Dict, Optional
+from src.modules.reranker import Reranker, DEFAULT_RERANK_MODEL
+from src.modules.model_registry import ModelRegistry, get_registry
 from src.pipeline.searcher import Searcher
 from src.core.utils import FileManager
 import ollama   
@@ -19,7 +20,10 @@ class Answerer:
     """
 
 
-    def __init__(self, config:dict, file_manager:FileManager, logger, user_id:str)-> None:
+    def __init__(self, config:dict, file_manager:FileManager, logger, user_id:str,
+                 registry: Optional[ModelRegistry] = None,
+                 rag_id: Optional[int] = None,
+                 chunk_table=None)-> None:
         """
         Initialize the Answerer for a specific user session.
 
@@ -30,11 +34,22 @@ class Answerer:
             file_manager (FileManager): File management utility for accessing local paths and configs.
             logger (Logger): Logger instance (e.g., Loguru) for logging system events.
             user_id (str): Unique identifier of the user to ensure private data isolation.
+            registry (Optional[ModelRegistry]): Shared model registry. Defaults to
+                the process-wide registry.
+            rag_id (Optional[int]): RAG workspace to answer from (see `Searcher`).
+            chunk_table (Optional[ChunkTable]): The RAG's rows of the `chunks` table
+                (`indexing.vector_store: sql`).
         """
         self.logger = logger
         self.files = file_manager
         self.user_id = user_id
-        self.searcher = Searcher(config, file_manager, logger, user_id)
+        self.registry = registry or get_registry(logger)
+        self.searcher = Searcher(config, file_manager, logger, user_id, registry=self.registry, rag_id=rag_id,
+                                 chunk_table=chunk_table)
+        self.reranker = Reranker(
+            logger=logger,
+            model=self.registry.get_cross_encoder(config['models'].get("rerank_model", DEFAULT_RERANK_MODEL)),
+        )
         self.model = config['models']["llm_model"]
         self.logger.info(f"Answer initialized for user {user_id} with Ollama model: {self.model}")
 
@@ -99,8 +114,7 @@ class Answerer:
 
         self.logger.info(f" Generating answerfor user {self.user_id} for: {question}")
         results = self.searcher.search(question, top_k=20)
-        reranker = Reranker()
-        reranked_results = reranker.rerank(question, results, top_k=5)
+        reranked_results = self.reranker.rerank(question, results, top_k=5)
         context = self.build_context(reranked_results)
         answer = self.generate_answer(question, context)
         print("\n Question:", question)
@@ -1,13 +1,25 @@
 
-import json
+import os
+import queue
+import time
 from pathlib import Path
-from typing import Any, List, Dict
-from sentence_transformers import SentenceTransformer
-from chromadb import PersistentClient
+from typing import Any, List, Dict, Optional, Tuple
 from src.core.utils import FileManager
+from src.core.corpus import Corpus
+from src.core.ids import CHUNK_INDEX_BITS, doc_num
+from src.core.progress import JobProgress
+from src.modules.model_registry import ModelRegistry, get_registry
+from src.modules.embedder import Embedder
+from src.modules.chunk_store import ChunkStore
+from src.modules.vector_store import VectorStore
+from src.modules.bm25_index import Bm25Index
+from src.modules.metadata_index import MetadataIndex
 import hnswlib
 import numpy as np
 
+# Chroma rejects oversized add/upsert/delete calls; stay well below its limit.
+CHROMA_BATCH_SIZE = 5000
+
 
 class Indexer:
     """
@@ -15,43 +27,98 @@ class Indexer:
 
     This class performs the indexing stage of a Retrieval-Augmented Generation (RAG) system.
     It takes preprocessed text chunks (from the ingestion stage), generates dense vector
-    embeddings for each chunk using a SentenceTransformer, and stores them in a persistent
-    ChromaDB vector database.
+    embeddings for each chunk using a SentenceTransformer, and stores them in an HNSW index.
+
+    The HNSW index is the only copy of the vectors: chunk texts and metadata
+    go to a `ChunkStore` addressed by HNSW label (`indexing.vector_store: hnsw`,
+    the default). With `vector_store: chroma` they go to a Chroma collection
+    instead, which also keeps its own copy of every embedding, and with
+    `vector_store: sql` to the application database's `chunks` table
+    (`ChunkTable`), whose FTS5 index then replaces the `Bm25Index`.
+
+    Next to the index, a flat `VectorStore` keeps the same vectors row by
+    label, scalar-quantized to float16/int8 when `indexing.quantization` is
+    set, so that searchers can serve large corpora from the smaller codes,
+    a `Bm25Index` holds the same chunks' terms for lexical and hybrid
+    search (`indexing.bm25`), and a `MetadataIndex` their file names, pages
+    and block types for filtered search.
 
-    Each user's embeddings are isolated via a `user_id` tag in the metadata to ensure privacy
-    and prevent data overlap between users.
+    Each corpus (a RAG workspace, see `Corpus`) has its own index and store
+    under `paths.vector_db`, so tenants never share an index.
     """
 
-    def __init__(self, config:dict, file_manager:FileManager, logger, user_id:str)-> None:
+    def __init__(self, config:dict, file_manager:FileManager, logger, user_id:str,
+                 registry: Optional[ModelRegistry] = None,
+                 progress: Optional[JobProgress] = None,
+                 rag_id: Optional[int] = None,
+                 chunk_table=None)-> None:
         """
         Initialize the Indexer for a specific user.
 
         This method prepares:
-          - The per-user chunk file path (`chunks_<user_id>.json`)
-          - The persistent ChromaDB vector store
+          - The per-corpus chunk file path (`chunks_<key>.json`)
+          - The chunk store (or Chroma collection, or SQL table) holding texts and metadata
           - The SentenceTransformer model used for embedding generation
 
         Args:
             config (dict): Configuration dictionary (usually from config.yaml).
                 Must include:
                     - paths.chunks_file: Base path to the chunks JSON file
-                    - paths.vector_db: Directory path for the ChromaDB store
+                    - paths.vector_db: Directory of the per-corpus indexes
                     - models.embedding_model: SentenceTransformer model name
+                Optional:
+                    - indexing.vector_store: "hnsw" (default), "chroma" or "sql"
+                    - indexing.quantization: "none" (default), "float16" or "int8"
+                    - indexing.bm25: Build the BM25 index (default: True; not
+                      built with "sql", which searches keywords with FTS5)
+                    - retrieval.rescore_k: Rescoring depth used when reporting recall
             file_manager (FileManager): Utility class for file I/O operations.
             logger (Logger): Logger instance (e.g., Loguru) for progress and error tracking.
             user_id (str): Unique identifier of the current user (used for data isolation).
+            registry (Optional[ModelRegistry]): Shared model registry. Defaults to
+                the process-wide registry.
+            progress (Optional[JobProgress]): Receives embedding/indexing timings and
+                the number of searchable chunks.
+            rag_id (Optional[int]): Index this RAG workspace into its own collection
+                and ANN index under `paths.vector_db/rag_<rag_id>/` (see `Corpus`).
+                Defaults to the user's whole corpus.
+            chunk_table (Optional[ChunkTable]): The RAG's rows of the `chunks` table,
+                required with `indexing.vector_store: sql`.
+
+        Raises:
+            ValueError: If `indexing.vector_store` is "sql" and no `chunk_table` is given.
         """
         self.logger = logger
         self.files = file_manager
         self.user_id = user_id
+        self.registry = registry or get_registry(logger)
+        self.progress = progress or JobProgress()
 
-        path=config['paths']
-        self.chunks_file = Path(path['chunks_file']).with_name(f'chunks_{user_id}.json')
-        self.vector_db_dir = Path(path['vector_db'])
+        self.corpus = Corpus(config, user_id, rag_id)
+        self.chunks_file = self.corpus.chunks_file
+        self.delta_file = self.corpus.delta_file
+        self.vector_db_dir = Path(config['paths']['vector_db'])
+        self.index_path = self.corpus.index_path
+        self.labels_path = self.corpus.labels_path
 
-        self.embed_model=SentenceTransformer(config["models"]['embedding_model'])
-        self.client= PersistentClient(path=str(self.vector_db_dir))
-        self.collection = self.client.get_or_create_collection('documents')
+        self.embed_model = self.registry.get_embedding_model(config["models"]['embedding_model'])
+        self.embedder = Embedder.from_config(self.embed_model, config, logger)
+        self.incremental = bool(config.get("indexing", {}).get("incremental", True))
+        self.stream_save_interval = float(config.get("indexing", {}).get("stream_save_interval_s", 2.0))
+        self.store = ChunkStore(self.corpus.index_dir)
+        self.vectors = VectorStore(self.corpus.index_dir, self.embedder.dim,
+                                   str(config.get("indexing", {}).get("quantization", "none")).lower())
+        self.rescore_k = int(config.get("retrieval", {}).get("rescore_k", 100))
+        use_bm25 = config.get("indexing", {}).get("bm25", True) and not self.corpus.uses_sql
+        self.bm25 = Bm25Index(self.corpus.index_dir) if use_bm25 else None
+        self.meta = MetadataIndex(self.corpus.index_dir)
+        self.chunk_table = chunk_table
+        if self.corpus.uses_sql and chunk_table is None:
+            raise ValueError("indexing.vector_store: sql requires a chunk_table")
+        self.client = self.collection = None
+        if self.corpus.uses_chroma:
+            self.client = self.registry.get_chroma_client(self.vector_db_dir)
+            self.collection = self.client.get_or_create_collection(self.corpus.collection_name)
 
         self.logger.info('Indexer initialized for user {user_id}')
     
@@ -75,81 +142,451 @@ class Indexer:
                 - An info message with the number of loaded chunks if found.
         """
         if not self.chunks_file.exists():
-            self.logger.warning(f"No chunks file found for user {self.user_id}")
+            self.logger.warning(f"No chunks file found for {self.corpus.key}")
             return[]
         chunks = self.files.load_json(self.chunks_file)
-        self.logger.info(f"Loaded {len(chunks)} chunks from {self.chunks_file} for user {self.user_id}")
+        self.logger.info(f"Loaded {len(chunks)} chunks from {self.chunks_file} for {self.corpus.key}")
         return chunks 
 
 
 
-    def index_chunks(self, chunks:List[Dict])-> None:
+    def _chroma_ids(self, chunk_ids: List[int]) -> List[str]:
+        """
+        Build the Chroma ids of chunks.
+
+        Chunk ids are stable and document-scoped (see `src.core.ids`) and
+        every corpus has its own collection, so the id alone is unique.
+
+        Args:
+            chunk_ids (List[int]): Chunk ids.
+
+        Returns:
+            List[str]: Chroma ids (the chunk ids as strings).
+        """
+        return [str(int(cid)) for cid in chunk_ids]
+
+    def _metadata(self, ch: Dict) -> Dict[str, Any]:
+        """
+        Build the metadata returned with a search hit of chunk `ch`.
+        """
+        return {
+            "user_id": self.user_id,
+            "rag_id": self.corpus.rag_id if self.corpus.rag_id is not None else -1,
+            "filename": ch["filename"],
+            "doc_id": ch.get("doc_id", ""),
+            "chunk_id": ch["chunk_id"],
+            "page": ch.get("page", 0),
+            "type": ch.get("type", "text"),
+        }
+
+    def _reset_store(self) -> None:
+        """
+        Empty this corpus' vectors, BM25 and metadata indexes and chunk store (or its SQL rows, or drop and recreate its Chroma collection).
+        """
+        self.vectors.reset()
+        self.meta.reset()
+        if self.bm25 is not None:
+            self.bm25.reset()
+        if self.corpus.uses_chunk_store:
+            self.store.reset()
+            return
+        if self.corpus.uses_sql:
+            self.chunk_table.clear()
+            return
+        try:
+            self.client.delete_collection(self.corpus.collection_name)
+        except Exception:
+            pass
+        self.collection = self.client.get_or_create_collection(self.corpus.collection_name)
+
+    def _write_chunks(self, chunks: List[Dict], embedding: np.ndarray) -> None:
+        """
+        Store vectors, terms, texts and metadata of chunks that were just given consecutive new labels.
+
+        The vectors are appended to the `VectorStore`, the terms to the
+        `Bm25Index`, the file names, pages and block types to the
+        `MetadataIndex` and the chunk store only receives text and metadata; the
+        SQL table receives one bulk insert, and Chroma the embeddings too, in
+        bounded batches.
+
+        Args:
+            chunks (List[Dict]): Chunks to store, in label order.
+            embedding (np.ndarray): Their normalized embeddings, row-aligned with `chunks`.
+        """
+        self.vectors.append(embedding)
+        self.meta.append(chunks)
+        if self.bm25 is not None:
+            self.bm25.append([ch["text"] for ch in chunks])
+        if self.corpus.uses_chunk_store:
+            self.store.append([{"text": ch["text"], "metadata": self._metadata(ch)} for ch in chunks])
+            return
+        if self.corpus.uses_sql:
+            self.chunk_table.insert(chunks)
+            return
+        for start in range(0, len(chunks), CHROMA_BATCH_SIZE):
+            batch = chunks[start:start + CHROMA_BATCH_SIZE]
+            self.collection.upsert(
+                ids=self._chroma_ids([ch["chunk_id"] for ch in batch]),
+                documents=[ch["text"] for ch in batch],
+                metadatas=[self._metadata(ch) for ch in batch],
+                embeddings=embedding[start:start + CHROMA_BATCH_SIZE].tolist(),
+            )
+
+    def _delete_texts(self, chunk_ids: List[int]) -> None:
+        """
+        Delete chunks from the SQL table or from Chroma (in bounded batches).
+
+        A no-op with the chunk store, whose records of deleted labels are
+        simply never read again (and dropped by the next rebuild).
+
+        Args:
+            chunk_ids (List[int]): Ids of the chunks to delete.
+        """
+        if self.corpus.uses_sql:
+            self.chunk_table.delete(chunk_ids)
+            return
+        if self.collection is None:
+            return
+        ids = self._chroma_ids(chunk_ids)
+        for start in range(0, len(ids), CHROMA_BATCH_SIZE):
+            self.collection.delete(ids=ids[start:start + CHROMA_BATCH_SIZE])
+
+    def _load_index(self) -> Tuple[Optional[hnswlib.Index], Optional[np.ndarray]]:
+        """
+        Load this user's current HNSW index and label table for in-place updates.
+
+        Returns:
+            Tuple[Optional[hnswlib.Index], Optional[np.ndarray]]: The index and a writable
+            copy of its label table, or `(None, None)` if no index exists yet or its
+            vectors, BM25 index, metadata index or chunk store do not cover every label (e.g. the index was
+            built with `vector_store: chroma`), so that callers rebuild it.
+        """
+        if not (self.index_path.exists() and self.labels_path.exists()):
+            return None, None
+        labels = np.array(np.load(self.labels_path), dtype=np.int64)
+        if self.corpus.uses_chunk_store and len(self.store.load()) != len(labels):
+            self.logger.warning(f"Chunk store of {self.corpus.key} does not match its index; rebuilding")
+            return None, None
+        if not self.vectors.load(len(labels)):
+            self.logger.warning(f"Vectors of {self.corpus.key} do not match its index; rebuilding")
+            return None, None
+        if self.bm25 is not None and not self.bm25.load(len(labels)):
+            self.logger.warning(f"BM25 index of {self.corpus.key} does not match its index; rebuilding")
+            return None, None
+        if not self.meta.load(len(labels)):
+            self.logger.warning(f"Metadata index of {self.corpus.key} does not match its index; rebuilding")
+            return None, None
+        index = hnswlib.Index(space="cosine", dim=self.embedder.dim)
+        index.load_index(str(self.index_path), allow_replace_deleted=True)
+        return index, labels
+
+    def _save_index(self, index: hnswlib.Index, labels: np.ndarray, final: bool = True) -> None:
+        """
+        Persist the vectors, the BM25 and metadata indexes, the chunk store, the label table and the index.
+
+        The vectors, the BM25 and metadata indexes, the chunk store and the label table are written first and the index
+        file is then replaced atomically: searchers detect the new index
+        version (inode/mtime) and never observe a partially written file, nor
+        a label without its text.
+
+        Args:
+            index (hnswlib.Index): Index to save.
+            labels (np.ndarray): Label table (position = HNSW label, value = chunk id, -1 = deleted).
+            final (bool): Also rebuild the BM25 postings (False for intermediate
+                streaming saves; see `Bm25Index`).
+        """
+        with self.progress.timed("index"):
+            report = self.vectors.save(self.rescore_k)
+            if self.bm25 is not None:
+                self.bm25.save(labels, postings=final)
+            self.meta.save(labels)
+            if self.corpus.uses_chunk_store:
+                self.store.save()
+            self.files.save_npy(labels, self.labels_path)
+            tmp_index = self.index_path.with_name(self.index_path.name + ".tmp")
+            index.save_index(str(tmp_index))
+            os.replace(tmp_index, self.index_path)
+        self.progress.set_searchable(int(np.count_nonzero(labels >= 0)))
+        if report:
+            self.logger.info(
+                f"{self.vectors.quantization} vectors of {self.corpus.key} ({len(labels)} rows, "
+                f"{report['compression']}x smaller than float32): recall@{report['k']} "
+                f"{report['recall']:.3f}, {report['recall_rescored']} with float32 rescoring "
+                f"of {report['rescore_k']} candidates"
+            )
+
+    def _new_index(self, capacity: int) -> hnswlib.Index:
+        """
+        Create an empty HNSW index that supports in-place updates.
+
+        Args:
+            capacity (int): Initial number of elements (grown with `resize_index` later).
+
+        Returns:
+            hnswlib.Index: Index initialized with `allow_replace_deleted=True`.
+        """
+        index = hnswlib.Index(space="cosine", dim=self.embedder.dim)
+        index.init_index(max_elements=max(capacity, 16), ef_construction=200, M=16,
+                         allow_replace_deleted=True)
+        return index
+
+    def rebuild(self, chunks: List[Dict]) -> None:
         """
-        Generate dense embeddings for user chunks and store them in ChromaDB.
+        Build this user's index from scratch.
 
         Workflow:
-            1. Encode each text chunk using the configured SentenceTransformer model.
+            1. Encode all chunk texts in batches with the configured SentenceTransformer
+               model (optionally across a multi-process CPU pool, see `Embedder`).
             2. Normalize the embeddings for cosine similarity.
-            3. Add the text, embeddings, and metadata into the ChromaDB collection.
+            3. Replace the corpus' chunk store (or SQL rows, or Chroma collection) with the new chunks.
             4. Build an approximate nearest neighbor (ANN) index with HNSWlib for fast search.
-            5. Save both the index and a mapping file for user-specific lookup.
+            5. Save the index, a binary label → chunk id table and the chunk store.
+
+        Args:
+            chunks (List[Dict[str, Any]]): Chunks produced by the Ingestor.
+        """
+        with self.progress.timed("embed"):
+            embedding = self.embedder.encode([ch['text'] for ch in chunks])
+        with self.progress.timed("index"):
+            self._reset_store()
+            self._write_chunks(chunks, embedding)
+
+            index = self._new_index(len(chunks) * 2)
+            if len(chunks):
+                index.add_items(embedding, ids=np.arange(len(chunks)))
+
+        # Label table: position = HNSW label, value = chunk id.
+        labels = np.array([int(ch["chunk_id"]) for ch in chunks], dtype=np.int64)
+        self._save_index(index, labels)
+        self.logger.info(f"Rebuilt index with {len(chunks)} chunks ({self.corpus.vector_store}) for {self.corpus.key}")
+
+    def _apply(self, index: hnswlib.Index, labels: np.ndarray, removed_mask: np.ndarray,
+               added: List[Dict]) -> Tuple[np.ndarray, int, int]:
+        """
+        Delete and insert chunks in an existing index (in memory; see `_save_index`).
+
+          - removed chunks are `mark_deleted` in HNSW, set to -1 in the label
+            table (and deleted from the SQL table or Chroma);
+          - new chunks are embedded, appended with fresh labels (reusing the
+            memory of deleted elements, growing the index with `resize_index`
+            when needed) and appended to the chunk store (or inserted into the SQL
+            table, or upserted into Chroma).
+
+        Args:
+            index (hnswlib.Index): Index loaded with `allow_replace_deleted=True`.
+            labels (np.ndarray): Writable label table of `index`.
+            removed_mask (np.ndarray): Boolean mask over `labels` of the chunks to delete.
+            added (List[Dict]): Chunks to insert (skipped if their id is already live).
+
+        Returns:
+            Tuple[np.ndarray, int, int]: The updated label table, and the number
+            of chunks added and removed.
+        """
+        removed_labels = np.nonzero(removed_mask)[0]
+        if len(removed_labels):
+            with self.progress.timed("index"):
+                removed_ids = labels[removed_labels].tolist()
+                for label in removed_labels:
+                    index.mark_deleted(int(label))
+                labels[removed_labels] = -1
+                self._delete_texts(removed_ids)
+
+        known = set(labels[labels >= 0].tolist())
+        added = [ch for ch in added if int(ch["chunk_id"]) not in known]
+        if added:
+            with self.progress.timed("embed"):
+                embedding = self.embedder.encode([ch["text"] for ch in added])
+            with self.progress.timed("index"):
+                needed = index.get_current_count() + len(added)
+                if needed > index.get_max_elements():
+                    index.resize_index(max(needed, index.get_max_elements() * 2))
+                new_labels = np.arange(len(labels), len(labels) + len(added), dtype=np.int64)
+                index.add_items(embedding, ids=new_labels, replace_deleted=True)
+                labels = np.concatenate([labels, np.array([int(ch["chunk_id"]) for ch in added], dtype=np.int64)])
+                self._write_chunks(added, embedding)
+        return labels, len(added), len(removed_labels)
+
+    def update(self, index: hnswlib.Index, labels: np.ndarray, chunks: List[Dict]) -> None:
+        """
+        Bring an existing index in line with `chunks` without rebuilding it.
+
+        Chunk ids are stable per document, so the difference between the ids
+        in the label table and the ids in `chunks` is exactly the set of
+        added and removed documents (see `_apply`).
+
+        Cost is proportional to the changed documents, not to the whole corpus.
+
+        Args:
+            index (hnswlib.Index): Index loaded with `allow_replace_deleted=True`.
+            labels (np.ndarray): Writable label table of `index`.
+            chunks (List[Dict]): The user's complete current chunk list.
+        """
+        current = {int(ch["chunk_id"]): ch for ch in chunks}
+        removed_mask = (labels >= 0) & ~np.isin(labels, np.fromiter(current.keys(), dtype=np.int64, count=len(current)))
+        labels, n_added, n_removed = self._apply(index, labels, removed_mask, list(current.values()))
+        if n_added or n_removed:
+            self._save_index(index, labels)
+        self.logger.info(
+            f"Incremental index update for {self.corpus.key}: "
+            f"+{n_added} / -{n_removed} chunks ({len(current)} live)"
+        )
+
+    def apply_delta(self, index: hnswlib.Index, labels: np.ndarray, delta: Dict) -> None:
+        """
+        Apply an ingestion delta (`chunks_delta_<user_id>.json`) to an existing index.
+
+        Unlike `update`, this never looks at the complete chunk list: chunks
+        of removed documents are found in the label table through the
+        document fingerprint stored in the high bits of their ids.
+
+        Args:
+            index (hnswlib.Index): Index loaded with `allow_replace_deleted=True`.
+            labels (np.ndarray): Writable label table of `index`.
+            delta (Dict): `{"removed_doc_ids": [...], "added": [chunk, ...]}` from the Ingestor.
+        """
+        nums = np.array([doc_num(d) for d in delta["removed_doc_ids"]], dtype=np.int64)
+        removed_mask = (labels >= 0) & np.isin(labels >> CHUNK_INDEX_BITS, nums)
+        labels, n_added, n_removed = self._apply(index, labels, removed_mask, delta["added"])
+        if n_added or n_removed:
+            self._save_index(index, labels)
+        self.logger.info(
+            f"Applied ingestion delta for {self.corpus.key}: +{n_added} / -{n_removed} chunks"
+        )
+
+    def consume(self, in_q: "queue.Queue") -> None:
+        """
+        Index chunks as they stream in from `Ingestor.stream`.
+
+        Each `("add", chunks)` message (one document) is embedded and inserted
+        right away; the index file is saved at most every
+        `indexing.stream_save_interval_s` seconds (and once at the end), so
+        the first documents become searchable while later ones are still
+        being OCRed. `("remove", doc_ids)` drops the chunks of changed or
+        deleted documents and `("reset", None)` empties the user's index
+        before a full re-ingestion.
+
+        If indexing fails, the queue is still drained until the final `None`
+        so that the producer never blocks on a full queue; the error is then
+        re-raised.
+
+        Args:
+            in_q (queue.Queue): Queue filled by `Ingestor.stream`.
+        """
+        dirty, streamed, last_save = False, False, float("-inf")
+        total_added = total_removed = 0
+        error = None
+        # Without an index (e.g. lost, or predating the per-corpus layout), an
+        # incremental stream only carries the changed documents; the complete
+        # chunk list is indexed once ingestion is over.
+        seed = False
+        try:
+            index, labels = self._load_index()
+            if index is None:
+                self._reset_store()
+                index, labels = self._new_index(1024), np.zeros(0, dtype=np.int64)
+                seed = True
+        except Exception as e:
+            error = e
+
+        while True:
+            msg = in_q.get()
+            if msg is None:
+                break
+            if error is not None:
+                continue
+            try:
+                kind, payload = msg
+                if kind == "reset":
+                    seed = False
+                    with self.progress.timed("index"):
+                        self._reset_store()
+                    index, labels = self._new_index(1024), np.zeros(0, dtype=np.int64)
+                    dirty = True
+                    continue
+                if kind == "remove":
+                    nums = np.array([doc_num(d) for d in payload], dtype=np.int64)
+                    mask = (labels >= 0) & np.isin(labels >> CHUNK_INDEX_BITS, nums)
+                    labels, n_added, n_removed = self._apply(index, labels, mask, [])
+                else:
+                    labels, n_added, n_removed = self._apply(
+                        index, labels, np.zeros(len(labels), dtype=bool), payload
+                    )
+                total_added += n_added
+                total_removed += n_removed
+                dirty = dirty or bool(n_added or n_removed)
+                if dirty and time.monotonic() - last_save >= self.stream_save_interval:
+                    self._save_index(index, labels, final=False)
+                    dirty, streamed, last_save = False, True, time.monotonic()
+                    self.logger.info(
+                        f"Streaming index for {self.corpus.key}: {np.count_nonzero(labels >= 0)} chunks searchable"
+                    )
+            except Exception as e:
+                error = e
+
+        if error is not None:
+            raise error
+        if dirty or streamed:
+            # Final save: also builds the BM25 postings skipped by streaming saves.
+            self._save_index(index, labels)
+        if seed and self.chunks_file.exists():
+            self.update(index, labels, self.load_chunks())
+        elif np.count_nonzero(labels < 0) > np.count_nonzero(labels >= 0):
+            # Compaction; the embedding cache makes this cheap.
+            self.rebuild(self.load_chunks())
+        self.logger.info(
+            f"Streaming indexing finished for {self.corpus.key}: +{total_added} / -{total_removed} chunks"
+        )
+
+    def index_chunks(self, chunks:List[Dict], incremental: Optional[bool] = None)-> None:
+        """
+        Index the user's chunks, incrementally when an index already exists.
 
         Args:
-            chunks (List[Dict[str, Any]]): A list of preprocessed text chunks containing:
+            chunks (List[Dict[str, Any]]): The user's complete current list of chunks containing:
                 - "text" (str): Chunk text content.
                 - "filename" (str): Original source file name.
-                - "chunk_id" (str/int): Unique chunk identifier.
+                - "doc_id" (str): Stable document id.
+                - "chunk_id" (int): Stable, document-scoped chunk identifier.
+            incremental (Optional[bool]): Force (True) or disable (False) incremental
+                updates. Defaults to `indexing.incremental` from the config.
 
         Notes:
-            - For large datasets, consider batching the `add()` calls for performance.
+            - The index is rebuilt from scratch when there is none yet, or when
+              deleted elements outnumber live ones (compaction). Thanks to the
+              embedding cache a rebuild only embeds chunks never seen before.
             - Metadata includes user_id to ensure search results are user-isolated.
         """
+        incremental = self.incremental if incremental is None else incremental
+        index, labels = self._load_index() if incremental else (None, None)
+        if index is not None and np.count_nonzero(labels < 0) <= np.count_nonzero(labels >= 0):
+            self.update(index, labels, chunks)
+        else:
+            self.rebuild(chunks)
 
-        embedding = []
-        ids = []
-        metadatas = []
-        texts = []
-        for ch in chunks:
-            emb = self.embed_model.encode(ch['text']).astype(np.float32)
-            emb = emb / (np.linalg.norm(emb) + 1e-12)
-            uid = str(ch["chunk_id"])
-            ids.append(uid)
-            embedding.append(emb)
-            texts.append(ch['text'])
-            metadatas.append({
-                "user_id": self.user_id,
-                "filename": ch["filename"],
-                "chunk_id": ch["chunk_id"]
-            })
-        self.collection.add(ids=ids, documents=texts, metadatas=metadatas, embeddings=[emb.tolist() for emb in embedding])
-
-        dim = len(embedding[0])
-        index = hnswlib.Index(space="cosine",dim=dim)
-        index.init_index(max_elements=(len(embedding)*2), ef_construction=200, M=16)
-        index.add_items(np.array(embedding), ids= np.arange(len(embedding)))
-
-        index.save_index(f"hnsw_index_{self.user_id}.bin")
-        idx_to_uid = {str(i): str(ch["chunk_id"]) for i, ch in enumerate(chunks)}
-        with open(f"mapping_{self.user_id}.json", "w") as f:
-            json.dump(idx_to_uid, f)    
-        self.logger.info(f"Stored {len(chunks)} chunks in Chroma + HNSW for user {self.user_id}")
     def run(self)-> None:
         """
         Execute the full indexing workflow for the current user.
 
         Steps:
-            1. Load the user-specific chunks JSON file.
-            2. Generate embeddings and index them in ChromaDB.
-            3. Save an HNSWlib index for fast vector search.
+            1. If the Ingestor left a delta file and an index exists, apply the
+               delta only (no need to read the complete chunk list).
+            2. Otherwise load the corpus' chunks JSON file, embed new chunks
+               and add them to the chunk store, drop chunks of removed documents.
+            3. Update (or build) the HNSWlib index for fast vector search.
 
         Side Effects:
-            - Writes embeddings and metadata into the persistent ChromaDB store.
-            - Creates local index and mapping files per user.
+            - Writes the HNSW index, its label table and chunk store per corpus.
             - Logs progress and completion.
         """
         
         self.logger.info('Starting indexing for user {self.user_id} ...')
-        chunks = self.load_chunks()
-        if chunks:
-            self.index_chunks(chunks)
+        index, labels = self._load_index() if self.incremental and self.delta_file.exists() else (None, None)
+        if index is not None and np.count_nonzero(labels < 0) <= np.count_nonzero(labels >= 0):
+            self.apply_delta(index, labels, self.files.load_json(self.delta_file))
+        else:
+            chunks = self.load_chunks()
+            if chunks or self.index_path.exists():
+                self.index_chunks(chunks)
+        if self.delta_file.exists():
+            self.delta_file.unlink()
         self.logger.info("Indexing finished for user {self.user_id}")
\ No newline at end of file
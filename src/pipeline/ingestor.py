@@ -1,10 +1,16 @@
 
 
+from itertools import groupby
 from pathlib import Path
-from typing import List, Dict
-import multiprocessing as mp
+from typing import Iterator, List, Dict, Optional, Tuple
+import queue
+import time
 
 from src.core.utils import FileManager
+from src.core.corpus import Corpus
+from src.core.ids import document_id, chunk_id
+from src.core.manifest import IngestionManifest
+from src.core.progress import JobProgress
 from src.modules.layout_extractor import LayoutExtractor
 from src.modules.document_loader import DocumentLoader
 from src.core.block_processor import BlockProcessor
@@ -13,40 +19,6 @@ from src.modules.entity_extractor import EntityExtractor
 
 
 
-def process_document_task(doc, user_id, server_req_q, server_resp_q)-> List[Dict]:
-    """
-    Worker task to process a single document in a separate process.
-
-    Each worker:
-      - Initializes a LayoutExtractor
-      - Extracts layout blocks (using OCR + model inference)
-      - Annotates each block with `filename` and `user_id`
-
-    Args:
-        doc (Path): Path to the document file to process.
-        user_id (str): Unique user identifier for multi-user isolation.
-        server_req_q: Request queue for sending page images to the model server.
-        server_resp_q: Response queue for receiving layout results.
-
-    Returns:
-        List[Dict]: Extracted and annotated text blocks from the document.
-    """
-    file_manager = FileManager(None)  
-    layout = LayoutExtractor(
-        file_manager,
-        Path("config/config.yaml"),
-        server_req_q=server_req_q,
-         server_resp_q=server_resp_q,
-
-        ocr_lang="eng"
-    )
-    b = layout.extract(doc)
-    for blk in b:
-        blk["filename"] = doc.name
-        blk["user_id"] = user_id
-    return b
-
-
 class Ingestor:
     """
     Ingestor — Orchestrates the ingestion and preprocessing of user documents
@@ -74,9 +46,8 @@ class Ingestor:
         logger,
         user_id: str,
         mode: str = "layout",
-        server_req_q=None,
-        server_resp_q=None,
-
+        progress: Optional[JobProgress] = None,
+        rag_id: Optional[int] = None,
     )-> None:
         """
         Initialize the Ingestor with its processing modules and configuration.
@@ -94,8 +65,11 @@ class Ingestor:
             logger (Logger): Logger instance for monitoring progress.
             user_id (str): Unique identifier for the current user.
             mode (str, optional): Ingestion mode — "layout" or "text". Defaults to "layout".
-            server_req_q (optional): Multiprocessing request queue for model inference.
-            server_resp_q (optional): Multiprocessing response queue for model inference.
+            progress (Optional[JobProgress]): Receives document counts and chunking time
+                (usually the same object as the LayoutExtractor's).
+            rag_id (Optional[int]): Ingest only this RAG workspace's documents
+                (`<data_dir>/<user_id>/rag_<rag_id>`), into its own chunk files.
+                Defaults to the user's whole data directory.
         """
 
         self.logger = logger
@@ -107,12 +81,14 @@ class Ingestor:
         self.chunker = chunk_builder
         self.user_id = user_id
         self.mode = mode
-        self.server_req_q = server_req_q
-        self.server_resp_q = server_resp_q
+        self.progress = progress or JobProgress()
 
-        storage_cfg  = config["paths"]
-        self.data_dir = Path(storage_cfg["data_dir"]) / user_id
-        self.chunks_file = Path(storage_cfg["chunks_file"]).with_name(f"chunks_{user_id}.json")
+        self.corpus = Corpus(config, user_id, rag_id)
+        self.data_dir = self.corpus.data_dir
+        self.chunks_file = self.corpus.chunks_file
+        self.delta_file = self.corpus.delta_file
+        self.manifest_file = self.corpus.manifest_file
+        self.incremental = bool(config.get("ingestion", {}).get("incremental", True))
 
 
     def load_documents(self) -> List[Path]:
@@ -127,50 +103,77 @@ class Ingestor:
             Logs a warning if the user's data directory does not exist.
         """
         if not self.data_dir.exists():
-            self.logger.warning(f"No data folder for user {self.user_id}")
+            self.logger.warning(f"No data folder for {self.corpus.key} (user {self.user_id})")
             return []
         return [fp for fp in self.data_dir.rglob("*") if fp.is_file()]
 
-    def process_blocks(self, docs: List[Path]) -> List[Dict]:
+    def iter_document_blocks(self, docs: List[Path], doc_ids: Optional[Dict[Path, str]] = None
+                             ) -> Iterator[Tuple[Path, List[Dict]]]:
         """
-        Extract layout or text blocks from user documents.
+        Extract the blocks of each document, yielding documents as they complete.
 
         Depending on the selected mode:
-          - "layout" mode uses LayoutExtractor with OCR via multiprocessing.
+          - "layout" mode uses LayoutExtractor, which splits all documents into
+            page tasks and spreads them over one pool (`layout.page_workers`).
           - "text" mode uses a simple DocumentLoader for plain text extraction.
 
-        After extraction:
-          - Page headers and footers are removed for cleaner content.
+        Every block is annotated with `filename`, `doc_id` and `user_id`.
 
         Args:
             docs (List[Path]): List of document file paths to process.
+            doc_ids (Optional[Dict[Path, str]]): Precomputed document ids (see
+                `IngestionManifest`); computed on the fly when missing.
 
-        Returns:
-            List[Dict]: Cleaned and flattened list of text blocks across all documents.
+        Yields:
+            Tuple[Path, List[Dict]]: Each document (in `docs` order) and its blocks.
         """
-        blocks = []
-
+        doc_ids = doc_ids or {}
         if self.mode == "layout":
-
-            tasks = [(doc, self.user_id, self.server_req_q, self.server_resp_q) for doc in docs]
-
-
-            with mp.get_context("spawn").Pool(processes=9) as doc_pool:
-                results = doc_pool.starmap(process_document_task, tasks)
-
-
-            for b in results:
-                blocks.extend(b)
+            start = time.perf_counter()
+            for doc, doc_blocks in self.layout.iter_extract(docs):
+                doc_id = doc_ids.get(doc) or document_id(doc, self.data_dir)
+                for blk in doc_blocks:
+                    blk["filename"] = doc.name
+                    blk["doc_id"] = doc_id
+                    blk["user_id"] = self.user_id
+                self.progress.doc_done()
+                yield doc, doc_blocks
+            self.logger.info(
+                f"Extracted {len(docs)} documents in {time.perf_counter() - start:.1f}s "
+                f"({self.layout.page_workers} page workers)"
+            )
         else:
             for doc in docs:
-                text = self.loader.load(doc)
-                blocks.append({
+                with self.progress.timed("text"):
+                    text = self.loader.load(doc)
+                self.progress.doc_done()
+                yield doc, [{
                     "filename": doc.name,
+                    "doc_id": doc_ids.get(doc) or document_id(doc, self.data_dir),
                     "text": text,
                     "type": "text",
                     "page": 0,
                     "user_id": self.user_id
-                })
+                }]
+
+    def process_blocks(self, docs: List[Path], doc_ids: Optional[Dict[Path, str]] = None) -> List[Dict]:
+        """
+        Extract layout or text blocks from user documents.
+
+        Blocks come from `iter_document_blocks`; after extraction, page
+        headers and footers are removed for cleaner content.
+
+        Args:
+            docs (List[Path]): List of document file paths to process.
+            doc_ids (Optional[Dict[Path, str]]): Precomputed document ids (see
+                `IngestionManifest`); computed on the fly when missing.
+
+        Returns:
+            List[Dict]: Cleaned and flattened list of text blocks across all documents.
+        """
+        blocks = []
+        for _, doc_blocks in self.iter_document_blocks(docs, doc_ids):
+            blocks.extend(doc_blocks)
 
         blocks = self.proc.remove_page_headers_footers(blocks)
         return blocks
@@ -179,53 +182,207 @@ class Ingestor:
         """
         Convert text blocks into final semantic chunks for vector indexing.
 
-        Steps:
+        Blocks are processed document by document (they arrive grouped by
+        `doc_id`), so merging never glues text from two different files.
+
+        Steps (per document):
           1. Remove near-duplicate blocks.
           2. Merge small blocks for coherence.
           3. Split cleaned text into overlapping chunks.
 
+        Each chunk gets a stable, document-scoped `chunk_id` derived from its
+        `doc_id` and its position in the document, so re-ingesting an
+        unchanged file reproduces the same ids and the Indexer can update
+        its index incrementally.
+
         Args:
             blocks (List[Dict]): Processed layout or text blocks.
 
         Returns:
             List[Dict]: Final list of chunk dictionaries ready for indexing.
         """
-        blocks = self.chunker.remove_near_duplicates(blocks, windows=10)
-        blocks = self.chunker.merge_small_blocks(blocks, min_words=20)
-
         chunks = []
-        cid = 0
-        for b in blocks:
-            for part in self.chunker.split_text(b["text"]):
-                chunks.append({
-                    "filename": b["filename"],
-                    "chunk_id": cid,
-                    "text": part,
-                    "type": b.get("type", "text"),
-                    "page": b.get("page", 0),
-                    "user_id": self.user_id,
-                })
-                cid += 1
+        for doc_id, group in groupby(blocks, key=lambda b: b["doc_id"]):
+            doc_blocks = self.chunker.remove_near_duplicates(list(group), windows=10)
+            doc_blocks = self.chunker.merge_small_blocks(doc_blocks, min_words=20)
+
+            idx = 0
+            for b in doc_blocks:
+                for part in self.chunker.split_text(b["text"]):
+                    chunks.append({
+                        "filename": b["filename"],
+                        "doc_id": doc_id,
+                        "chunk_id": chunk_id(doc_id, idx),
+                        "chunk_index": idx,
+                        "text": part,
+                        "type": b.get("type", "text"),
+                        "page": b.get("page", 0),
+                        "user_id": self.user_id,
+                    })
+                    idx += 1
+        return chunks
+
+    def _save_delta(self, removed_doc_ids: List[str], added: List[Dict]) -> None:
+        """
+        Write (or extend) the pending change set for the Indexer.
+
+        If the Indexer has not consumed the previous delta yet, both are
+        merged: removals accumulate, and chunks added earlier but belonging
+        to a now-removed document are dropped.
+
+        Args:
+            removed_doc_ids (List[str]): Documents whose chunks must leave the index.
+            added (List[Dict]): New chunks to embed and insert.
+        """
+        removed = set(removed_doc_ids)
+        if self.delta_file.exists():
+            previous = self.files.load_json(self.delta_file)
+            removed |= set(previous["removed_doc_ids"])
+            added = [ch for ch in previous["added"] if ch["doc_id"] not in removed] + added
+        self.files.save_json({"removed_doc_ids": sorted(removed), "added": added}, self.delta_file)
+
+    def _plan(self) -> Dict:
+        """
+        Decide what this run must (re)process by diffing the data dir against the manifest.
+
+        Returns:
+            Dict: Run plan with keys `docs`, `manifest`, `full`, `doc_ids`
+                  (documents to process → doc id), `pending` (their manifest
+                  entries), `changed` (documents to process, in order) and
+                  `removed` (doc ids whose existing chunks must be dropped).
+        """
+        docs = self.load_documents()
+        manifest = IngestionManifest(self.manifest_file, self.files)
+
+        full = not (self.incremental and self.manifest_file.exists() and self.chunks_file.exists())
+        if full:
+            doc_ids, pending = manifest.entries_for(docs, self.data_dir)
+            removed = set()
+        else:
+            doc_ids, obsolete, pending = manifest.diff(docs, self.data_dir)
+            # Also drop chunks of the re-processed documents themselves, in case
+            # an interrupted run already saved them without updating the manifest.
+            removed = set(obsolete) | set(doc_ids.values())
+        return {
+            "docs": docs,
+            "manifest": manifest,
+            "full": full,
+            "doc_ids": doc_ids,
+            "pending": pending,
+            "changed": [doc for doc in docs if doc in doc_ids],
+            "removed": removed,
+        }
+
+    def _finish(self, plan: Dict, new_chunks: List[Dict]) -> List[Dict]:
+        """
+        Persist the complete chunk list and the updated manifest.
+
+        Args:
+            plan (Dict): Plan returned by `_plan()`.
+            new_chunks (List[Dict]): Chunks of the documents processed in this run.
+
+        Returns:
+            List[Dict]: The user's complete chunk list.
+        """
+        num_chunks: Dict[str, int] = {}
+        for ch in new_chunks:
+            num_chunks[ch["doc_id"]] = num_chunks.get(ch["doc_id"], 0) + 1
+        plan["manifest"].record(plan["pending"], num_chunks)
+
+        if plan["full"]:
+            chunks = new_chunks
+        else:
+            kept = [ch for ch in self.files.load_json(self.chunks_file) if ch["doc_id"] not in plan["removed"]]
+            chunks = kept + new_chunks
+
+        self.files.save_json(chunks, self.chunks_file)
+        plan["manifest"].save()
+        self.logger.info(
+            f"Saved {len(chunks)} chunks for {self.corpus.key} "
+            f"({len(plan['changed'])}/{len(plan['docs'])} documents processed, "
+            f"{len(plan['removed'])} removed or replaced, {'full' if plan['full'] else 'incremental'} run)"
+        )
         return chunks
 
     def run(self)-> None:
         """
-        Execute the full ingestion workflow for a specific user.
+        Execute the ingestion workflow for a specific user.
+
+        Incremental runs (`ingestion.incremental`, the default) compare the
+        data directory with the ingestion manifest and only extract and chunk
+        added or modified files; chunks of modified and deleted files are
+        dropped. A full run happens when there is no manifest or chunks file yet.
 
         Workflow:
-            1. Load all available documents.
-            2. Extract and clean text blocks.
-            3. Build final chunks from processed blocks.
-            4. Save all chunks as a JSON file for downstream indexing.
+            1. Load all available documents and diff them against the manifest.
+            2. Extract and clean text blocks of the new/changed documents.
+            3. Build their chunks and merge them with the kept ones.
+            4. Save the complete chunks JSON, the manifest, and a delta file
+               (`chunks_delta_<key>.json`: removed doc ids + added chunks)
+               that the Indexer applies without re-reading the whole corpus.
 
         Side Effects:
-            - Writes the resulting chunks JSON to storage.
+            - Writes the chunks, manifest and delta JSON files to storage.
             - Logs progress, document counts, and completion status.
         """
-        self.logger.info(f"Starting ingestion for user {self.user_id} ({self.mode} mode)...")
-        docs = self.load_documents()
-        blocks = self.process_blocks(docs)
-        chunks = self.build_chunks(blocks)
-        self.files.save_json(chunks, self.chunks_file)
-        self.logger.info(f"Saved {len(chunks)} chunks for {self.user_id}")
+        self.logger.info(f"Starting ingestion of {self.corpus.key} for user {self.user_id} ({self.mode} mode)...")
+        plan = self._plan()
+        self.progress.set_docs(len(plan["changed"]))
+        blocks = self.process_blocks(plan["changed"], plan["doc_ids"]) if plan["changed"] else []
+        with self.progress.timed("chunk"):
+            new_chunks = self.build_chunks(blocks)
+
+        if plan["full"]:
+            if self.delta_file.exists():
+                # The Indexer diffs the full chunk list against its index instead.
+                self.delta_file.unlink()
+        elif plan["removed"]:
+            self._save_delta(sorted(plan["removed"]), new_chunks)
+        self._finish(plan, new_chunks)
+
+    def stream(self, out_q: "queue.Queue") -> None:
+        """
+        Ingest like `run()`, but hand each document's chunks to a consumer as soon as it is chunked.
 
+        Messages put on `out_q` (consumed by `Indexer.consume`):
+            - `("reset", None)` first on a full run: the index must be emptied;
+            - `("remove", [doc_id, ...])` first on an incremental run;
+            - `("add", [chunk, ...])` once per processed document;
+            - `None` when ingestion is over (also sent if it fails).
+
+        `out_q` should be bounded: when the indexer falls behind, extraction
+        pauses instead of piling up chunks in memory.
+
+        Args:
+            out_q (queue.Queue): Bounded queue feeding the indexer.
+        """
+        self.logger.info(f"Starting streaming ingestion of {self.corpus.key} for user {self.user_id} ({self.mode} mode)...")
+        try:
+            plan = self._plan()
+            self.progress.set_docs(len(plan["changed"]))
+            removed, pending_added = set(plan["removed"]), []
+            if not plan["full"] and self.delta_file.exists():
+                # Changes of an earlier batch run the indexer never applied.
+                previous = self.files.load_json(self.delta_file)
+                removed |= set(previous["removed_doc_ids"])
+                pending_added = [ch for ch in previous["added"] if ch["doc_id"] not in removed]
+            if plan["full"]:
+                out_q.put(("reset", None))
+            elif removed:
+                out_q.put(("remove", sorted(removed)))
+            if pending_added:
+                out_q.put(("add", pending_added))
+            if self.delta_file.exists():
+                self.delta_file.unlink()
+
+            new_chunks = []
+            for _, doc_blocks in self.iter_document_blocks(plan["changed"], plan["doc_ids"]):
+                with self.progress.timed("chunk"):
+                    doc_blocks = self.proc.remove_page_headers_footers(doc_blocks)
+                    doc_chunks = self.build_chunks(doc_blocks)
+                if doc_chunks:
+                    out_q.put(("add", doc_chunks))
+                    new_chunks.extend(doc_chunks)
+            self._finish(plan, new_chunks)
+        finally:
+            out_q.put(None)
@@ -1,76 +1,349 @@
 
-import json
 from pathlib import Path
-from typing import Any, List, Dict
-from sentence_transformers import SentenceTransformer
-from chromadb import PersistentClient
+from typing import Any, List, Dict, Optional, Tuple
 from src.core.utils import FileManager
-import hnswlib
+from src.core.corpus import Corpus
+from src.modules.model_registry import ModelRegistry, get_registry
+from src.modules.chunk_store import ChunkStore
 import numpy as np
 
+# Retrieval modes of `Searcher.search`.
+SEARCH_MODES = ("dense", "lexical", "hybrid")
+
 
 class Searcher:
     """
     Searcher — Semantic Retrieval Component for a Multi-User RAG Pipeline.
 
-    This class performs semantic similarity search over document chunks stored
-    in ChromaDB and indexed with HNSWlib. Each user’s data is isolated through
-    user-specific index and metadata filtering.
+    This class performs semantic similarity search over document chunks indexed
+    with HNSWlib. A query is one ANN call plus `k` reads of the corpus'
+    label-addressed `ChunkStore` (or one Chroma lookup with
+    `indexing.vector_store: chroma`, or one primary-key query of the
+    `chunks` table with `vector_store: sql`). The search path is picked per corpus
+    from its size (see `IndexCache.get`) and reported with every query:
+
+      - "exact": corpora of at most `retrieval.exact_max_chunks` labels are
+        searched by one matrix-vector product over the memory-mapped,
+        normalized float32 `VectorStore` — faster than HNSW at that size, and
+        without approximation;
+      - "quantized": with `indexing.quantization`, corpora of at most
+        `retrieval.quantized_max_chunks` labels are served by a scan of the
+        float16/int8 codes followed by an exact float32 rescoring of the best
+        `retrieval.rescore_k` candidates (the scan is linear in the corpus
+        size, so larger corpora keep HNSW);
+      - "hnsw": approximate nearest-neighbor search otherwise.
+
+    Lexical ("bm25") search scores the corpus' BM25 postings (with
+    `vector_store: sql`, "fts5": the database's FTS5 index), and hybrid
+    search fuses the dense and lexical rankings with Reciprocal Rank Fusion,
+    which helps with acronyms, formula names and course codes that the
+    embedding model represents poorly.
+
+    Metadata filters (file names, page range, block types) select labels
+    from the corpus' `MetadataIndex` posting lists *before* scoring, so a
+    filtered query still returns `top_k` hits. Selective filters (at most
+    `retrieval.filter_exact_max` matching chunks) are searched exactly over
+    the float32 rows of the matching labels only; broader ones go through
+    the regular path with the filter applied inside the scan, or as
+    hnswlib's filter callback during the graph search. Either way the cost
+    follows the smaller of the subset and the index. Each corpus (a RAG workspace, see
+    `Corpus`) has its own index, so a query only scans the chunks of the RAG
+    it targets.
 
     Responsibilities:
         1. Encode natural-language queries into dense embeddings.
         2. Retrieve the most semantically similar chunks using an ANN index.
-        3. Return results restricted to the current user's data.
+        3. Return results restricted to the targeted corpus.
     """
 
-    def __init__(self, config:dict, file_manager:FileManager, logger, user_id:str)-> None:
+    def __init__(self, config:dict, file_manager:FileManager, logger, user_id:str,
+                 registry: Optional[ModelRegistry] = None,
+                 rag_id: Optional[int] = None,
+                 chunk_table=None)-> None:
         """
         Initialize the Searcher instance for a given user.
 
-        This method sets up the embedding model, ChromaDB connection, and
-        the HNSWlib index dedicated to this user's data.
+        This method sets up the embedding model and the HNSWlib index and
+        chunk store dedicated to this corpus. The embedding model is taken
+        from the process-wide ModelRegistry, and the index with its memory-mapped
+        label table and chunk store from its LRU IndexCache, so creating a
+        Searcher per request does not reload them.
 
         Args:
             config (dict): Configuration dictionary (typically from config.yaml).
                 Must include:
-                    - paths.vector_db: Directory for the ChromaDB store.
+                    - paths.vector_db: Directory of the per-corpus indexes.
                     - models.embedding_model: SentenceTransformer model name.
+                Optional:
+                    - retrieval.index_cache_mb: Memory budget of resident indexes (default: 1024).
+                    - indexing.vector_store: "hnsw" (default), "chroma" or "sql".
+                    - indexing.quantization: "none" (default), "float16" or "int8".
+                    - retrieval.rescore_k: Quantized candidates rescored in float32
+                      (default: 100, 0 disables rescoring).
+                    - retrieval.exact_max_chunks: Largest corpus searched exactly
+                      (default: 10000, 0 always uses the index).
+                    - retrieval.quantized_max_chunks: Largest corpus served from the
+                      quantized codes (default: 50000, 0 for no limit).
+                    - retrieval.search_mode: Default mode, "dense" (default),
+                      "lexical" or "hybrid".
+                    - retrieval.hybrid_candidates: Hits taken from each ranking
+                      before fusion (default: 50).
+                    - retrieval.rrf_k: RRF rank constant (default: 60).
+                    - retrieval.filter_exact_max: Largest filtered subset searched
+                      exactly (default: 10000).
             file_manager (FileManager): Utility for file and configuration management.
             logger (Logger): Logger instance (e.g., Loguru) for progress tracking.
-            user_id (str): Unique identifier of the user, ensuring data isolation.
+            user_id (str): Owner of the corpus (the RAG creator for a RAG workspace).
+            registry (Optional[ModelRegistry]): Shared model registry. Defaults to
+                the process-wide registry.
+            rag_id (Optional[int]): RAG workspace to search. Every member of a shared
+                RAG resolves to the same index file, hence the same cached index.
+                Defaults to the user's whole corpus.
+            chunk_table (Optional[ChunkTable]): The RAG's rows of the `chunks` table,
+                required with `indexing.vector_store: sql`.
+
+        Raises:
+            ValueError: If `indexing.vector_store` is "sql" and no `chunk_table` is given.
         """
         self.logger = logger
         self.files= file_manager
         self.user_id = user_id
+        self.registry = registry or get_registry(logger)
 
-        paths = config['paths']
-        self.vector_db_dir = Path(paths["vector_db"])
-        self.embed_model = SentenceTransformer(config['models']["embedding_model"])
-        self.client=PersistentClient(path=str(self.vector_db_dir))
-        self.collection=self.client.get_or_create_collection("documents")
+        self.corpus = Corpus(config, user_id, rag_id)
+        self.chunk_table = chunk_table
+        if self.corpus.uses_sql and chunk_table is None:
+            raise ValueError("indexing.vector_store: sql requires a chunk_table")
+        self.vector_db_dir = Path(config['paths']["vector_db"])
+        self.embed_model = self.registry.get_embedding_model(config['models']["embedding_model"])
+        self.collection = None
+        if self.corpus.uses_chroma:
+            client = self.registry.get_chroma_client(self.vector_db_dir)
+            self.collection = client.get_or_create_collection(self.corpus.collection_name)
+        self.index_path = self.corpus.index_path
+        self.labels_path = self.corpus.labels_path
         dim = self.embed_model.get_sentence_embedding_dimension()
-        self.index = hnswlib.Index(space="cosine", dim=dim)
-        self.index.load_index(f"hnsw_index_{self.user_id}.bin")
+        cache_mb = config.get("retrieval", {}).get("index_cache_mb", 1024)
+        self.index_cache = self.registry.get_index_cache(int(cache_mb) * 1024 * 1024)
+        self.quantization = str(config.get("indexing", {}).get("quantization", "none")).lower()
+        self.rescore_k = int(config.get("retrieval", {}).get("rescore_k", 100))
+        self.exact_max = int(config.get("retrieval", {}).get("exact_max_chunks", 10000))
+        self.quantized_max = int(config.get("retrieval", {}).get("quantized_max_chunks", 50000))
+        self.search_mode = str(config.get("retrieval", {}).get("search_mode", "dense")).lower()
+        self.hybrid_candidates = int(config.get("retrieval", {}).get("hybrid_candidates", 50))
+        self.rrf_k = int(config.get("retrieval", {}).get("rrf_k", 60))
+        self.filter_exact_max = int(config.get("retrieval", {}).get("filter_exact_max", 10000))
+        # Fixed HNSW search breadth of the shared index, covering the usual candidate counts.
+        self.hnsw_ef = max(self.hybrid_candidates, int(config.get("retrieval", {}).get("top_k", 20))) * 10
+        self.index, self.labels, self.store, self.vectors, self.bm25 = None, None, None, None, None
+        self.meta, self.rows = None, None
+        self.live_count = 0
+        # Dense path of this corpus (see class docstring) and path of the last query.
+        self.path = "empty"
+        self.last_path = "empty"
+        self._label_order: Optional[np.ndarray] = None
+        store_dir = self.corpus.index_dir if self.corpus.uses_chunk_store else None
+        # An index built before the chunk store existed is only usable once re-indexed.
+        has_store = store_dir is None or (store_dir / ChunkStore.OFFSETS_FILE).exists()
+        if self.index_path.exists() and self.labels_path.exists() and has_store:
+            cached = self.index_cache.get(self.index_path, dim, labels_path=self.labels_path,
+                                          store_dir=store_dir, quantization=self.quantization,
+                                          exact_max=self.exact_max,
+                                          bm25_dir=None if self.corpus.uses_sql else self.corpus.index_dir,
+                                          meta_dir=self.corpus.index_dir, ef=self.hnsw_ef,
+                                          quantized_max=self.quantized_max)
+            self.index = cached.index
+            self.labels = cached.labels
+            self.store = cached.store
+            self.vectors = cached.vectors
+            self.bm25 = cached.bm25
+            self.meta = cached.meta
+            self.rows = cached.rows
+            self.path = cached.mode
+            self.live_count = cached.live_count
+        else:
+            # Nothing indexed yet (first ingestion still running): searches return no hits.
+            self.logger.info(f"No index yet for {self.corpus.key}")
 
+        if self.corpus.uses_sql:
+            self.lexical_path = "fts5" if chunk_table.fts else None
+        else:
+            self.lexical_path = "bm25" if self.bm25 is not None else None
         self.logger.info("Searcher initialized for user {user_id}")
+
+    @property
+    def can_filter(self) -> bool:
+        """
+        False if the corpus was indexed before metadata filtering existed (it must be re-indexed).
+        """
+        return self.meta is not None or self.live_count == 0
     
 
-    def search (self, query:str, top_k:int=20)-> List[Dict[str, Any]]:
+    def _subset_exact(self, subset: Optional[np.ndarray]) -> bool:
+        """
+        True if a filtered dense search is answered exactly over the rows of `subset` alone.
+        """
+        return subset is not None and len(subset) <= self.filter_exact_max and self.rows is not None
+
+    def _dense(self, query: str, k: int, subset: Optional[np.ndarray] = None,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the `k` nearest labels of the query embedding and their cosine distances.
+
+        Args:
+            query (str): Natural-language query.
+            k (int): Number of results.
+            subset (Optional[np.ndarray]): Sorted labels matching the metadata filter.
+            allowed (Optional[np.ndarray]): The same labels as a boolean mask.
+        """
+        query_emb = self.embed_model.encode(query).astype(np.float32)
+        query_emb = query_emb / (np.linalg.norm(query_emb) + 1e-12)
+        if self._subset_exact(subset):
+            hits, sims = self.rows.search_subset(query_emb, k, subset)
+            return hits, 1.0 - sims
+        if self.vectors is not None:
+            # Exact and quantized paths; rescoring only applies to quantized codes.
+            live = allowed if allowed is not None else self.labels >= 0
+            hits, sims = self.vectors.search(query_emb, k, self.rescore_k, live=live)
+            # Same convention as hnswlib's cosine space: lower is closer.
+            return hits, 1.0 - sims
+        # ef is set once by the IndexCache: the index is shared by concurrent queries.
+        if allowed is not None:
+            hits, distances = self.index.knn_query(query_emb, k=k, filter=lambda label: bool(allowed[label]))
+        else:
+            hits, distances = self.index.knn_query(query_emb, k=k)
+        return hits[0], distances[0]
+
+    def _lexical(self, query: str, k: int, filters: Optional[Dict[str, Any]] = None,
+                 allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the `k` best labels by BM25 score (none before the first postings are built).
+
+        With `vector_store: sql` the FTS5 index ranks chunk ids, which are
+        mapped back to labels; chunks that are not in the loaded index yet
+        (inserted by a running indexing job) are left out, and the query is
+        repeated with a doubled limit until `k` indexed hits are found or the
+        matches are exhausted.
+
+        Args:
+            query (str): Natural-language query.
+            k (int): Number of results.
+            filters (Optional[Dict[str, Any]]): Metadata filter, applied in SQL with FTS5.
+            allowed (Optional[np.ndarray]): Boolean mask of the labels matching it.
+        """
+        live = allowed if allowed is not None else self.labels >= 0
+        if self.corpus.uses_sql:
+            limit = k
+            while True:
+                ids, scores = self.chunk_table.search(query, limit, filters)
+                labels = self._labels_of(np.asarray(ids, dtype=np.int64))
+                found = labels >= 0
+                found[found] = live[labels[found]]
+                if np.count_nonzero(found) >= k or len(ids) < limit:
+                    break
+                limit *= 2
+            return labels[found][:k], np.asarray(scores, dtype=np.float32)[found][:k]
+        if self.bm25 is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return self.bm25.search(query, k, live=live)
+
+    def _labels_of(self, chunk_ids: np.ndarray) -> np.ndarray:
+        """
+        Map chunk ids to their live labels (-1 if not indexed) by binary search over the label table.
+        """
+        if self._label_order is None:
+            self._label_order = np.argsort(self.labels, kind="stable")
+        sorted_ids = self.labels[self._label_order]
+        pos = np.searchsorted(sorted_ids, chunk_ids)
+        pos = np.minimum(pos, len(sorted_ids) - 1)
+        hit = (sorted_ids[pos] == chunk_ids) & (chunk_ids >= 0)
+        return np.where(hit, self._label_order[pos], -1).astype(np.int64)
+
+    def _fuse(self, rankings: List[np.ndarray], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fuse rankings with Reciprocal Rank Fusion: `score = Σ 1 / (rrf_k + rank)`.
+
+        Args:
+            rankings (List[np.ndarray]): Labels of each ranking, best first.
+            k (int): Number of fused results.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Labels and RRF scores, best first.
         """
-        Perform a semantic similarity search for a given user query.
+        fused: Dict[int, float] = {}
+        for ranking in rankings:
+            for rank, label in enumerate(ranking.tolist(), start=1):
+                fused[label] = fused.get(label, 0.0) + 1.0 / (self.rrf_k + rank)
+        best = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:k]
+        return (np.array([l for l, _ in best], dtype=np.int64),
+                np.array([s for _, s in best], dtype=np.float32))
+
+    def _hydrate(self, hits: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Read the texts and metadata of labelled hits (chunk store by label, SQL table or Chroma by chunk id).
+        """
+        ids = self.labels[hits] if len(hits) else np.zeros(0, dtype=np.int64)
+        if self.corpus.uses_chunk_store:
+            rows = [(r["text"], r["metadata"]) if r else None for r in self.store.get(hits)]
+        elif self.corpus.uses_sql:
+            rows = [(r["text"], r["metadata"]) if r else None for r in self.chunk_table.get(ids.tolist())]
+        else:
+            results = self.collection.get(ids=[str(i) for i in ids])
+            by_id = {
+                results["ids"][i]: (results["documents"][i], results["metadatas"][i])
+                for i in range(len(results["ids"]))
+            }
+            rows = [by_id.get(str(cid)) for cid in ids.tolist()]
+        matched = []
+        for cid, score, row in zip(ids.tolist(), scores.tolist(), rows):
+            if row is None:
+                continue
+            matched.append({
+                "id": cid,
+                "text": row[0],
+                "score": score,
+                "metadata": row[1]
+            })
+        return matched
+
+    def search (self, query:str, top_k:int=20, mode: Optional[str] = None,
+                filters: Optional[Dict[str, Any]] = None)-> List[Dict[str, Any]]:
+        """
+        Perform a dense, lexical or hybrid search for a given user query.
 
         Workflow:
-            1. Encode the natural-language query into a normalized vector.
-            2. Use the HNSWlib index to perform approximate nearest-neighbor search.
-            3. Retrieve the corresponding documents and metadata from ChromaDB.
-            4. Return results restricted to the current user's data.
+            1. Dense: encode the natural-language query into a normalized vector and
+               score the float32 vectors exactly (small corpora), or use the HNSWlib
+               index to perform approximate nearest-neighbor search (or scan the
+               quantized vectors and rescore the top candidates in float32).
+            2. Lexical: score the query terms against the corpus' BM25 postings
+               (or match them with the database's FTS5 index).
+            3. Hybrid: fuse the best `retrieval.hybrid_candidates` hits of both
+               rankings with Reciprocal Rank Fusion.
+            With `filters`, every step only scores the labels selected from the
+            metadata index (see class docstring).
+            4. Translate labels to chunk ids by fancy-indexing the memory-mapped
+               label table, and read the texts and metadata of the hits from the
+               chunk store by label (or fetch them from the `chunks` table or
+               Chroma by chunk id).
+
+        The path that answered the query ("exact", "quantized", "hnsw",
+        "bm25", "fts5", "<dense path>+bm25", "<dense path>+fts5" or "empty")
+        is kept in `last_path`.
 
         Args:
             query (str): The natural-language question or information need.
             top_k (int): Number of top matches to return. Defaults to 20.
+            mode (Optional[str]): "dense", "lexical" or "hybrid". Defaults to
+                `retrieval.search_mode`.
+            filters (Optional[Dict[str, Any]]): Metadata filter; keys (all optional)
+                `filenames` (List[str]), `types` (List[str]), `page_min` and
+                `page_max` (int, inclusive). Conditions are combined with AND.
 
         Returns:
-            List[Dict[str, Any]]: List of result dictionaries sorted by similarity, e.g.:
+            List[Dict[str, Any]]: List of result dictionaries, best first. `score` is
+            the cosine distance (dense, lower is closer), the BM25 score (lexical)
+            or the RRF score (hybrid), e.g.:
                 [
                     {
                         "id": str,
@@ -79,35 +352,56 @@ class Searcher:
                         "metadata": {
                             "user_id": str,
                             "filename": str,
-                            "chunk_id": int
+                            "doc_id": str,
+                            "chunk_id": int,
+                            "page": int,
+                            "type": str
                         }
                     },
                     ...
                 ]
-        """
-  
-        query_emb = self.embed_model.encode(query).astype(np.float32)
-        query_emb = query_emb / (np.linalg.norm(query_emb) + 1e-12)
-        with open(f"mapping_{self.user_id}.json") as f:
-            idx_to_uid = json.load(f)
-
 
-        self.index.set_ef(top_k * 10)
-        labels, distances = self.index.knn_query(query_emb, k=top_k)
-        ids = [int(idx_to_uid[str(i)]) for i in labels[0]]
-        scores = distances[0].tolist()
+        Raises:
+            ValueError: If `mode` is not a known search mode.
+            RuntimeError: If `filters` are given but the corpus has no metadata
+                index yet (see `can_filter`).
+        """
+        mode = (mode or self.search_mode).lower()
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
 
-        results = self.collection.get(ids=[str(i) for i in ids])
-        matched = []
-        for i in range(len(results["ids"])):
-            matched.append({
-                "id": int(results["ids"][i]),
-                "text": results["documents"][i],
-                "score": scores[i],
-                "metadata": results["metadatas"][i]
-            })
+        k = min(top_k, self.live_count)
+        self.last_path = self.path
+        if k == 0:
+            return []
+        filters = {key: v for key, v in (filters or {}).items() if v is not None}
+        subset = allowed = None
+        if filters:
+            if self.meta is None:
+                raise RuntimeError(f"No metadata index for {self.corpus.key}; re-index to filter searches")
+            subset = self.meta.select(live=self.labels >= 0, **filters)
+            allowed = np.zeros(len(self.labels), dtype=bool)
+            allowed[subset] = True
+            k = min(k, len(subset))
+            if k == 0:
+                return []
+        dense_path = "exact" if self._subset_exact(subset) else self.path
+        available = len(subset) if subset is not None else self.live_count
+        if mode == "dense":
+            hits, scores = self._dense(query, k, subset, allowed)
+            self.last_path = dense_path
+        elif mode == "lexical":
+            hits, scores = self._lexical(query, k, filters, allowed)
+            self.last_path = self.lexical_path or "empty"
+        else:
+            n = min(max(k, self.hybrid_candidates), available)
+            dense_hits, _ = self._dense(query, n, subset, allowed)
+            lexical_hits, _ = self._lexical(query, n, filters, allowed)
+            hits, scores = self._fuse([dense_hits, lexical_hits], k)
+            self.last_path = f"{dense_path}+{self.lexical_path}" if self.lexical_path else dense_path
 
-        self.logger.info(f"Found {len(matched)} results for: {query}")
+        matched = self._hydrate(hits, scores)
+        self.logger.info(f"Found {len(matched)} results ({self.last_path}) for: {query}")
         return matched
 
     
@@ -0,0 +1,46 @@
+import queue
+import threading
+
+from src.pipeline.indexer import Indexer
+from src.pipeline.ingestor import Ingestor
+
+
+def ingest_and_index(ingestor: Ingestor, indexer: Indexer, queue_size: int = 8) -> None:
+    """
+    Run ingestion and indexing concurrently, connected by a bounded queue.
+
+    The staged pipeline writes every chunk to JSON before the first one is
+    embedded. Here `Ingestor.stream` pushes each document's chunks as soon
+    as it is chunked, and `Indexer.consume` (on a background thread) embeds
+    and inserts them while the next documents are still being OCRed:
+
+        extract/OCR → chunk ──(queue of `queue_size` documents)──► embed → HNSW + chunk store
+
+    Time-to-first-searchable-document drops to the processing time of one
+    document, and at most `queue_size` documents of chunks wait in memory.
+
+    Args:
+        ingestor (Ingestor): Configured ingestor of the user.
+        indexer (Indexer): Indexer of the same corpus (user or RAG).
+        queue_size (int): Maximum number of documents buffered between the stages.
+
+    Raises:
+        Exception: Whatever the ingestion or indexing stage raised.
+    """
+    chunks_q: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    errors = []
+
+    def consume() -> None:
+        try:
+            indexer.consume(chunks_q)
+        except Exception as e:
+            errors.append(e)
+
+    consumer = threading.Thread(target=consume, name=f"indexer-{indexer.user_id}", daemon=True)
+    consumer.start()
+    try:
+        ingestor.stream(chunks_q)
+    finally:
+        consumer.join()
+    if errors:
+        raise errors[0]
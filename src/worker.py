@@ -0,0 +1,346 @@
+"""
+Ingestion worker pool.
+
+Processes the durable `ingest_jobs` queue filled by the API (`create_rag`,
+`modify_rag`). The supervisor starts the node's shared LayoutService once,
+spawns `jobs.workers` worker processes that claim jobs from the database,
+restarts workers that die, and fails over jobs whose worker stopped
+sending heartbeats.
+
+Usage:
+    python -m src.worker [num_workers]
+
+Example:
+    python -m src.worker 2
+"""
+
+import multiprocessing as mp
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import List, Optional
+
+from yaml import safe_load
+
+from src.core.Logger import LoggerManager
+from src.core.progress import JobProgress
+
+
+def run_ingest_job(user_id: str, layout_client, progress: Optional[JobProgress] = None,
+                   rag_id: Optional[int] = None) -> None:
+    """
+    Ingest and index the documents of one RAG workspace.
+
+    Layout inference is delegated to the node's shared, already warm
+    LayoutService; the function then processes files (OCR, chunking,
+    entity extraction) and updates the RAG's own index (see `Corpus`). With
+    `indexing.streaming` (default) both stages run concurrently and
+    documents become searchable one by one.
+
+    Args:
+        user_id (str): Owner of the documents (the RAG creator).
+        layout_client (LayoutClient): Handle to the node's shared layout model server.
+        progress (Optional[JobProgress]): Shared by all stages to report pages,
+            documents, searchable chunks and per-stage timings.
+        rag_id (Optional[int]): RAG to ingest; None for the user's whole data directory.
+    """
+    from src.core.utils import FileManager
+    from src.core.block_processor import BlockProcessor
+    from src.core.chunk_builder import ChunkBuilder
+    from src.modules.layout_extractor import LayoutExtractor
+    from src.modules.document_loader import DocumentLoader
+    from src.modules.entity_extractor import EntityExtractor
+    from src.pipeline.ingestor import Ingestor
+    from src.pipeline.indexer import Indexer
+    from src.pipeline.streaming import ingest_and_index
+    from src.api.db import engine
+    from src.api.chunk_table import ChunkTable
+
+    logger = LoggerManager(Path("storage/logs")).get_logger()
+    files = FileManager(logger)
+    cfg = safe_load(Path("config/config.yaml").read_text(encoding="utf-8"))
+
+    layout = LayoutExtractor(
+        files,
+        Path("config/config.yaml"),
+        layout_client=layout_client,
+        ocr_lang="eng",
+        progress=progress,
+    )
+    chunker = ChunkBuilder(
+        chunk_size=int(cfg["chunking"]["chunk_size"]),
+        tokenizer_model=cfg["tokenizer"]["model"],
+        logger=logger,
+    )
+    ing = Ingestor(
+        config=cfg,
+        file_manager=files,
+        layout_extractor=layout,
+        document_loader=DocumentLoader(),
+        block_processor=BlockProcessor(logger),
+        entity_extractor=EntityExtractor(files, Path("config/config.yaml")),
+        chunk_builder=chunker,
+        logger=logger,
+        user_id=user_id,
+        mode="layout",
+        progress=progress,
+        rag_id=rag_id,
+    )
+    # Texts of a RAG go to the `chunks` table with `indexing.vector_store: sql`.
+    chunk_table = ChunkTable(engine, rag_id, user_id, logger) if rag_id is not None else None
+    indexer = Indexer(cfg, files, logger, user_id, progress=progress, rag_id=rag_id,
+                      chunk_table=chunk_table)
+    index_cfg = cfg.get("indexing", {})
+    if index_cfg.get("streaming", True):
+        # Index each document as soon as it is chunked
+        ingest_and_index(ing, indexer, int(index_cfg.get("stream_queue_size", 8)))
+    else:
+        ing.run()
+        indexer.run()
+
+
+def worker_loop(worker_id: str, layout_client, jobs_cfg: dict, stop) -> None:
+    """
+    Claim and run jobs until `stop` is set.
+
+    While a job runs, a side thread refreshes its heartbeat so the
+    supervisor can tell a slow job from a dead worker, and the job's
+    `JobProgress` (pages, documents, searchable chunks, stage timings) is
+    written to its row at most every `jobs.progress_interval_s`. A job that raises
+    is requeued with backoff (or marked failed after `max_attempts`).
+
+    Args:
+        worker_id (str): Identifier stored on claimed jobs.
+        layout_client (LayoutClient): Handle to the node's shared layout model server.
+        jobs_cfg (dict): The `jobs` section of the config.
+        stop (mp.Event): Set by the supervisor to request a graceful exit.
+    """
+    from src.api.db import SessionLocal
+    from src.api import jobs
+
+    logger = LoggerManager(Path("storage/logs")).get_logger()
+    poll_s = float(jobs_cfg.get("poll_interval_s", 1.0))
+    beat_s = float(jobs_cfg.get("heartbeat_interval_s", 10))
+    backoff_s = float(jobs_cfg.get("retry_backoff_s", 30))
+    progress_s = float(jobs_cfg.get("progress_interval_s", 1.0))
+
+    def save_progress(job_id: int, snapshot: dict) -> None:
+        db = SessionLocal()
+        try:
+            jobs.update_progress(db, job_id, snapshot)
+        except Exception as e:
+            logger.warning(f"[{worker_id}] Progress update of job {job_id} failed: {e}")
+        finally:
+            db.close()
+
+    def beat(job_id: int, done: threading.Event) -> None:
+        while not done.wait(beat_s):
+            db = SessionLocal()
+            try:
+                jobs.heartbeat(db, job_id)
+            except Exception as e:
+                logger.warning(f"[{worker_id}] Heartbeat of job {job_id} failed: {e}")
+            finally:
+                db.close()
+
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            job = jobs.claim_next(db, worker_id)
+            job_id, rag_id, user_id = (job.id, job.rag_id, job.user_id) if job else (None, None, None)
+        except Exception as e:
+            logger.error(f"[{worker_id}] Failed to poll the job queue: {e}")
+            job_id = None
+        finally:
+            db.close()
+        if job_id is None:
+            stop.wait(poll_s)
+            continue
+
+        logger.info(f"[{worker_id}] Running ingest job {job_id} (rag {rag_id}, user {user_id})")
+        done = threading.Event()
+        beater = threading.Thread(target=beat, args=(job_id, done), daemon=True)
+        beater.start()
+        progress = JobProgress(sink=lambda snap, jid=job_id: save_progress(jid, snap), interval=progress_s)
+        t0 = time.perf_counter()
+        try:
+            run_ingest_job(str(user_id), layout_client, progress, rag_id)
+            error = None
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            done.set()
+            beater.join()
+
+        db = SessionLocal()
+        try:
+            snapshot = progress.snapshot()
+            if error is None:
+                jobs.complete(db, job_id, snapshot)
+                logger.info(
+                    f"[{worker_id}] Job {job_id} done in {time.perf_counter() - t0:.1f}s "
+                    f"({snapshot['pages_done']} pages, {snapshot['chunks_searchable']} chunks searchable) | "
+                    + ", ".join(f"{k}={v:.1f}s" for k, v in snapshot["stage_seconds"].items())
+                )
+            else:
+                jobs.update_progress(db, job_id, snapshot)
+                state = jobs.fail(db, job_id, error, backoff_s)
+                logger.error(f"[{worker_id}] Job {job_id} failed ({state.value}): {error}")
+        finally:
+            db.close()
+
+
+class WorkerPool:
+    """
+    WorkerPool — Supervisor of the ingestion worker processes of one node.
+
+    Owns the node's LayoutService (so every worker shares one warm YOLO
+    model) and restarts its server when it fails a health check, keeps
+    `num_workers` worker processes alive and periodically fails over jobs
+    with a stale heartbeat. Concurrency is bounded by
+    `num_workers` per node; the per-RAG running-job index keeps a RAG's
+    jobs serial across nodes.
+    """
+
+    def __init__(self, config: dict, logger, num_workers: Optional[int] = None) -> None:
+        """
+        Args:
+            config (dict): Pipeline configuration (config/config.yaml).
+            logger (Logger): Logger instance.
+            num_workers (Optional[int]): Worker processes (default: `jobs.workers`).
+        """
+        self.config = config
+        self.logger = logger
+        self.jobs_cfg = config.get("jobs", {})
+        self.num_workers = max(1, int(num_workers or self.jobs_cfg.get("workers", 2)))
+        self.ctx = mp.get_context("spawn")
+        self.stop_event = self.ctx.Event()
+        self.procs: List[mp.Process] = []
+        self.layout_service = None
+        self.layout_client = None
+        self._supervisor: Optional[threading.Thread] = None
+        self._prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _spawn(self, i: int):
+        p = self.ctx.Process(
+            target=worker_loop,
+            args=(f"{self._prefix}/{i}", self.layout_client, self.jobs_cfg, self.stop_event),
+            name=f"ingest-worker-{i}",
+            daemon=True,
+        )
+        p.start()
+        return p
+
+    def start(self) -> None:
+        """
+        Start the shared LayoutService and the worker processes.
+        """
+        from src.modules.layout_service import get_layout_service, DEFAULT_LAYOUT_MODEL
+
+        layout_cfg = self.config.get("layout", {})
+        self.layout_service = get_layout_service(
+            layout_cfg.get("model_path", DEFAULT_LAYOUT_MODEL),
+            self.logger,
+            int(layout_cfg.get("reply_slots", 32)),
+            int(layout_cfg.get("max_batch_size", 8)),
+            float(layout_cfg.get("max_wait_ms", 10)),
+        )
+        self.layout_client = self.layout_service.client()
+        from src.modules.ocr_engine import tesserocr
+        if tesserocr is None and layout_cfg.get("ocr_backend", "auto") != "pytesseract":
+            self.logger.warning("tesserocr is not installed; OCR falls back to one tesseract process per region")
+        self.procs = [self._spawn(i) for i in range(self.num_workers)]
+        self.logger.info(f"Started {self.num_workers} ingestion worker(s)")
+
+    def check_layout_service(self, timeout: float) -> None:
+        """
+        Ping the layout model server and restart it if it is dead or does not answer.
+
+        Only the server process is replaced (see `LayoutService.restart_server`),
+        so the workers' `LayoutClient` stays valid and they need no respawn.
+
+        Args:
+            timeout (float): Seconds to wait for the server's reply.
+        """
+        if self.layout_service is None or self.layout_service.is_healthy(timeout):
+            return
+        self.logger.warning("Layout model server failed its health check")
+        try:
+            self.layout_service.restart_server()
+        except Exception as e:
+            self.logger.error(f"Layout model server restart failed: {e}")
+
+    def supervise(self) -> None:
+        """
+        Restart dead workers and an unhealthy layout server, and fail over stale jobs, until `stop()` is called.
+        """
+        from src.api.db import SessionLocal
+        from src.api import jobs
+
+        timeout_s = float(self.jobs_cfg.get("heartbeat_timeout_s", 120))
+        backoff_s = float(self.jobs_cfg.get("retry_backoff_s", 30))
+        health_timeout_s = float(self.config.get("layout", {}).get("health_timeout_s", 30))
+        while not self.stop_event.wait(min(timeout_s / 4, 15.0)):
+            self.check_layout_service(health_timeout_s)
+            for i, p in enumerate(self.procs):
+                if not p.is_alive():
+                    self.logger.warning(f"Ingestion worker {i} exited with code {p.exitcode}; restarting")
+                    self.procs[i] = self._spawn(i)
+            db = SessionLocal()
+            try:
+                stale = jobs.requeue_stale(db, timeout_s, backoff_s)
+                if stale:
+                    self.logger.warning(f"Failed over stale ingest jobs {stale}")
+            except Exception as e:
+                self.logger.error(f"Stale job check failed: {e}")
+            finally:
+                db.close()
+
+    def start_background(self) -> None:
+        """
+        Start the pool and supervise it from a daemon thread (embedded in the API).
+        """
+        self.start()
+        self._supervisor = threading.Thread(target=self.supervise, name="ingest-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        Ask workers to exit after their current job, then terminate stragglers.
+
+        A terminated worker's job is failed over by the heartbeat check of
+        the next supervisor that runs.
+
+        Args:
+            timeout (float): Seconds to wait for each worker to finish.
+        """
+        self.stop_event.set()
+        for p in self.procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        if self._supervisor is not None:
+            self._supervisor.join(5)
+        self.logger.info("Ingestion workers stopped")
+
+
+if __name__ == "__main__":
+    mp.set_start_method("spawn", force=True)
+    logger = LoggerManager(Path("storage/logs")).get_logger()
+    cfg = safe_load(Path("config/config.yaml").read_text(encoding="utf-8"))
+    pool = WorkerPool(cfg, logger, int(sys.argv[1]) if len(sys.argv) > 1 else None)
+    signal.signal(signal.SIGTERM, lambda *_: pool.stop_event.set())
+    pool.start()
+    try:
+        pool.supervise()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+        from src.modules.layout_service import shutdown_layout_service
+        shutdown_layout_service()